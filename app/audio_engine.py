@@ -0,0 +1,153 @@
+# VISIT Audio Engine
+# Developed by Dineshkumar Rajendran
+#
+# Plays the trigger audio through pygame.mixer with a small output buffer.
+# Short clips are preloaded Sound objects from the media cache and loop on a
+# fixed pool of reserved channels, so switching categories is a crossfade
+# between two channels rather than a file load. Tracks too long for the cache
+# stream through pygame.mixer.music. Every switch records the time from the
+# camera frame that triggered it to the moment the audio reaches the output.
+
+import os
+import threading
+import time
+from collections import deque
+
+from startup import LazyModule
+
+pygame = LazyModule('pygame')
+
+
+class AudioEngine:
+    """Channel pool with crossfades between trigger categories"""
+
+    def __init__(self, media_cache, frequency=44100, buffer_size=512, channels=8, crossfade_ms=250,
+                 source=None, clock=time.perf_counter, history=200):
+        self.media_cache = media_cache
+        self.frequency = frequency
+        self.buffer_size = buffer_size
+        self.channel_count = max(2, channels)
+        self.crossfade_ms = crossfade_ms
+        # Maps a configured path to the file to stream (e.g. its normalized copy)
+        self.source = source or (lambda path: path)
+        self.clock = clock
+        self.ready = False
+        self.channels = []
+        self.category = None
+        self.path = None
+        self.channel = None
+        self.streaming = False
+        self._next_channel = 0
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=history)
+        self.plays = 0
+        self.streams = 0
+        self.crossfades = 0
+
+    @property
+    def output_latency(self):
+        """Seconds one mixer buffer takes to reach the speakers"""
+        return self.buffer_size / float(self.frequency)
+
+    def init(self):
+        """Open the mixer with the configured buffer and reserve the channel pool"""
+        with self._lock:
+            if self.ready:
+                return
+            pygame.mixer.pre_init(self.frequency, -16, 2, self.buffer_size)
+            pygame.mixer.init()
+            pygame.mixer.set_num_channels(self.channel_count)
+            # Reserved channels are never picked by a plain Sound.play()
+            pygame.mixer.set_reserved(self.channel_count)
+            self.channels = [pygame.mixer.Channel(index) for index in range(self.channel_count)]
+            self.frequency = pygame.mixer.get_init()[0]
+            self.ready = True
+
+    def _free_channel(self):
+        for _ in range(len(self.channels)):
+            channel = self.channels[self._next_channel]
+            self._next_channel = (self._next_channel + 1) % len(self.channels)
+            if not channel.get_busy():
+                return channel
+        # Every channel is still fading out: take the oldest one
+        channel = self.channels[self._next_channel]
+        self._next_channel = (self._next_channel + 1) % len(self.channels)
+        return channel
+
+    def _fade_out_current(self):
+        if self.channel is not None:
+            self.channel.fadeout(self.crossfade_ms)
+            self.crossfades += 1
+        if self.streaming:
+            pygame.mixer.music.fadeout(self.crossfade_ms)
+            self.crossfades += 1
+        self.channel = None
+        self.streaming = False
+
+    def play(self, category, path, trigger_time=None):
+        """Crossfade to a category's audio; a missing path fades the current audio out
+
+        trigger_time is the clock() time of the frame that caused the switch.
+        """
+        if not self.ready:
+            self.init()
+        with self._lock:
+            if category == self.category and path == self.path:
+                return
+            self._fade_out_current()
+            self.category = category
+            self.path = path
+            if not path:
+                return
+
+            sound = self.media_cache.get_sound(path)
+            if sound is not None:
+                self.channel = self._free_channel()
+                self.channel.play(sound, loops=-1, fade_ms=self.crossfade_ms)
+                self.plays += 1
+            elif os.path.exists(path):
+                # A single music stream: loading it cuts any stream still fading out
+                pygame.mixer.music.load(self.source(path))
+                pygame.mixer.music.play(loops=-1, fade_ms=self.crossfade_ms)
+                self.streaming = True
+                self.streams += 1
+            else:
+                return
+
+            if trigger_time is not None:
+                self.latencies.append(self.clock() - trigger_time + self.output_latency)
+
+    def stop(self):
+        with self._lock:
+            if self.ready:
+                pygame.mixer.stop()
+                pygame.mixer.music.stop()
+            self.channel = None
+            self.streaming = False
+            self.category = None
+            self.path = None
+
+    def quit(self):
+        self.stop()
+        with self._lock:
+            if self.ready:
+                pygame.mixer.quit()
+                self.ready = False
+
+    def get_stats(self):
+        latencies = sorted(self.latencies)
+        stats = {
+            'plays': self.plays,
+            'streams': self.streams,
+            'crossfades': self.crossfades,
+            'output_latency_ms': self.output_latency * 1000.0,
+            'switches_measured': len(latencies),
+            'latency_ms': 0.0,
+            'latency_p95_ms': 0.0,
+            'latency_max_ms': 0.0
+        }
+        if latencies:
+            stats['latency_ms'] = sum(latencies) / len(latencies) * 1000.0
+            stats['latency_p95_ms'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000.0
+            stats['latency_max_ms'] = latencies[-1] * 1000.0
+        return stats
@@ -0,0 +1,451 @@
+# VISIT Sensitivity Calibration
+# Developed by Dineshkumar Rajendran
+#
+# Tunes the detection thresholds for a venue from footage recorded on site.
+# The operator records a short clip per situation listed under
+# calibration.clips in the detection settings (an empty room, a visitor
+# standing still, talking, blinking, walking up to the exhibit). Each clip
+# is replayed once, faster than real time and split across a process pool,
+# through the models at their most permissive settings; the per-frame model
+# outputs are cached next to the clip. Every threshold combination is then
+# scored by re-running only the cheap threshold logic over the cached
+# outputs, and the best combination is written to the detection settings.
+#
+#   python calibration.py record empty --seconds 60
+#   python calibration.py run --apply
+
+import argparse
+import copy
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from camera import CameraSource
+from frame_store import file_hash
+from settings import APP_DIR, DETECTION_SETTINGS_FILE
+from settings import load_detection_settings, load_display_settings, save_settings
+
+FEATURES_VERSION = 1
+# Face scores are collected down to this confidence so stricter values can be replayed
+MIN_FACE_CONFIDENCE = 0.3
+CLIP_EXTENSION = '.mp4'
+
+# Candidate values, from most sensitive to most conservative; on equal
+# scores the more conservative value wins
+MOTION_VAR_THRESHOLDS = (12, 16, 25, 36, 50)
+SWEEPS = {
+    'motion': {
+        'states': ('movement',),
+        'grid': {'threshold': (0.002, 0.005, 0.01, 0.02, 0.03, 0.05, 0.08)}
+    },
+    'face': {
+        'states': ('face',),
+        'grid': {'min_detection_confidence': (0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9)}
+    },
+    'approach': {
+        'states': ('face_approaching', 'face_receding'),
+        'grid': {'trend_window': (2, 3, 5, 8), 'approach_ratio': (1.03, 1.05, 1.08, 1.1, 1.15, 1.2, 1.3),
+                 'recede_ratio': (0.97, 0.95, 0.92, 0.9, 0.87, 0.83, 0.77)}
+    },
+    'eyes': {
+        'states': ('eye_movement',),
+        'grid': {'eye_window': (5, 10, 15), 'eye_change': (0.01, 0.02, 0.03, 0.05, 0.08, 0.12)}
+    },
+    'lips': {
+        'states': ('lip_movement',),
+        'grid': {'lip_window': (4, 8, 12), 'lip_change': (0.005, 0.01, 0.02, 0.03, 0.05, 0.08)}
+    }
+}
+
+
+def calibration_dir(settings):
+    return os.path.normpath(os.path.join(APP_DIR, '..', settings['calibration']['output_dir']))
+
+
+def clip_path(settings, label):
+    return os.path.join(calibration_dir(settings), label + CLIP_EXTENSION)
+
+
+def recorded_clips(settings):
+    """Labels of the configured clips that have been recorded"""
+    return [label for label in settings['calibration']['clips'] if os.path.exists(clip_path(settings, label))]
+
+
+def record_clip(path, seconds, camera_settings, progress=None):
+    """Record raw camera frames to path for the given number of seconds"""
+    # Written next to the final name so a failed recording never replaces a good clip
+    partial = path + '.partial' + CLIP_EXTENSION
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    camera = CameraSource(**camera_settings)
+    camera.open()
+    writer = None
+    frames = 0
+    try:
+        fps = camera.negotiated['fps'] or 15.0
+        size = (camera.negotiated['width'], camera.negotiated['height'])
+        writer = cv2.VideoWriter(partial, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+        start = time.monotonic()
+        while time.monotonic() - start < seconds:
+            item = camera.read(timeout=1.0)
+            if item is None:
+                continue
+            writer.write(item[0])
+            frames += 1
+            if progress is not None:
+                progress(time.monotonic() - start)
+    finally:
+        if writer is not None:
+            writer.release()
+        camera.release()
+    if not frames:
+        os.remove(partial)
+        raise IOError("The camera delivered no frames")
+    os.replace(partial, path)
+    return frames
+
+
+def extraction_settings(settings):
+    """Everything the cached model outputs depend on"""
+    motion = {key: value for key, value in settings['motion'].items() if key not in ('threshold', 'var_threshold')}
+    return {
+        'version': FEATURES_VERSION,
+        'face_confidence': MIN_FACE_CONFIDENCE,
+        'face_mesh': settings['models']['face_mesh'],
+        'motion': motion,
+        'var_thresholds': list(MOTION_VAR_THRESHOLDS)
+    }
+
+
+def extract_segment(path, start, count, extraction):
+    """Run the models over frames [start, start + count) of a clip
+
+    Runs in a worker process. Frames are mirrored like the live capture
+    stage. Returns per-frame arrays: the best face score and box area, the
+    mean eye aspect ratio and the mouth aspect ratio (NaN without a face
+    mesh), and the largest zone motion fraction per MOG2 variance threshold
+    (NaN while the background model warms up).
+    """
+    import mediapipe as mp
+    from frame_bundle import FrameBundle
+    from motion import MotionEngine
+    from signals import eye_aspect_ratios, landmarks_to_array, mouth_aspect_ratio
+
+    face_detection = mp.solutions.face_detection.FaceDetection(
+        min_detection_confidence=extraction['face_confidence'])
+    face_mesh = mp.solutions.face_mesh.FaceMesh(**extraction['face_mesh'])
+    motion_settings = dict(extraction['motion'])
+    width = motion_settings.pop('width')
+    engines = [MotionEngine(var_threshold=value, **motion_settings) for value in extraction['var_thresholds']]
+
+    features = {name: np.full(count, np.nan) for name in ('face_score', 'face_area', 'ear', 'mar')}
+    features['motion'] = np.full((count, len(engines)), np.nan)
+    capture = cv2.VideoCapture(path)
+    capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+    try:
+        for index in range(count):
+            ok, frame = capture.read()
+            if not ok:
+                break
+            bundle = FrameBundle(cv2.flip(frame, 1))
+            height, frame_width = bundle.shape[:2]
+
+            result = face_detection.process(bundle.rgb)
+            features['face_score'][index] = 0.0
+            if result.detections:
+                best = max(result.detections, key=lambda detection: detection.score[0])
+                box = best.location_data.relative_bounding_box
+                features['face_score'][index] = best.score[0]
+                features['face_area'][index] = box.width * box.height
+
+            result = face_mesh.process(bundle.rgb)
+            if result.multi_face_landmarks:
+                points = landmarks_to_array(result.multi_face_landmarks[0])
+                aspect = frame_width / float(height)
+                features['ear'][index] = eye_aspect_ratios(points, aspect).mean()
+                features['mar'][index] = mouth_aspect_ratio(points, aspect)
+
+            thumbnail = bundle.gray_thumbnail(width)
+            for column, engine in enumerate(engines):
+                moving, fractions = engine.process(thumbnail)
+                if fractions:
+                    features['motion'][index, column] = max(fractions.values())
+    finally:
+        capture.release()
+        face_detection.close()
+        face_mesh.close()
+    return features
+
+
+def scored(predictions, labels):
+    """Balanced accuracy of boolean predictions against optional labels
+
+    labels holds 1 (should fire), 0 (should not) or -1 (not judged).
+    Returns None when the labels lack either positives or negatives.
+    """
+    positive = labels == 1
+    negative = labels == 0
+    if not positive.any() or not negative.any():
+        return None
+    true_positive = float(predictions[positive].mean())
+    true_negative = float(1.0 - predictions[negative].mean())
+    return 0.5 * (true_positive + true_negative)
+
+
+def replay(group, params, clips, settings):
+    """Predictions per state for one parameter combination over every clip
+
+    Mirrors the interpret() logic of the detectors on the cached outputs.
+    """
+    from signals import SignalTrack, create_smoother
+
+    signal_settings = settings['signals']
+    face_confidence = settings['models']['face_detection']['min_detection_confidence']
+    predictions = {state: [] for state in SWEEPS[group]['states']}
+    for features in clips:
+        count = len(features['face_score'])
+        if group == 'motion':
+            column = MOTION_VAR_THRESHOLDS.index(params['var_threshold'])
+            fractions = features['motion'][:, column]
+            predictions['movement'].append(np.nan_to_num(fractions, nan=0.0) >= params['threshold'])
+        elif group == 'face':
+            predictions['face'].append(features['face_score'] >= params['min_detection_confidence'])
+        elif group == 'approach':
+            track = SignalTrack(signal_settings['history'], create_smoother(signal_settings))
+            approaching = np.zeros(count, dtype=bool)
+            receding = np.zeros(count, dtype=bool)
+            for index in np.flatnonzero(features['face_score'] >= face_confidence):
+                track.append(features['face_area'][index], now=index)
+                ratio = track.ratio(params['trend_window'])
+                approaching[index] = ratio > params['approach_ratio']
+                receding[index] = ratio < params['recede_ratio']
+            predictions['face_approaching'].append(approaching)
+            predictions['face_receding'].append(receding)
+        elif group == 'eyes':
+            track = SignalTrack(signal_settings['history'])
+            moving = np.zeros(count, dtype=bool)
+            for index in np.flatnonzero(~np.isnan(features['ear'])):
+                track.append(features['ear'][index], now=index)
+                moving[index] = track.deviation(params['eye_window']) > params['eye_change']
+            predictions['eye_movement'].append(moving)
+        elif group == 'lips':
+            track = SignalTrack(signal_settings['history'], create_smoother(signal_settings))
+            moving = np.zeros(count, dtype=bool)
+            for index in np.flatnonzero(~np.isnan(features['mar'])):
+                track.append(features['mar'][index], now=index)
+                moving[index] = track.spread(params['lip_window']) > params['lip_change']
+            predictions['lip_movement'].append(moving)
+    return {state: np.concatenate(values) for state, values in predictions.items()}
+
+
+def score_params(group, params, clips, labels, settings):
+    """Mean balanced accuracy over the group's judged states; runs in a worker"""
+    predictions = replay(group, params, clips, settings)
+    scores = [scored(predictions[state], labels[state]) for state in predictions]
+    scores = [score for score in scores if score is not None]
+    return params, (sum(scores) / len(scores) if scores else None)
+
+
+def grid_points(group):
+    grid = SWEEPS[group]['grid']
+    if group == 'motion':
+        grid = dict(grid, var_threshold=MOTION_VAR_THRESHOLDS)
+    points = [{}]
+    for name, values in grid.items():
+        points = [dict(point, **{name: value}) for point in points for value in values]
+    return points
+
+
+def current_params(group, settings):
+    if group == 'motion':
+        motion = settings['motion']
+        var_threshold = min(MOTION_VAR_THRESHOLDS, key=lambda value: abs(value - motion['var_threshold']))
+        return {'threshold': motion['threshold'], 'var_threshold': var_threshold}
+    if group == 'face':
+        return {'min_detection_confidence': settings['models']['face_detection']['min_detection_confidence']}
+    return {name: settings['signals'][name] for name in SWEEPS[group]['grid']}
+
+
+def apply_params(settings, group, params):
+    if group == 'motion':
+        settings['motion'].update(params)
+    elif group == 'face':
+        settings['models']['face_detection'].update(params)
+    else:
+        settings['signals'].update(params)
+
+
+class Calibrator:
+    """Feature extraction and threshold sweeps over the recorded clips"""
+
+    def __init__(self, settings, workers=None, log=print):
+        self.settings = settings
+        calibration = settings['calibration']
+        self.workers = workers or calibration['workers'] or os.cpu_count() or 1
+        self.chunk_frames = calibration['chunk_frames']
+        self.log = log
+        self.extraction = extraction_settings(settings)
+        key = json.dumps(self.extraction, sort_keys=True).encode('utf-8')
+        self.extraction_key = hashlib.sha1(key).hexdigest()[:12]
+
+    def _executor(self):
+        # MediaPipe keeps native threads, so workers are spawned rather than forked
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _cache_path(self, path):
+        return os.path.join(calibration_dir(self.settings), 'features',
+                            f"{file_hash(path)[:16]}-{self.extraction_key}.npz")
+
+    def extract(self, labels):
+        """Model outputs of every clip, from the cache or the process pool"""
+        features = {}
+        pending = {}
+        for label in labels:
+            path = clip_path(self.settings, label)
+            cache_path = self._cache_path(path)
+            if os.path.exists(cache_path):
+                with np.load(cache_path) as cached:
+                    features[label] = {name: cached[name] for name in cached.files}
+                self.log(f"Calibration: using cached model outputs for '{label}'")
+                continue
+            capture = cv2.VideoCapture(path)
+            total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+            capture.release()
+            pending[label] = (path, cache_path, total)
+
+        if pending:
+            with self._executor() as executor:
+                futures = {}
+                for label, (path, _, total) in pending.items():
+                    self.log(f"Calibration: analysing '{label}' ({total} frames)")
+                    futures[label] = [executor.submit(extract_segment, path, start,
+                                                      min(self.chunk_frames, total - start), self.extraction)
+                                      for start in range(0, total, self.chunk_frames)]
+                for label, segment_futures in futures.items():
+                    segments = [future.result() for future in segment_futures]
+                    features[label] = {name: np.concatenate([segment[name] for segment in segments])
+                                       for name in segments[0]}
+                    cache_path = pending[label][1]
+                    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                    np.savez_compressed(cache_path, **features[label])
+        return features
+
+    def labels(self, labels, features):
+        """Per-state label arrays aligned with the concatenated clip frames"""
+        clips = self.settings['calibration']['clips']
+        states = {state for group in SWEEPS.values() for state in group['states']}
+        arrays = {}
+        for state in states:
+            parts = []
+            for label in labels:
+                value = clips[label].get(state)
+                count = len(features[label]['face_score'])
+                parts.append(np.full(count, -1 if value is None else int(bool(value)), dtype=np.int8))
+            arrays[state] = np.concatenate(parts)
+        return arrays
+
+    def sweep(self, executor, groups, clips, label_arrays, settings):
+        """Best parameters per group; returns {group: (params, score, current_score)}"""
+        futures = {}
+        for group in groups:
+            judged = [state for state in SWEEPS[group]['states']
+                      if (label_arrays[state] == 1).any() and (label_arrays[state] == 0).any()]
+            if not judged:
+                self.log(f"Calibration: no clips judge {', '.join(SWEEPS[group]['states'])}; skipped")
+                continue
+            current = executor.submit(score_params, group, current_params(group, settings),
+                                      clips, label_arrays, settings)
+            points = [executor.submit(score_params, group, params, clips, label_arrays, settings)
+                      for params in grid_points(group)]
+            futures[group] = (current, points)
+
+        results = {}
+        for group, (current, points) in futures.items():
+            _, current_score = current.result()
+            best_params, best_score = None, None
+            for future in points:
+                params, score = future.result()
+                if score is not None and (best_score is None or score >= best_score):
+                    best_params, best_score = params, score
+            if best_params is not None:
+                results[group] = (best_params, best_score, current_score)
+        return results
+
+    def run(self, labels=None):
+        """Calibrated copy of the settings and the per-group results"""
+        labels = labels or recorded_clips(self.settings)
+        if not labels:
+            raise ValueError("No calibration clips have been recorded")
+        start = time.monotonic()
+        features = self.extract(labels)
+        clips = [features[label] for label in labels]
+        label_arrays = self.labels(labels, features)
+
+        calibrated = copy.deepcopy(self.settings)
+        results = {}
+        with self._executor() as executor:
+            # Approach detection only sees the faces that pass the face
+            # threshold, so it is swept after that threshold is settled
+            for groups in ([group for group in SWEEPS if group != 'approach'], ['approach']):
+                phase = self.sweep(executor, groups, clips, label_arrays, calibrated)
+                for group, (params, score, current_score) in phase.items():
+                    # Only move away from the current values for a real improvement
+                    if current_score is None or score > current_score:
+                        apply_params(calibrated, group, params)
+                    self.log(f"Calibration {group}: {format_params(params)} scores {score:.3f}"
+                             + ("" if current_score is None else f" (current {current_score:.3f})"))
+                results.update(phase)
+        self.log(f"Calibration finished in {time.monotonic() - start:.1f}s using {', '.join(labels)}")
+        return calibrated, results
+
+
+def format_params(params):
+    return ', '.join(f"{name}={value}" for name, value in params.items())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record footage and calibrate the VISIT detection thresholds")
+    parser.add_argument('--config-dir', help="settings folder (default: configs)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    record = commands.add_parser('record', help="record one calibration clip from the camera")
+    record.add_argument('label', help="clip name from calibration.clips, e.g. empty")
+    record.add_argument('--seconds', type=float, help="length of the recording")
+    record.add_argument('--camera', help="camera index, video file or stream URL")
+    run = commands.add_parser('run', help="sweep the thresholds over the recorded clips")
+    run.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    run.add_argument('--apply', action='store_true', help="write the result to the detection settings")
+    args = parser.parse_args(argv)
+
+    settings = load_detection_settings(args.config_dir)
+    if args.command == 'record':
+        if args.label not in settings['calibration']['clips']:
+            print(f"Unknown clip '{args.label}'; expected one of {', '.join(settings['calibration']['clips'])}")
+            return 2
+        camera_settings = dict(load_display_settings(args.config_dir)['camera'])
+        if args.camera:
+            camera_settings['source'] = int(args.camera) if args.camera.isdigit() else args.camera
+        seconds = args.seconds or settings['calibration']['seconds']
+        print(f"Recording '{args.label}' for {seconds:.0f}s...")
+        frames = record_clip(clip_path(settings, args.label), seconds, camera_settings)
+        print(f"Recorded {frames} frames to {clip_path(settings, args.label)}")
+        return 0
+
+    try:
+        calibrated, _ = Calibrator(settings, args.workers).run()
+    except ValueError as e:
+        print(f"Calibration Error: {e}")
+        return 2
+    if args.apply:
+        save_settings(DETECTION_SETTINGS_FILE, calibrated, args.config_dir)
+        print("Detection settings updated")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+# VISIT Camera Capture
+# Developed by Dineshkumar Rajendran
+#
+# Owns the cv2.VideoCapture for one input: a local camera index, a video
+# file or an RTSP/HTTP stream. A reader thread drains the device as fast as
+# it delivers and keeps only the newest frame, so the detector never works
+# on a frame that sat in the driver's queue. Local cameras are asked for a
+# compressed format (MJPEG before YUYV), the configured resolution and frame
+# rate, and a one-frame driver buffer; what the driver actually granted is
+# read back and reported. When the device stops delivering, the reader
+# reopens it with an exponential back-off.
+
+import os
+import threading
+import time
+
+from startup import LazyModule
+
+cv2 = LazyModule('cv2')
+
+DEVICE = 'device'
+FILE = 'file'
+STREAM = 'stream'
+
+STREAM_PREFIXES = ('rtsp://', 'rtsps://', 'http://', 'https://', 'udp://', 'tcp://')
+
+
+def source_kind(source):
+    """Classify a capture source as a local device, a video file or a network stream"""
+    if isinstance(source, int):
+        return DEVICE
+    text = str(source).strip()
+    if text.isdigit():
+        return DEVICE
+    if text.lower().startswith(STREAM_PREFIXES):
+        return STREAM
+    return FILE
+
+
+def fourcc_name(code):
+    code = int(code)
+    if code <= 0:
+        return ''
+    return ''.join(chr((code >> (8 * index)) & 0xFF) for index in range(4)).strip('\x00')
+
+
+class CameraSource:
+    """Latest-frame reader thread with format negotiation and reconnects"""
+
+    def __init__(self, source=0, width=640, height=480, fps=30, fourcc=('MJPG', 'YUYV'),
+                 buffer_size=1, reconnect_initial_delay=0.5, reconnect_max_delay=10.0,
+                 read_failures=5, loop_files=True, rtsp_transport='tcp', clock=time.perf_counter):
+        self.kind = source_kind(source)
+        self.source = int(source) if self.kind == DEVICE else source
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = [fourcc] if isinstance(fourcc, str) else list(fourcc or [])
+        self.buffer_size = buffer_size
+        self.reconnect_initial_delay = reconnect_initial_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.read_failures = max(1, read_failures)
+        self.loop_files = loop_files
+        self.rtsp_transport = rtsp_transport
+        self.clock = clock
+
+        self.capture = None
+        self.negotiated = {}
+        self.state = 'closed'
+        self.last_error = None
+        self._frame = None
+        self._captured_at = None
+        self._sequence = 0
+        self._read_sequence = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._reconnect = threading.Event()
+        self._thread = None
+        self.frames = 0
+        self.unread_frames = 0
+        self.reconnects = 0
+        self.opened_at = None
+
+    @property
+    def is_opened(self):
+        return self._thread is not None
+
+    def _open_capture(self):
+        if self.kind == STREAM:
+            if self.rtsp_transport and 'OPENCV_FFMPEG_CAPTURE_OPTIONS' not in os.environ:
+                os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = f"rtsp_transport;{self.rtsp_transport}"
+            capture = cv2.VideoCapture(self.source, cv2.CAP_FFMPEG)
+        else:
+            capture = cv2.VideoCapture(self.source)
+        if not capture.isOpened():
+            capture.release()
+            raise IOError(f"Cannot open camera {self.source}")
+
+        if self.kind == DEVICE:
+            self._negotiate(capture)
+        if self.kind != FILE and self.buffer_size:
+            # Not every backend honours this; the reader thread drains either way
+            capture.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+
+        ok, frame = capture.read()
+        if not ok or frame is None:
+            capture.release()
+            raise IOError(f"Camera {self.source} opened but delivered no frame")
+        self.negotiated = {
+            'width': frame.shape[1],
+            'height': frame.shape[0],
+            'fps': capture.get(cv2.CAP_PROP_FPS) or 0.0,
+            'fourcc': fourcc_name(capture.get(cv2.CAP_PROP_FOURCC)),
+            'buffer_size': int(capture.get(cv2.CAP_PROP_BUFFERSIZE) or 0)
+        }
+        self._publish(frame)
+        return capture
+
+    def _negotiate(self, capture):
+        # V4L2 and DirectShow apply the pixel format before the frame size
+        for code in self.fourcc:
+            capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*code))
+            if fourcc_name(capture.get(cv2.CAP_PROP_FOURCC)) == code:
+                break
+        if self.width and self.height:
+            capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.fps:
+            capture.set(cv2.CAP_PROP_FPS, self.fps)
+
+    def open(self):
+        """Open the source and start the reader thread; raises IOError on failure"""
+        if self._thread is not None:
+            return
+        self.state = 'connecting'
+        try:
+            self.capture = self._open_capture()
+        except Exception as e:
+            self.state = 'closed'
+            self.last_error = str(e)
+            raise
+        self.state = 'streaming'
+        self.opened_at = self.clock()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._reader_loop, name='visit-camera', daemon=True)
+        self._thread.start()
+
+    def release(self):
+        """Stop the reader thread and close the device"""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(2.0)
+        self._thread = None
+        self._close_capture()
+        self.state = 'closed'
+
+    def _close_capture(self):
+        with self._cond:
+            capture, self.capture = self.capture, None
+        if capture is not None:
+            capture.release()
+
+    def reconnect(self):
+        """Ask the reader thread to reopen the device; returns immediately"""
+        self._reconnect.set()
+
+    def read(self, timeout=0.5):
+        """Wait for a frame newer than the last one read
+
+        Returns (frame, captured_at) or None when nothing new arrived in time.
+        """
+        with self._cond:
+            if self._sequence == self._read_sequence and not self._stop.is_set():
+                self._cond.wait(timeout)
+            if self._sequence == self._read_sequence:
+                return None
+            self._read_sequence = self._sequence
+            return self._frame, self._captured_at
+
+    def _publish(self, frame):
+        with self._cond:
+            if self._sequence != self._read_sequence:
+                self.unread_frames += 1
+            self._frame = frame
+            self._captured_at = self.clock()
+            self._sequence += 1
+            self.frames += 1
+            self._cond.notify_all()
+
+    def _reader_loop(self):
+        failures = 0
+        delay = self.reconnect_initial_delay
+        frame_interval = 0.0
+        if self.kind == FILE and self.negotiated.get('fps'):
+            # Files are paced at their own rate so they behave like a live camera
+            frame_interval = 1.0 / self.negotiated['fps']
+        next_frame = self.clock()
+
+        while not self._stop.is_set():
+            if self._reconnect.is_set() or self.capture is None:
+                self._reconnect.clear()
+                if not self._reopen(delay):
+                    delay = min(delay * 2, self.reconnect_max_delay)
+                    continue
+                delay = self.reconnect_initial_delay
+                failures = 0
+                next_frame = self.clock()
+
+            if frame_interval:
+                wait = next_frame - self.clock()
+                if wait > 0 and self._stop.wait(wait):
+                    break
+                next_frame = max(next_frame + frame_interval, self.clock() - frame_interval)
+
+            capture = self.capture
+            if capture is None:
+                # Released by release() while the reader was still running
+                break
+            ok, frame = capture.read()
+            if ok and frame is not None:
+                failures = 0
+                self._publish(frame)
+                continue
+
+            failures += 1
+            if self.kind == FILE:
+                if not self.loop_files:
+                    self.state = 'ended'
+                    break
+                if failures < self.read_failures:
+                    # End of the clip: start again
+                    capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+            if failures >= self.read_failures:
+                self.last_error = f"Camera {self.source} stopped delivering frames"
+                self.state = 'reconnecting'
+                self._close_capture()
+            else:
+                # A single dropped read; do not spin on a stalled device
+                self._stop.wait(0.01)
+
+    def _reopen(self, delay):
+        self._close_capture()
+        self.state = 'reconnecting'
+        try:
+            capture = self._open_capture()
+        except Exception as e:
+            self.last_error = str(e)
+            self._stop.wait(delay)
+            return False
+        with self._cond:
+            # release() may have given up waiting for this thread meanwhile;
+            # a capture published now would hold the device after it returned
+            if self._stop.is_set():
+                capture.release()
+                return False
+            self.capture = capture
+        self.reconnects += 1
+        self.state = 'streaming'
+        return True
+
+    def get_stats(self):
+        elapsed = self.clock() - self.opened_at if self.opened_at else 0.0
+        return {
+            'source': str(self.source),
+            'kind': self.kind,
+            'state': self.state,
+            'negotiated': dict(self.negotiated),
+            'frames': self.frames,
+            'fps': self.frames / elapsed if elapsed > 0 else 0.0,
+            'unread_frames': self.unread_frames,
+            'reconnects': self.reconnects,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,57 @@
+# VISIT Detection State Model
+# Developed by Dineshkumar Rajendran
+#
+# Thread-safe store for the detection states. The detection thread publishes
+# every frame; the UI drains only the states whose value changed since it
+# last looked, so any number of frames between two display refreshes collapse
+# into at most one label update per state.
+
+import threading
+
+
+class DetectionStateModel:
+    """Detection states with OFF->ON / ON->OFF edge tracking for the UI"""
+
+    def __init__(self, states):
+        self._lock = threading.Lock()
+        self._states = dict(states)
+        self._shown = dict(states)
+        self._force = True
+        self.transitions = 0
+        self.ui_updates = 0
+
+    def update(self, states):
+        """Publish the latest states; returns the states that changed edge"""
+        edges = {}
+        with self._lock:
+            for name, is_active in states.items():
+                if self._states.get(name) != is_active:
+                    self._states[name] = is_active
+                    edges[name] = is_active
+            self.transitions += len(edges)
+        return edges
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._states)
+
+    def drain_changes(self):
+        """States whose value differs from what the UI shows, marking them shown
+
+        A state that switched on and back off between two drains is not
+        reported at all.
+        """
+        with self._lock:
+            if self._force:
+                changes = dict(self._states)
+                self._force = False
+            else:
+                changes = {name: is_active for name, is_active in self._states.items()
+                           if self._shown.get(name) != is_active}
+            self._shown.update(changes)
+            if changes:
+                self.ui_updates += 1
+            return changes
+
+    def get_stats(self):
+        return {'transitions': self.transitions, 'ui_updates': self.ui_updates}
@@ -0,0 +1,60 @@
+# VISIT Detector Pool
+# Developed by Dineshkumar Rajendran
+#
+# Runs the MediaPipe graphs for a frame either one after another or
+# concurrently on a thread pool. MediaPipe releases the GIL inside its
+# calculators, so threads are enough to overlap the graphs and the solution
+# objects (which cannot be pickled) stay in this process.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SERIAL = 'serial'
+PARALLEL = 'parallel'
+
+
+class DetectorPool:
+    """Runs a set of detectors on the same image and joins their results"""
+
+    def __init__(self, mode=SERIAL, max_workers=4, log=print):
+        if mode not in (SERIAL, PARALLEL):
+            log(f"Unknown detection mode '{mode}', falling back to {SERIAL}")
+            mode = SERIAL
+        self.mode = mode
+        self.max_workers = max(1, int(max_workers))
+        self.executor = None
+        if self.mode == PARALLEL:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                               thread_name_prefix='visit-detector')
+        self.last_timings = {}
+
+    def _timed_process(self, name, detector, image):
+        start = time.perf_counter()
+        result = detector.run(image)
+        self.last_timings[name] = time.perf_counter() - start
+        return result
+
+    def submit(self, detectors, image):
+        """Start processing and return a callable that joins the results
+
+        In serial mode the detectors run immediately and the returned callable
+        only hands back the finished results. In parallel mode the caller can
+        do other cheap work before joining.
+        """
+        if self.executor is None:
+            results = {name: self._timed_process(name, detector, image)
+                       for name, detector in detectors.items()}
+            return lambda: results
+
+        futures = {name: self.executor.submit(self._timed_process, name, detector, image)
+                   for name, detector in detectors.items()}
+        return lambda: {name: future.result() for name, future in futures.items()}
+
+    def run(self, detectors, image):
+        """Process the image with every detector and return results by name"""
+        return self.submit(detectors, image)()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
@@ -0,0 +1,358 @@
+# VISIT Detector Registry
+# Developed by Dineshkumar Rajendran
+#
+# Every detector is a plugin that declares its relative cost, the inputs it
+# needs and the detection states it produces, together with the media
+# category each state triggers and its playback priority. The app builds its
+# detection states, media categories and priority order from the registry,
+# and only loads detectors whose states are wired to configured media (or
+# that another active detector needs).
+
+import threading
+
+from motion import MotionEngine
+from signals import SignalTrack, create_smoother, eye_aspect_ratios, landmarks_to_array, mouth_aspect_ratio
+
+MEDIA_TYPES = ('image', 'video', 'audio')
+
+
+class Detector:
+    """Base class for detector plugins
+
+    name      unique detector name, also used as the scheduler settings key
+    cost      relative cost per frame; cheap detectors run first
+    inline    run on the detection thread before the scheduled detectors
+    inputs    frame images ('rgb', 'gray') and detection states needed
+    outputs   (state, media category, priority) for every state produced;
+              a lower priority number wins when several states are active
+    landmark_fields  result attributes holding normalized landmarks, used
+                     for region-of-interest inference
+    """
+
+    name = None
+    cost = 1
+    inline = False
+    inputs = ()
+    outputs = ()
+    landmark_fields = ()
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.model = None
+        self.runner = None
+        self.region_tracker = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def states(self):
+        return [state for state, _, _ in self.outputs]
+
+    @property
+    def is_loaded(self):
+        return self.runner is not None
+
+    def create_model(self):
+        """Build the underlying model; detectors without one return None"""
+        return None
+
+    def load(self):
+        """Build the model on first use; safe to call from a warm-up thread"""
+        with self._load_lock:
+            if self.is_loaded:
+                return
+            model = self.create_model()
+            runner = model
+            if self.region_tracker is not None and model is not None:
+                # Imported here so detectors without ROI support never need it
+                from roi_tracker import RoiDetector
+                runner = RoiDetector(model, self.region_tracker, list(self.landmark_fields))
+            self.model = model
+            self.runner = runner
+
+    def unload(self):
+        """Release the model so an unused detector costs no memory"""
+        with self._load_lock:
+            if self.model is not None and hasattr(self.model, 'close'):
+                self.model.close()
+            self.model = None
+            self.runner = None
+            self.reset()
+
+    def run(self, bundle):
+        """process() under the model lock; None if the model was unloaded meanwhile"""
+        with self._load_lock:
+            if not self.is_loaded:
+                return None
+            return self.process(bundle)
+
+    def process(self, bundle):
+        """Run the model on a FrameBundle and return its raw result"""
+        return self.runner.process(bundle.rgb)
+
+    def interpret(self, result, states):
+        """Turn a raw result into detection states"""
+        raise NotImplementedError
+
+    def reset(self):
+        """Forget any history kept between frames"""
+        pass
+
+
+class DetectorRegistry:
+    """Ordered collection of detector plugin classes"""
+
+    def __init__(self):
+        self._classes = []
+
+    def register(self, detector_class):
+        """Class decorator adding a detector plugin to the registry"""
+        if any(cls.name == detector_class.name for cls in self._classes):
+            raise ValueError(f"Detector '{detector_class.name}' is already registered")
+        self._classes.append(detector_class)
+        return detector_class
+
+    def create(self, settings):
+        """Instantiate every registered detector, cheapest first"""
+        ordered = sorted(self._classes, key=lambda cls: cls.cost)
+        return {cls.name: cls(settings) for cls in ordered}
+
+    def outputs(self):
+        return [output for cls in self._classes for output in cls.outputs]
+
+    def detection_states(self):
+        """Fresh detection state dict with every state switched off"""
+        return {state: False for state, _, _ in self.outputs()}
+
+    def media_categories(self):
+        """Media categories in display order, starting with 'default'"""
+        categories = ['default']
+        for _, category, _ in self.outputs():
+            if category not in categories:
+                categories.append(category)
+        return categories
+
+    def priority_order(self):
+        """Detection states from highest to lowest playback priority"""
+        return [state for state, _, _ in sorted(self.outputs(), key=lambda output: output[2])]
+
+    def trigger_media(self):
+        """Map of detection state to the media category it triggers"""
+        return {state: category for state, category, _ in self.outputs()}
+
+
+REGISTRY = DetectorRegistry()
+register_detector = REGISTRY.register
+
+
+def has_media(media_config, category):
+    media = media_config.get(category) or {}
+    return any(media.get(media_type) for media_type in MEDIA_TYPES)
+
+
+def resolve_active_detectors(detectors, media_config, extra_inputs=None):
+    """Names of the detectors that have to run for a media configuration
+
+    A detector is needed when one of its states triggers configured media, or
+    when a needed detector depends on one of its states (through its inputs
+    or a scheduler gate in extra_inputs). With no trigger media configured at
+    all, as on a fresh install, every detector is active so the testing view
+    still shows all detections.
+    """
+    extra_inputs = extra_inputs or {}
+    producers = {}
+    for name, detector in detectors.items():
+        for state in detector.states:
+            producers[state] = name
+
+    wanted = [name for name, detector in detectors.items()
+              if any(has_media(media_config, category) for _, category, _ in detector.outputs)]
+    if not wanted:
+        return list(detectors)
+
+    active = set()
+    pending = list(wanted)
+    while pending:
+        name = pending.pop()
+        if name in active:
+            continue
+        active.add(name)
+        for dependency in list(detectors[name].inputs) + list(extra_inputs.get(name, [])):
+            if dependency in producers:
+                pending.append(producers[dependency])
+            elif dependency in detectors:
+                pending.append(dependency)
+    return [name for name in detectors if name in active]
+
+
+@register_detector
+class FaceDetector(Detector):
+    """Face presence plus approach/recede from the change in face box area"""
+
+    name = 'face_detection'
+    cost = 10
+    inputs = ('rgb',)
+    outputs = (
+        ('face', 'face_detection', 8),
+        ('face_approaching', 'face_approaching', 1),
+        ('face_receding', 'face_receding', 2)
+    )
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        signal_settings = settings['signals']
+        self.trend_window = signal_settings['trend_window']
+        self.approach_ratio = signal_settings['approach_ratio']
+        self.recede_ratio = signal_settings['recede_ratio']
+        self.face_size = SignalTrack(signal_settings['history'], create_smoother(signal_settings))
+
+    def create_model(self):
+        import mediapipe as mp
+        return mp.solutions.face_detection.FaceDetection(**self.settings['models'][self.name])
+
+    def interpret(self, result, states):
+        if not result.detections:
+            return
+        states['face'] = True
+
+        # Face distance calculation for approach/recede detection
+        detection = result.detections[0]
+        bbox = detection.location_data.relative_bounding_box
+        face_area = bbox.width * bbox.height
+
+        self.face_size.append(face_area)
+
+        # Recent mean size against the frames before it (NaN until enough history)
+        ratio = self.face_size.ratio(self.trend_window)
+        if ratio > self.approach_ratio:
+            states['face_approaching'] = True
+        elif ratio < self.recede_ratio:
+            states['face_receding'] = True
+
+    def reset(self):
+        self.face_size.reset()
+
+
+@register_detector
+class FaceMeshDetector(Detector):
+    """Eye and lip movement from the eye and mouth aspect ratios"""
+
+    name = 'face_mesh'
+    cost = 30
+    inputs = ('rgb',)
+    outputs = (
+        ('eye_movement', 'eye_movement', 4),
+        ('lip_movement', 'lip_movement', 3)
+    )
+    landmark_fields = ('multi_face_landmarks',)
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        signal_settings = settings['signals']
+        self.eye_window = signal_settings['eye_window']
+        self.eye_change = signal_settings['eye_change']
+        self.lip_window = signal_settings['lip_window']
+        self.lip_change = signal_settings['lip_change']
+        history = signal_settings['history']
+        # Blinks are brief, so the eye ratio is judged on raw values
+        self.eye_ratio = SignalTrack(history)
+        self.mouth_ratio = SignalTrack(history, create_smoother(signal_settings))
+        self.aspect = 4.0 / 3.0
+
+    def create_model(self):
+        import mediapipe as mp
+        return mp.solutions.face_mesh.FaceMesh(**self.settings['models'][self.name])
+
+    def process(self, bundle):
+        height, width = bundle.shape[:2]
+        self.aspect = width / float(height)
+        return super().process(bundle)
+
+    def interpret(self, result, states):
+        if not result.multi_face_landmarks:
+            return
+        # One array per result; every feature below indexes into it
+        points = landmarks_to_array(result.multi_face_landmarks[0])
+
+        self.eye_ratio.append(float(eye_aspect_ratios(points, self.aspect).mean()))
+        if self.eye_ratio.deviation(self.eye_window) > self.eye_change:
+            states['eye_movement'] = True
+
+        self.mouth_ratio.append(mouth_aspect_ratio(points, self.aspect))
+        if self.mouth_ratio.spread(self.lip_window) > self.lip_change:
+            states['lip_movement'] = True
+
+    def reset(self):
+        self.eye_ratio.reset()
+        self.mouth_ratio.reset()
+
+
+@register_detector
+class HandsDetector(Detector):
+    """Hand presence"""
+
+    name = 'hands'
+    cost = 25
+    inputs = ('rgb',)
+    outputs = (('hands', 'hands_detection', 5),)
+    landmark_fields = ('multi_hand_landmarks',)
+
+    def create_model(self):
+        import mediapipe as mp
+        return mp.solutions.hands.Hands(**self.settings['models'][self.name])
+
+    def interpret(self, result, states):
+        if result.multi_hand_landmarks:
+            states['hands'] = True
+
+
+@register_detector
+class PoseDetector(Detector):
+    """Body pose presence"""
+
+    name = 'pose'
+    cost = 30
+    inputs = ('rgb',)
+    outputs = (('pose', 'pose_detection', 6),)
+    landmark_fields = ('pose_landmarks',)
+
+    def create_model(self):
+        import mediapipe as mp
+        return mp.solutions.pose.Pose(**self.settings['models'][self.name])
+
+    def interpret(self, result, states):
+        if result.pose_landmarks:
+            states['pose'] = True
+
+
+@register_detector
+class MovementDetector(Detector):
+    """Background-subtracted movement in the motion zones; cheap enough to gate everything else"""
+
+    name = 'movement'
+    cost = 1
+    inline = True
+    inputs = ('gray',)
+    outputs = (('movement', 'movement_detection', 7),)
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.motion_settings = dict(settings['motion'])
+        self.width = self.motion_settings.pop('width')
+
+    def load(self):
+        with self._load_lock:
+            if self.runner is None:
+                self.model = MotionEngine(**self.motion_settings)
+                self.runner = self
+
+    def process(self, bundle):
+        return self.model.process(bundle.gray_thumbnail(self.width))
+
+    def interpret(self, result, states):
+        moving, _ = result
+        if moving:
+            states['movement'] = True
+
+    def reset(self):
+        if self.model is not None:
+            self.model.reset()
@@ -0,0 +1,88 @@
+# VISIT Detector Scheduler
+# Developed by Dineshkumar Rajendran
+#
+# Decides which detectors run on each frame. Expensive detectors are gated
+# behind cheap triggers (for example Pose only after movement was seen) and
+# stay active for a keep-alive window after their gate or their own result
+# last fired. Active detectors can additionally run only every N frames; in
+# between, their previous outputs are held.
+
+import time
+
+RUN = 'run'
+HOLD = 'hold'
+IDLE = 'idle'
+
+
+class DetectorScheduler:
+    """Per-frame run/hold/idle planning for a set of detectors"""
+
+    def __init__(self, settings, clock=time.monotonic):
+        self.enabled = settings.get('enabled', True)
+        self.detector_settings = settings.get('detectors', {})
+        self.clock = clock
+        self.now = clock()
+        self.frame_index = 0
+        self.last_fired = {}
+        self.last_run = {}
+        self.counters = {}
+
+    def begin_frame(self):
+        """Advance to the next frame"""
+        self.frame_index += 1
+        self.now = self.clock()
+
+    def record(self, trigger, fired):
+        """Remember that a detection state or detector fired on this frame"""
+        if fired:
+            self.last_fired[trigger] = self.now
+
+    def is_active(self, name):
+        """True if the detector's gate fired within its keep-alive window"""
+        config = self.detector_settings.get(name, {})
+        gate = config.get('gate', [])
+        if not gate:
+            return True
+
+        keep_alive = config.get('keep_alive', 0.0)
+        for trigger in list(gate) + [name]:
+            fired_at = self.last_fired.get(trigger)
+            if fired_at is not None and self.now - fired_at <= keep_alive:
+                return True
+        return False
+
+    def decide(self, name):
+        """Return RUN, HOLD (stride skip, keep last outputs) or IDLE"""
+        if not self.enabled:
+            return RUN
+        if not self.is_active(name):
+            return IDLE
+
+        stride = max(1, int(self.detector_settings.get(name, {}).get('stride', 1)))
+        last_run = self.last_run.get(name)
+        if last_run is not None and self.frame_index - last_run < stride:
+            return HOLD
+        return RUN
+
+    def plan(self, names):
+        """Split detector names into the ones to run and the ones to hold"""
+        run = []
+        hold = []
+        for name in names:
+            decision = self.decide(name)
+            counters = self.counters.setdefault(name, {RUN: 0, HOLD: 0, IDLE: 0})
+            counters[decision] += 1
+            if decision == RUN:
+                self.last_run[name] = self.frame_index
+                run.append(name)
+            elif decision == HOLD:
+                hold.append(name)
+        return run, hold
+
+    def reset(self):
+        """Forget trigger history so every gated detector goes idle"""
+        self.last_fired.clear()
+        self.last_run.clear()
+
+    def get_stats(self):
+        return {name: dict(counters) for name, counters in self.counters.items()}
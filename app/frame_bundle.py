@@ -0,0 +1,77 @@
+# VISIT Frame Bundle
+# Developed by Dineshkumar Rajendran
+#
+# One captured frame plus every derived image the detectors and the display
+# need. Each conversion is computed lazily on first access and then shared,
+# so a frame is converted to RGB or grayscale at most once.
+
+import threading
+import time
+
+from startup import LazyModule
+
+cv2 = LazyModule('cv2')
+
+
+class FrameBundle:
+    """Lazily computed colour spaces and pyramid levels for one camera frame"""
+
+    def __init__(self, bgr, captured_at=None):
+        self.bgr = bgr
+        self.captured_at = time.perf_counter() if captured_at is None else captured_at
+        self._cache = {}
+        self._lock = threading.RLock()
+
+    @property
+    def shape(self):
+        return self.bgr.shape
+
+    def _get(self, key, compute):
+        image = self._cache.get(key)
+        if image is None:
+            with self._lock:
+                image = self._cache.get(key)
+                if image is None:
+                    image = compute()
+                    self._cache[key] = image
+        return image
+
+    @property
+    def rgb(self):
+        return self._get('rgb', lambda: cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB))
+
+    @property
+    def gray(self):
+        return self._get('gray', lambda: cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY))
+
+    def pyramid(self, level=1, color='gray'):
+        """Return the image for a colour space downscaled by 2**level
+
+        Levels are built from the previous level with cv2.pyrDown, so asking
+        for level 2 also caches level 1.
+        """
+        if level <= 0:
+            return getattr(self, color)
+        return self._get((color, level), lambda: cv2.pyrDown(self.pyramid(level - 1, color)))
+
+    def gray_thumbnail(self, width):
+        """Small grayscale copy for cheap whole-scene checks
+
+        Resized straight from the BGR frame, so the full-size gray image is
+        never built when nothing else needs it.
+        """
+        def compute():
+            height, frame_width = self.bgr.shape[:2]
+            if width >= frame_width:
+                return self.gray
+            size = (int(width), max(1, int(round(height * width / float(frame_width)))))
+            return cv2.cvtColor(cv2.resize(self.bgr, size, interpolation=cv2.INTER_LINEAR), cv2.COLOR_BGR2GRAY)
+        return self._get(('gray_thumbnail', width), compute)
+
+    @property
+    def half_gray(self):
+        return self.pyramid(1, 'gray')
+
+    @property
+    def half_rgb(self):
+        return self.pyramid(1, 'rgb')
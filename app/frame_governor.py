@@ -0,0 +1,96 @@
+# VISIT Frame-Rate Governor
+# Developed by Dineshkumar Rajendran
+#
+# Deadline-based pacing for the detection stage. Instead of sleeping a fixed
+# amount after each frame, the governor sleeps only for the time left until
+# the next frame deadline. When processing falls behind by more than a frame
+# the missed deadlines are skipped rather than caught up in a burst.
+
+import math
+import time
+from collections import deque
+
+
+class FrameRateGovernor:
+    """Paces a loop to a target FPS and measures achieved rate and jitter"""
+
+    def __init__(self, target_fps, window=120, clock=time.perf_counter, sleep=time.sleep):
+        self.target_fps = float(target_fps) if target_fps else 0.0
+        self.interval = 1.0 / self.target_fps if self.target_fps > 0 else 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self.next_deadline = None
+        self.last_tick = None
+        self.intervals = deque(maxlen=window)
+        self.frames = 0
+        self.skipped_frames = 0
+        self.late_frames = 0
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def wait(self):
+        """Sleep until the next deadline and return how many deadlines were missed"""
+        now = self.clock()
+        skipped = 0
+        if self.enabled:
+            if self.next_deadline is None:
+                self.next_deadline = now
+            remaining = self.next_deadline - now
+            if remaining > 0:
+                self.sleep(remaining)
+                now = self.clock()
+            elif -remaining >= self.interval:
+                # Behind schedule: drop the missed slots and realign to now
+                skipped = int(-remaining / self.interval)
+                self.skipped_frames += skipped
+                self.late_frames += 1
+                self.next_deadline = now
+            self.next_deadline += self.interval
+
+        self._tick(now)
+        return skipped
+
+    def _tick(self, now):
+        if self.last_tick is not None:
+            self.intervals.append(now - self.last_tick)
+        self.last_tick = now
+        self.frames += 1
+
+    def reanchor(self):
+        """Start the deadlines afresh at the next frame, keeping the statistics
+
+        The gap since the last frame is not counted as a frame interval.
+        """
+        self.next_deadline = None
+        self.last_tick = None
+
+    def reset(self):
+        self.reanchor()
+        self.intervals.clear()
+
+    def achieved_fps(self):
+        if not self.intervals:
+            return 0.0
+        mean = sum(self.intervals) / len(self.intervals)
+        return 1.0 / mean if mean > 0 else 0.0
+
+    def jitter_ms(self):
+        """Standard deviation of the frame interval in milliseconds"""
+        count = len(self.intervals)
+        if count < 2:
+            return 0.0
+        mean = sum(self.intervals) / count
+        variance = sum((value - mean) ** 2 for value in self.intervals) / (count - 1)
+        return math.sqrt(variance) * 1000.0
+
+    def get_stats(self):
+        return {
+            'target_fps': self.target_fps,
+            'achieved_fps': self.achieved_fps(),
+            'jitter_ms': self.jitter_ms(),
+            'frames': self.frames,
+            'skipped_frames': self.skipped_frames,
+            'late_frames': self.late_frames
+        }
@@ -0,0 +1,210 @@
+# VISIT Frame Pipeline
+# Developed by Dineshkumar Rajendran
+#
+# Splits camera processing into capture, detection and presentation stages
+# that run on their own threads and hand frames over through bounded queues.
+
+import threading
+import time
+from collections import deque
+
+
+class FramePacket:
+    """A captured frame travelling through the pipeline"""
+
+    def __init__(self, index, frame):
+        self.index = index
+        self.frame = frame
+        self.captured_at = time.perf_counter()
+        self.detection_states = None
+        self.behind_schedule = False
+
+
+class StageQueue:
+    """Bounded queue that drops the oldest item when full
+
+    With a capacity of 1 this is a latest-frame slot: a slow consumer always
+    receives the newest frame and stale frames are counted as dropped.
+    """
+
+    def __init__(self, name, capacity=1):
+        self.name = name
+        self.capacity = max(1, int(capacity))
+        self._items = deque()
+        self._cond = threading.Condition()
+        self.put_count = 0
+        self.drop_count = 0
+
+    def put(self, item):
+        """Add an item, discarding the oldest one if the queue is full"""
+        with self._cond:
+            if len(self._items) >= self.capacity:
+                self._items.popleft()
+                self.drop_count += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest item, or None if nothing arrived before timeout"""
+        with self._cond:
+            if not self._items:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def clear(self):
+        """Drop everything still queued without counting it"""
+        with self._cond:
+            self._items.clear()
+            self._cond.notify_all()
+
+    def depth(self):
+        return len(self._items)
+
+    def stats(self):
+        return {
+            'depth': len(self._items),
+            'capacity': self.capacity,
+            'received': self.put_count,
+            'dropped': self.drop_count
+        }
+
+
+class FramePipeline:
+    """Three-stage capture -> detection -> presentation engine
+
+    capture_fn()                        returns a frame or None when nothing was read;
+                                        it should block until a frame is ready
+    detect_fn(frame)                    returns the detection states for that frame
+    present_fn(frame, states, behind)   draws overlays and drives media playback;
+                                        behind is True when the governor is late
+                                        and optional work should be skipped
+
+    An optional FrameRateGovernor paces the detection stage to a target FPS.
+    """
+
+    def __init__(self, capture_fn, detect_fn, present_fn,
+                 detection_queue_size=1, presentation_queue_size=2,
+                 error_callback=None, governor=None):
+        self.capture_fn = capture_fn
+        self.detect_fn = detect_fn
+        self.present_fn = present_fn
+        self.error_callback = error_callback
+        self.governor = governor
+
+        self.detection_queue = StageQueue('detection', detection_queue_size)
+        self.presentation_queue = StageQueue('presentation', presentation_queue_size)
+
+        self.counters = {
+            'captured': 0,
+            'capture_failures': 0,
+            'detected': 0,
+            'presented': 0,
+            'errors': 0
+        }
+        self._running = threading.Event()
+        self._stopped = threading.Event()
+        self._threads = []
+        self._frame_index = 0
+        self._started_at = None
+
+    @property
+    def is_running(self):
+        return self._running.is_set()
+
+    def start(self):
+        """Start all stage threads"""
+        if self.is_running:
+            return
+        self._running.set()
+        self._stopped.clear()
+        self._started_at = time.perf_counter()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name='visit-capture', daemon=True),
+            threading.Thread(target=self._detection_loop, name='visit-detection', daemon=True),
+            threading.Thread(target=self._presentation_loop, name='visit-presentation', daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=2.0):
+        """Signal all stages to stop and wait briefly for them to exit"""
+        self._running.clear()
+        self._stopped.set()
+        self.detection_queue.clear()
+        self.presentation_queue.clear()
+        current = threading.current_thread()
+        for thread in self._threads:
+            if thread is not current:
+                thread.join(timeout)
+        self._threads = []
+
+    def _report_error(self, stage, error):
+        self.counters['errors'] += 1
+        if self.error_callback:
+            self.error_callback(stage, error)
+
+    def _capture_loop(self):
+        backoff = 0.0
+        while self.is_running:
+            try:
+                frame = self.capture_fn()
+            except Exception as e:
+                self._report_error('capture', e)
+                frame = None
+            if frame is None:
+                self.counters['capture_failures'] += 1
+                # Back off while the source has nothing, instead of spinning
+                backoff = min(max(backoff * 2, 0.005), 0.2)
+                self._stopped.wait(backoff)
+                continue
+            backoff = 0.0
+            self._frame_index += 1
+            self.counters['captured'] += 1
+            self.detection_queue.put(FramePacket(self._frame_index, frame))
+
+    def _detection_loop(self):
+        while self.is_running:
+            skipped = self.governor.wait() if self.governor else 0
+            packet = self.detection_queue.get(timeout=0.1)
+            if packet is None:
+                # No frame arrived, so re-anchor the deadlines to the next one
+                if self.governor:
+                    self.governor.reanchor()
+                continue
+            packet.behind_schedule = skipped > 0
+            try:
+                packet.detection_states = self.detect_fn(packet.frame)
+            except Exception as e:
+                self._report_error('detection', e)
+                continue
+            self.counters['detected'] += 1
+            self.presentation_queue.put(packet)
+
+    def _presentation_loop(self):
+        while self.is_running:
+            packet = self.presentation_queue.get(timeout=0.1)
+            if packet is None:
+                continue
+            try:
+                self.present_fn(packet.frame, packet.detection_states, packet.behind_schedule)
+            except Exception as e:
+                self._report_error('presentation', e)
+                continue
+            self.counters['presented'] += 1
+
+    def get_stats(self):
+        """Per-stage queue depth, drop counters and throughput"""
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        stats = dict(self.counters)
+        stats['queues'] = {
+            self.detection_queue.name: self.detection_queue.stats(),
+            self.presentation_queue.name: self.presentation_queue.stats()
+        }
+        stats['capture_fps'] = self.counters['captured'] / elapsed if elapsed > 0 else 0.0
+        stats['detection_fps'] = self.counters['detected'] / elapsed if elapsed > 0 else 0.0
+        if self.governor:
+            stats['governor'] = self.governor.get_stats()
+        return stats
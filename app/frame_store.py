@@ -0,0 +1,226 @@
+# VISIT Pre-rendered Frame Store
+# Developed by Dineshkumar Rajendran
+#
+# Short clips that loop for hours (the 'default' attract video above all)
+# are decoded once into a raw RGB frame file and then played back through
+# numpy.memmap, so looping costs no H.264 decoding. Frames are stored at
+# most max_width pixels wide and scaled up by the presentation display, so
+# a full HD loop of half a minute or more fits the size cap. Each
+# frame file has a JSON sidecar describing the source; it is rebuilt when
+# the source's modification time changes and its content hash differs.
+
+import hashlib
+import json
+import os
+import threading
+
+from startup import LazyModule
+from media_cache import fit_to_display
+
+cv2 = LazyModule('cv2')
+np = LazyModule('numpy')
+
+FORMAT_VERSION = 1
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PrerenderedClip:
+    """Read-only memory-mapped frames of one clip"""
+
+    def __init__(self, frames_path, meta):
+        self.meta = meta
+        self.fps = meta['fps']
+        self.frames = np.memmap(frames_path, dtype=np.uint8, mode='r',
+                                shape=(meta['frame_count'], meta['height'], meta['width'], 3))
+
+    def __len__(self):
+        return self.frames.shape[0]
+
+
+class FrameStore:
+    """Builds and validates pre-rendered clips in a cache directory"""
+
+    def __init__(self, cache_dir, display_size, max_mb=2048, max_width=960, log=print):
+        self.cache_dir = cache_dir
+        self.log = log
+        width, height = display_size
+        if max_width and width > max_width:
+            height = int(round(height * max_width / float(width)))
+            width = max_width
+        # Size the frames are stored at, not the size they are shown at
+        self.display_size = (width, height)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+
+    def _paths(self, source):
+        key = hashlib.sha1(f"{os.path.abspath(source)}|{self.display_size}".encode()).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.frames', base + '.json'
+
+    def _read_meta(self, meta_path):
+        try:
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _is_valid(self, source, meta):
+        if not meta or meta.get('version') != FORMAT_VERSION:
+            return False
+        if meta.get('width') != self.display_size[0] or meta.get('height') != self.display_size[1]:
+            return False
+        stat = os.stat(source)
+        if meta.get('source_mtime') == stat.st_mtime and meta.get('source_size') == stat.st_size:
+            return True
+        # Modified time changed: only a content change invalidates the frames
+        if meta.get('source_hash') == file_hash(source):
+            meta['source_mtime'] = stat.st_mtime
+            meta['source_size'] = stat.st_size
+            return True
+        return False
+
+    def used_bytes(self):
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        return sum(os.path.getsize(os.path.join(self.cache_dir, name))
+                   for name in os.listdir(self.cache_dir) if name.endswith('.frames'))
+
+    def get(self, source):
+        """Memory-mapped clip for a source video, or None if not pre-rendered yet"""
+        frames_path, meta_path = self._paths(source)
+        if not os.path.exists(frames_path) or not os.path.exists(source):
+            return None
+        meta = self._read_meta(meta_path)
+        if not self._is_valid(source, meta):
+            return None
+        return PrerenderedClip(frames_path, meta)
+
+    def ensure(self, source):
+        """Return the pre-rendered clip, building it first if missing or stale
+
+        Returns None when the decoded clip would exceed the store's size cap
+        or the source cannot be read.
+        """
+        with self._lock:
+            frames_path, meta_path = self._paths(source)
+            meta = self._read_meta(meta_path)
+            if os.path.exists(frames_path) and self._is_valid(source, meta):
+                self._write_meta(meta_path, meta)
+                return PrerenderedClip(frames_path, meta)
+            for path in (frames_path, meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            return self._build(source, frames_path, meta_path)
+
+    def _write_meta(self, meta_path, meta):
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f, indent=4)
+
+    def _build(self, source, frames_path, meta_path):
+        capture = cv2.VideoCapture(source)
+        if not capture.isOpened():
+            self.log(f"Frame store cannot open {source}")
+            return None
+
+        width, height = self.display_size
+        frame_bytes = width * height * 3
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        budget = self.max_bytes - self.used_bytes()
+        if frame_count > 0 and frame_count * frame_bytes > budget:
+            capture.release()
+            self.log(f"Frame store: {source} needs {frame_count * frame_bytes // (1024 * 1024)} MB, "
+                     f"only {max(0, budget) // (1024 * 1024)} MB left; not pre-rendering")
+            return None
+
+        fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = frames_path + '.tmp'
+        written = 0
+        try:
+            with open(temp_path, 'wb') as f:
+                while True:
+                    ret, frame = capture.read()
+                    if not ret:
+                        break
+                    written += 1
+                    if written * frame_bytes > budget:
+                        raise ValueError("clip exceeds the frame store size cap")
+                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                    f.write(np.ascontiguousarray(fit_to_display(rgb_frame, width, height)).tobytes())
+        except Exception as e:
+            self.log(f"Frame store could not pre-render {source}: {e}")
+            written = 0
+        finally:
+            capture.release()
+
+        if written == 0:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+
+        os.replace(temp_path, frames_path)
+        stat = os.stat(source)
+        meta = {
+            'version': FORMAT_VERSION,
+            'source': os.path.abspath(source),
+            'source_mtime': stat.st_mtime,
+            'source_size': stat.st_size,
+            'source_hash': file_hash(source),
+            'fps': fps,
+            'frame_count': written,
+            'width': width,
+            'height': height
+        }
+        self._write_meta(meta_path, meta)
+        return PrerenderedClip(frames_path, meta)
+
+
+class MemmapClipPlayer:
+    """Plays a PrerenderedClip with the same interface as VideoDecoder
+
+    Frames are views into the memory-mapped file, so looping costs nothing
+    beyond reading pages the OS usually already has cached.
+    """
+
+    def __init__(self, clip, loop=True):
+        self.clip = clip
+        self.path = clip.meta['source']
+        self.fps = clip.fps
+        self.loop = loop
+        self.position = 0
+        self.finished = False
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def activate(self):
+        pass
+
+    def rewind(self):
+        self.position = 0
+        self.finished = False
+
+    @property
+    def is_ready(self):
+        return not self.finished
+
+    def pop_frame(self):
+        if self.position >= len(self.clip):
+            if not self.loop:
+                self.finished = True
+                return None
+            self.position = 0
+        frame = self.clip.frames[self.position]
+        self.position += 1
+        return frame
@@ -0,0 +1,249 @@
+# VISIT Headless Mode
+# Developed by Dineshkumar Rajendran
+#
+# Runs the exhibit without the Tk dashboard: loads a saved media
+# configuration and the settings, starts the camera pipeline and plays the
+# media on the presentation display. Nothing here imports tkinter.
+#
+#   python headless.py --config ../configs/media_config.json
+#   python headless.py --config exhibit2.json --camera 1 --display 1 --port 8767
+#   python headless.py --config exhibit3.json --camera rtsp://10.0.0.5/stream1
+#   python headless.py --config exhibit2.json --exhibit hall-b --metrics-port 9109
+#
+# Control:
+#   SIGTERM / SIGINT   stop and exit
+#   SIGHUP             reload the media configuration
+#   SIGUSR1            log the pipeline counters
+#   127.0.0.1:<port>   one command per line, one JSON reply per line:
+#                      status, stats, start, stop, reload, reset,
+#                      presentation on|off, quit
+#   127.0.0.1:<metrics port>/metrics   Prometheus latency histograms
+
+import argparse
+import json
+import queue
+import signal
+import socketserver
+import sys
+import threading
+import time
+
+from startup import StartupTimer
+from visit_engine import VisitEngine
+
+COMMANDS = ('status', 'stats', 'start', 'stop', 'reload', 'reset', 'presentation', 'quit')
+
+# argparse already exits with 2 on bad arguments
+EXIT_LICENSE_ERROR = 3
+
+
+class ControlHandler(socketserver.StreamRequestHandler):
+    """Reads command lines from a local client and writes back JSON replies"""
+
+    def handle(self):
+        for line in self.rfile:
+            command = line.decode('utf-8', 'replace').strip()
+            if not command:
+                continue
+            reply = self.server.app.submit(command)
+            self.wfile.write((json.dumps(reply) + '\n').encode('utf-8'))
+            if command == 'quit':
+                break
+
+
+class ControlServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, app, port):
+        self.app = app
+        socketserver.ThreadingTCPServer.__init__(self, ('127.0.0.1', port), ControlHandler)
+
+
+class HeadlessVisit(VisitEngine):
+    """VisitEngine driven by signals and a local control socket"""
+
+    def __init__(self, config_path, camera_source=None, config_dir=None):
+        startup_timer = StartupTimer()
+        with startup_timer.phase('license'):
+            error = self.license_error()
+            if error is not None:
+                raise RuntimeError(error)
+        VisitEngine.__init__(self, startup_timer, config_dir, camera_source)
+        self.config_path = config_path
+        self.headless_settings = self.display_settings['headless']
+        self.commands = queue.Queue()
+        self.control_server = None
+        self.running = False
+        # Set by the signal handlers, which must not block or take locks
+        self.pending_signal = None
+
+    def submit(self, command):
+        """Queue a command for the main thread and wait for its reply"""
+        reply = queue.Queue(maxsize=1)
+        self.commands.put((command, reply))
+        try:
+            return reply.get(timeout=30)
+        except queue.Empty:
+            return {'ok': False, 'error': 'timed out'}
+
+    def execute(self, command):
+        """Run one control command on the main thread"""
+        words = command.split()
+        name = words[0].lower() if words else ''
+        if name not in COMMANDS:
+            return {'ok': False, 'error': f"unknown command '{command}'", 'commands': list(COMMANDS)}
+
+        if name == 'status':
+            return dict(self.status(), ok=True)
+        if name == 'stats':
+            return {'ok': True, 'stats': self.stats()}
+        if name == 'start':
+            if not self.is_running:
+                self.start_camera()
+        elif name == 'stop':
+            self.stop_camera()
+        elif name == 'reload':
+            self.load_media_config(self.config_path)
+        elif name == 'reset':
+            was_running = self.is_running
+            self.reset_application()
+            if was_running:
+                self.start_camera()
+        elif name == 'presentation':
+            enable = len(words) < 2 or words[1].lower() in ('on', '1', 'true')
+            if enable != self.is_fullscreen:
+                self.toggle_fullscreen()
+        elif name == 'quit':
+            self.running = False
+        return dict(self.status(), ok=True)
+
+    def status(self):
+        return {
+            'camera': self.is_running,
+            'presentation': self.presentation.is_running,
+            'active_media': self.active_media,
+            'detection_states': self.state_model.snapshot()
+        }
+
+    def stats(self):
+        stats = {
+            'pipeline': self.get_pipeline_stats(),
+            'triggers': self.trigger_machine.get_stats(),
+            'media_cache': self.media_cache.get_stats(),
+            'video': self.video_engine.get_stats(),
+            'audio': self.audio_engine.get_stats(),
+            'latency': self.metrics.snapshot()
+        }
+        if self.presentation.started_at is not None:
+            stats['presentation'] = self.presentation.get_stats()
+        return stats
+
+    def install_signal_handlers(self):
+        def request(name):
+            def handler(signum, frame):
+                self.pending_signal = name
+            return handler
+
+        signal.signal(signal.SIGINT, request('quit'))
+        signal.signal(signal.SIGTERM, request('quit'))
+        # Not available on Windows
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, request('reload'))
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, request('stats'))
+
+    def start_control_server(self, port):
+        try:
+            self.control_server = ControlServer(self, port)
+        except OSError as e:
+            self.log_info(f"Control socket unavailable on port {port}: {e}")
+            return
+        thread = threading.Thread(target=self.control_server.serve_forever, name='visit-control', daemon=True)
+        thread.start()
+        self.log_info(f"Control socket listening on 127.0.0.1:{port}")
+
+    def handle_signal(self, name):
+        if name == 'stats':
+            self.log_pipeline_stats()
+        else:
+            self.log_info(f"Signal received: {name}")
+            self.execute(name)
+
+    def run(self, port=None, presentation=None, metrics_port=None):
+        """Run until quit; returns the process exit code"""
+        self.install_signal_handlers()
+        self.start_metrics_server(metrics_port)
+        # Media and models are loaded up front, before the camera starts
+        self.load_media_config(self.config_path, preload=False)
+        self.warm_up()
+        for line in self.startup_timer.summary():
+            self.log_info(line)
+
+        port = self.headless_settings['control_port'] if port is None else port
+        if port:
+            self.start_control_server(port)
+        if presentation is None:
+            presentation = self.headless_settings['presentation']
+        if presentation:
+            self.toggle_fullscreen()
+        # Attract loop until the first trigger
+        self.play_media('default')
+        self.start_camera()
+
+        self.running = True
+        stats_interval = self.headless_settings['stats_interval']
+        next_stats = time.monotonic() + stats_interval if stats_interval else None
+        try:
+            while self.running:
+                if self.pending_signal is not None:
+                    name, self.pending_signal = self.pending_signal, None
+                    self.handle_signal(name)
+                try:
+                    command, reply = self.commands.get(timeout=0.2)
+                except queue.Empty:
+                    pass
+                else:
+                    try:
+                        reply.put(self.execute(command))
+                    except Exception as e:
+                        reply.put({'ok': False, 'error': str(e)})
+                if next_stats is not None and time.monotonic() >= next_stats:
+                    self.log_pipeline_stats()
+                    next_stats = time.monotonic() + stats_interval
+        finally:
+            if self.control_server is not None:
+                self.control_server.shutdown()
+                self.control_server.server_close()
+            self.shutdown()
+        return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run VISIT without the Tk dashboard")
+    parser.add_argument('--config', required=True, help="saved media configuration JSON")
+    parser.add_argument('--camera', help="camera index, video file or rtsp:// URL (default: display settings)")
+    parser.add_argument('--settings-dir', help="folder with this exhibit's settings files")
+    parser.add_argument('--display', type=int, help="monitor index of the presentation display")
+    parser.add_argument('--port', type=int, help="control socket port on 127.0.0.1 (0 disables it)")
+    parser.add_argument('--metrics-port', type=int, help="metrics HTTP port on 127.0.0.1 (0 disables it)")
+    parser.add_argument('--exhibit', help="exhibit name attached to every metric (default: host name)")
+    parser.add_argument('--no-presentation', action='store_true',
+                        help="do not open the presentation display")
+    args = parser.parse_args(argv)
+
+    camera = int(args.camera) if args.camera and args.camera.isdigit() else args.camera
+    try:
+        app = HeadlessVisit(args.config, camera, args.settings_dir)
+    except RuntimeError as e:
+        print(f"License Error: {e}")
+        return EXIT_LICENSE_ERROR
+    if args.display is not None:
+        app.presentation.display_index = args.display
+    if args.exhibit:
+        app.metrics.labels['exhibit'] = args.exhibit
+    return app.run(args.port, False if args.no_presentation else None, args.metrics_port)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# VISIT Media Cache
+# Developed by Dineshkumar Rajendran
+#
+# Decodes the media referenced by media_config ahead of time so switching
+# between trigger categories needs no disk I/O. Images are decoded once and
+# letterboxed to the display resolution; short audio clips are decoded into
+# pygame.mixer.Sound buffers. Entries share a memory budget and the least
+# recently used ones are evicted first. With a media manifest the normalized
+# copies are decoded instead of the originals.
+
+import os
+import threading
+from collections import OrderedDict
+
+from startup import LazyModule
+
+cv2 = LazyModule('cv2')
+np = LazyModule('numpy')
+pygame = LazyModule('pygame')
+Image = LazyModule('PIL.Image')
+
+IMAGE = 'image'
+SOUND = 'sound'
+
+# Marker for files that are missing or could not be decoded, so the hot
+# path does not retry them on every frame
+UNAVAILABLE = object()
+
+
+def fit_to_display(rgb_image, width, height):
+    """Scale an image to fit the display and centre it on a black canvas"""
+    image_height, image_width = rgb_image.shape[:2]
+    if (image_width, image_height) == (width, height):
+        return rgb_image
+    scale = min(width / image_width, height / image_height)
+    new_width = max(1, int(round(image_width * scale)))
+    new_height = max(1, int(round(image_height * scale)))
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+    resized = cv2.resize(rgb_image, (new_width, new_height), interpolation=interpolation)
+
+    canvas = np.zeros((height, width, 3), dtype=np.uint8)
+    x = (width - new_width) // 2
+    y = (height - new_height) // 2
+    canvas[y:y + new_height, x:x + new_width] = resized
+    return canvas
+
+
+class MediaCache:
+    """LRU cache of decoded images and sounds bounded by a memory budget"""
+
+    def __init__(self, budget_mb=256, display_size=(1920, 1080), max_sound_seconds=60, manifest=None,
+                 log=print):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.manifest = manifest
+        self.log = log
+        self.display_size = tuple(display_size)
+        self.max_sound_seconds = max_sound_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _store(self, key, value, size):
+        with self._lock:
+            if key in self._entries:
+                self.used_bytes -= self._entries.pop(key)[1]
+            if size > self.budget_bytes:
+                # Too large to ever fit: remember it as unavailable from the cache
+                value, size = UNAVAILABLE, 0
+            while self._entries and self.used_bytes + size > self.budget_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.used_bytes -= evicted_size
+                self.evictions += 1
+            self._entries[key] = (value, size)
+            self.used_bytes += size
+        return value
+
+    def _source(self, path):
+        return self.manifest.resolve(path) if self.manifest is not None else path
+
+    def _decode_image(self, path):
+        path = self._source(path)
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is not None:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        else:
+            # OpenCV cannot read GIFs and a few other formats
+            with Image.open(path) as pil_image:
+                image = np.asarray(pil_image.convert('RGB'))
+        return fit_to_display(image, *self.display_size)
+
+    def _decode_sound(self, path):
+        info = self.manifest.info(path) if self.manifest is not None else None
+        if info and info.get('duration') and info['duration'] > self.max_sound_seconds:
+            # Known to be long: do not decode it just to find out
+            return UNAVAILABLE, 0
+        sound = pygame.mixer.Sound(self._source(path))
+        length = sound.get_length()
+        if length > self.max_sound_seconds:
+            # Long tracks keep streaming through pygame.mixer.music
+            return UNAVAILABLE, 0
+        frequency, sample_format, channels = pygame.mixer.get_init()
+        return sound, int(length * frequency * channels * abs(sample_format) // 8)
+
+    def get_image(self, path):
+        """Display-ready RGB array for an image file, or None if unavailable"""
+        if not path:
+            return None
+        value = self._lookup((IMAGE, path))
+        if value is None:
+            try:
+                image = self._decode_image(path)
+                value = self._store((IMAGE, path), image, image.nbytes)
+            except Exception as e:
+                self.log(f"Media cache could not decode image {path}: {e}")
+                value = self._store((IMAGE, path), UNAVAILABLE, 0)
+        return None if value is UNAVAILABLE else value
+
+    def get_sound(self, path):
+        """pygame Sound for a short audio file, or None if it should be streamed"""
+        if not path:
+            return None
+        value = self._lookup((SOUND, path))
+        if value is None:
+            try:
+                sound, size = self._decode_sound(path)
+                value = self._store((SOUND, path), sound, size)
+            except Exception as e:
+                self.log(f"Media cache could not decode audio {path}: {e}")
+                value = self._store((SOUND, path), UNAVAILABLE, 0)
+        return None if value is UNAVAILABLE else value
+
+    def preload(self, media_config, load_audio=True):
+        """Decode every image and audio file referenced by a media configuration"""
+        # Files that were missing earlier may have been added since
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[0] is UNAVAILABLE]:
+                del self._entries[key]
+
+        for category, media in media_config.items():
+            media = media or {}
+            image_path = media.get('image')
+            if image_path and os.path.exists(image_path):
+                self.get_image(image_path)
+            audio_path = media.get('audio')
+            if load_audio and audio_path and os.path.exists(audio_path):
+                self.get_sound(audio_path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.used_bytes = 0
+
+    def get_stats(self):
+        return {
+            'entries': len(self._entries),
+            'used_mb': self.used_bytes / (1024 * 1024),
+            'budget_mb': self.budget_bytes / (1024 * 1024),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
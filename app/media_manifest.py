@@ -0,0 +1,146 @@
+# VISIT Media Manifest
+# Developed by Dineshkumar Rajendran
+#
+# Written by scripts/normalize_media.py and read at startup. For every
+# source asset it records the normalized copy to play instead, together with
+# its dimensions, frame rate, duration and content hashes, so the app does not
+# have to probe media files at runtime.
+#
+# {
+#     "version": 1,
+#     "profile": {...target resolution, fps and codecs...},
+#     "entries": {
+#         "<source path relative to the manifest>": {
+#             "kind": "image" | "video" | "audio",
+#             "output": "<normalized path relative to the manifest>",
+#             "source_mtime": ..., "source_size": ..., "source_hash": "...",
+#             "output_hash": "...", "width": ..., "height": ...,
+#             "fps": ..., "frame_count": ..., "duration": ...
+#         }
+#     }
+# }
+
+import json
+import os
+
+from frame_store import file_hash
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+__all__ = ['MANIFEST_VERSION', 'MANIFEST_FILE', 'MediaManifest']
+
+
+def _key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+class MediaManifest:
+    """Lookup of normalized media by source path"""
+
+    def __init__(self, path=None, data=None, log=print):
+        self.path = path
+        self.log = log
+        self.base_dir = os.path.dirname(os.path.abspath(path)) if path else os.getcwd()
+        self.data = data or {'version': MANIFEST_VERSION, 'profile': {}, 'entries': {}}
+        self._lookup = {}
+        for source, entry in self.data.get('entries', {}).items():
+            self._lookup[_key(self.absolute(source))] = entry
+        # (size, mtime) of each source last checked, and whether its entry matched
+        self._checked = {}
+
+    @classmethod
+    def load(cls, path, log=print):
+        """Read a manifest; a missing or unreadable one gives an empty manifest"""
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path, log=log)
+        if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION:
+            log(f"Ignoring media manifest {path}: unsupported format")
+            return cls(path, log=log)
+        return cls(path, data, log)
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump(self.data, f, indent=4, sort_keys=True)
+
+    def __len__(self):
+        return len(self._lookup)
+
+    def absolute(self, relative_path):
+        return os.path.normpath(os.path.join(self.base_dir, relative_path))
+
+    def relative(self, path):
+        try:
+            return os.path.relpath(os.path.abspath(path), self.base_dir)
+        except ValueError:
+            # Different drive on Windows
+            return os.path.abspath(path)
+
+    def entry(self, source):
+        return self._lookup.get(_key(source)) if source else None
+
+    def set_entry(self, source, entry):
+        self.data['entries'][self.relative(source)] = entry
+        self._lookup[_key(source)] = entry
+
+    def remove_missing(self):
+        """Drop entries whose source no longer exists; returns how many"""
+        removed = 0
+        for source in list(self.data['entries']):
+            if not os.path.exists(self.absolute(source)):
+                entry = self.data['entries'].pop(source)
+                self._lookup.pop(_key(self.absolute(source)), None)
+                output = self.absolute(entry['output'])
+                if os.path.exists(output):
+                    os.remove(output)
+                removed += 1
+        return removed
+
+    def is_current(self, source):
+        """Whether the source file is still the one its entry was normalized from
+
+        A source replaced since normalize_media.py last ran is played as is
+        until the tool is rerun. Only a changed modification time costs a
+        content hash, once per change.
+        """
+        entry = self.entry(source)
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(source)
+        except OSError:
+            # Nothing newer to play than the normalized copy
+            return True
+        signature = (stat.st_size, stat.st_mtime)
+        checked = self._checked.get(_key(source))
+        if checked is not None and checked[0] == signature:
+            return checked[1]
+
+        if entry.get('source_size') != stat.st_size:
+            current = False
+        elif entry.get('source_mtime') == stat.st_mtime:
+            current = True
+        else:
+            current = entry.get('source_hash') == file_hash(source)
+        self._checked[_key(source)] = (signature, current)
+        if not current:
+            self.log(f"Media manifest is out of date for {source}; playing the original "
+                     f"until normalize_media.py is rerun")
+        return current
+
+    def resolve(self, source):
+        """Path of the normalized copy of a source file, or the source itself"""
+        if not self.is_current(source):
+            return source
+        output = self.absolute(self.entry(source)['output'])
+        return output if os.path.exists(output) else source
+
+    def info(self, source):
+        """Recorded properties of a source file, or None if it is not in the manifest
+
+        An out-of-date entry gives None too: it describes the replaced file.
+        """
+        return self.entry(source) if self.is_current(source) else None
@@ -0,0 +1,264 @@
+# VISIT Metrics
+# Developed by Dineshkumar Rajendran
+#
+# Counters and latency histograms for the hot paths (camera reads, detector
+# runs, UI rendering, media switches), exported in the Prometheus text
+# format on a localhost HTTP port and summarized on the dashboard.
+#
+# Recording takes no lock: every thread that records into a metric gets its
+# own shard of counts, so each shard has a single writer, and a scrape sums
+# the shards. A histogram's count is the sum of its buckets, so a scrape
+# taken mid-update is still self-consistent.
+#
+#   curl http://127.0.0.1:9108/metrics
+
+import bisect
+import http.server
+import math
+import threading
+import time
+
+# Seconds, from a fast inline check to a stalled camera
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Shards:
+    """One list of numbers per recording thread"""
+
+    def __init__(self, size):
+        self.size = size
+        self._local = threading.local()
+        self._shards = []
+
+    def get(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = [0] * self.size
+            # list.append is atomic, so registering needs no lock either
+            self._shards.append(shard)
+            return shard
+
+    def totals(self):
+        totals = [0] * self.size
+        for shard in list(self._shards):
+            for index, value in enumerate(shard):
+                totals[index] += value
+        return totals
+
+
+class Counter:
+    """Monotonic count"""
+
+    def __init__(self):
+        self._shards = _Shards(1)
+
+    def inc(self, amount=1):
+        self._shards.get()[0] += amount
+
+    @property
+    def value(self):
+        return self._shards.totals()[0]
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed bucket bounds"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        # One slot per bound, one for +Inf and one for the sum
+        self._shards = _Shards(len(self.bounds) + 2)
+
+    def observe(self, value):
+        shard = self._shards.get()
+        shard[bisect.bisect_left(self.bounds, value)] += 1
+        shard[-1] += value
+
+    def time(self):
+        """Context manager that observes the duration of its block"""
+        return _Timer(self)
+
+    def totals(self):
+        """(per-bucket counts including +Inf, count, sum)"""
+        totals = self._shards.totals()
+        counts = totals[:-1]
+        return counts, sum(counts), totals[-1]
+
+    def quantile(self, q, counts=None):
+        """Estimate of the q quantile, interpolated inside its bucket"""
+        if counts is None:
+            counts = self.totals()[0]
+        total = sum(counts)
+        if not total:
+            return math.nan
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if seen + count >= rank and count:
+                if index == len(self.bounds):
+                    # Above the last bound: all that can be said is "at least"
+                    return self.bounds[-1]
+                lower = self.bounds[index - 1] if index else 0.0
+                return lower + (self.bounds[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _Family:
+    def __init__(self, name, kind, help_text, factory):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.factory = factory
+        self.children = {}
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class MetricsRegistry:
+    """Named metric families with per-label children
+
+    labels are attached to every exported sample, e.g. the exhibit name so
+    a fleet of kiosks can be told apart after aggregation.
+    """
+
+    def __init__(self, labels=None):
+        self.labels = dict(labels or {})
+        self._families = {}
+        # Only creating a metric takes the lock; recording never does
+        self._lock = threading.Lock()
+
+    def _child(self, name, kind, help_text, factory, labels):
+        key = tuple(sorted(labels.items()))
+        family = self._families.get(name)
+        if family is not None:
+            child = family.children.get(key)
+            if child is not None:
+                return child
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = _Family(name, kind, help_text, factory)
+            elif family.kind != kind:
+                raise ValueError(f"Metric {name} is already registered as a {family.kind}")
+            child = family.children.get(key)
+            if child is None:
+                child = family.children[key] = family.factory()
+            return child
+
+    def counter(self, name, help_text, **labels):
+        """The counter for name and these labels, created on first use"""
+        return self._child(name, 'counter', help_text, Counter, labels)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS, **labels):
+        """The histogram for name and these labels, created on first use"""
+        return self._child(name, 'histogram', help_text, lambda: Histogram(buckets), labels)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for family in sorted(self._families.values(), key=lambda family: family.name):
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for key, child in sorted(family.children.items()):
+                labels = dict(self.labels, **dict(key))
+                if family.kind == 'counter':
+                    lines.append(f"{family.name}{format_labels(labels)} {format_value(child.value)}")
+                    continue
+                counts, count, total = child.totals()
+                cumulative = 0
+                for bound, bucket_count in zip(child.bounds + (math.inf,), counts):
+                    cumulative += bucket_count
+                    bucket_labels = dict(labels, le=format_value(float(bound)))
+                    lines.append(f"{family.name}_bucket{format_labels(bucket_labels)} {cumulative}")
+                lines.append(f"{family.name}_sum{format_labels(labels)} {format_value(float(total))}")
+                lines.append(f"{family.name}_count{format_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """Histogram summaries for display: one dict per metric and label set
+
+        Times are in seconds; they are None for a metric with no samples yet.
+        """
+        rows = []
+        for family in sorted(self._families.values(), key=lambda family: family.name):
+            if family.kind != 'histogram':
+                continue
+            for key, child in sorted(family.children.items()):
+                counts, count, total = child.totals()
+                row = {'name': family.name, 'labels': dict(key), 'count': count,
+                       'mean': None, 'p50': None, 'p95': None, 'p99': None}
+                if count:
+                    row.update(mean=total / count, p50=child.quantile(0.5, counts),
+                               p95=child.quantile(0.95, counts), p99=child.quantile(0.99, counts))
+                rows.append(row)
+        return rows
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the registry at /metrics"""
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the exhibit log
+        pass
+
+
+class MetricsServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, registry, port):
+        self.registry = registry
+        # Bound to the loopback interface only
+        http.server.ThreadingHTTPServer.__init__(self, ('127.0.0.1', port), MetricsHandler)
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name='visit-metrics', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
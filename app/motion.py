@@ -0,0 +1,111 @@
+# VISIT Motion Engine
+# Developed by Dineshkumar Rajendran
+#
+# Cheap movement detection used as the wake-up gate for the other
+# detectors. It runs on a small gray thumbnail of the frame (80 pixels wide
+# by default) through an adaptive MOG2 background model, so slow
+# lighting drift is learned into the background instead of triggering.
+# Movement is only counted inside the exhibit's polygon zones, rasterized to
+# masks once per frame size, and each zone triggers when its moving pixels
+# reach a fraction of its area. A frame where most of the image changes at
+# once is treated as a lighting jump, not a visitor.
+
+from startup import LazyModule
+
+cv2 = LazyModule('cv2')
+np = LazyModule('numpy')
+
+FULL_FRAME = [[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]]
+
+
+class MotionZone:
+    """Polygon in normalized frame coordinates with its own area threshold"""
+
+    def __init__(self, name, polygon, threshold):
+        self.name = name
+        self.polygon = [(float(x), float(y)) for x, y in polygon]
+        self.threshold = threshold
+        self.mask = None
+        self.area = 0
+
+    def rasterize(self, width, height):
+        points = np.array([(x * (width - 1), y * (height - 1)) for x, y in self.polygon], dtype=np.int32)
+        self.mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.fillPoly(self.mask, [points], 255)
+        self.area = cv2.countNonZero(self.mask)
+
+
+class MotionEngine:
+    """MOG2 foreground inside zone masks on a downscaled gray frame"""
+
+    def __init__(self, history=300, var_threshold=25, learning_rate=-1, threshold=0.01,
+                 lighting_change=0.6, warm_up_frames=10, zones=None):
+        self.history = history
+        self.var_threshold = var_threshold
+        self.learning_rate = learning_rate
+        self.lighting_change = lighting_change
+        self.warm_up_frames = warm_up_frames
+        zones = zones or [{'name': 'frame', 'polygon': FULL_FRAME}]
+        self.zones = [MotionZone(zone.get('name', f"zone{index + 1}"), zone['polygon'],
+                                 zone.get('threshold', threshold))
+                      for index, zone in enumerate(zones)]
+        self.kernel = None
+        self.subtractor = None
+        self.frame_size = None
+        self.frames = 0
+        self.lighting_changes = 0
+
+    def reset(self):
+        """Forget the background model, e.g. after the camera moved or restarted"""
+        self.subtractor = None
+        self.frames = 0
+
+    def _prepare(self, width, height):
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(history=self.history,
+                                                             varThreshold=self.var_threshold,
+                                                             detectShadows=False)
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        if self.frame_size != (width, height):
+            for zone in self.zones:
+                zone.rasterize(width, height)
+            self.frame_size = (width, height)
+        self.frames = 0
+
+    def process(self, gray):
+        """Foreground fraction of each zone; returns (moving, {zone: fraction})"""
+        height, width = gray.shape[:2]
+        if self.subtractor is None or self.frame_size != (width, height):
+            self._prepare(width, height)
+
+        foreground = self.subtractor.apply(gray, learningRate=self.learning_rate)
+        self.frames += 1
+        if self.frames <= self.warm_up_frames:
+            # The model is still learning the empty scene
+            return False, {}
+
+        changed = cv2.countNonZero(foreground) / float(width * height)
+        if changed >= self.lighting_change:
+            # Most of the image changed at once: lights, exposure or a flash.
+            # Relearn the background from this frame instead of triggering.
+            self.subtractor.apply(gray, learningRate=1.0)
+            self.lighting_changes += 1
+            return False, {}
+
+        # Drop single-pixel sensor noise before counting
+        foreground = cv2.morphologyEx(foreground, cv2.MORPH_OPEN, self.kernel)
+        fractions = {}
+        moving = False
+        for zone in self.zones:
+            if not zone.area:
+                continue
+            fraction = cv2.countNonZero(cv2.bitwise_and(foreground, zone.mask)) / float(zone.area)
+            fractions[zone.name] = fraction
+            moving = moving or fraction >= zone.threshold
+        return moving, fractions
+
+    def get_stats(self):
+        return {
+            'frames': self.frames,
+            'lighting_changes': self.lighting_changes,
+            'zones': {zone.name: zone.area for zone in self.zones}
+        }
@@ -0,0 +1,192 @@
+# VISIT Presentation Renderer
+# Developed by Dineshkumar Rajendran
+#
+# The visitor-facing output: a pygame display owned by its own render
+# thread, separate from the Tk operator console. Video frames from the
+# playback engine are presented with a full flip of the double-buffered
+# surface, aligned to vsync where the driver supports it. Still images are
+# drawn once and only the rectangles that changed are updated; while a
+# still is showing and nothing changes, nothing is presented at all.
+
+import threading
+import time
+
+from startup import LazyModule
+from ui_render import FrameSlot
+
+np = LazyModule('numpy')
+pygame = LazyModule('pygame')
+
+VIDEO = 'video'
+IMAGE = 'image'
+
+
+def content_rect(rgb_image):
+    """Bounding box (x, y, w, h) of the non-black area of a letterboxed image"""
+    lit = rgb_image.any(axis=2)
+    rows = np.flatnonzero(lit.any(axis=1))
+    columns = np.flatnonzero(lit.any(axis=0))
+    if not len(rows) or not len(columns):
+        return (0, 0, 0, 0)
+    return (int(columns[0]), int(rows[0]), int(columns[-1] - columns[0] + 1), int(rows[-1] - rows[0] + 1))
+
+
+class PresentationRenderer:
+    """Fullscreen pygame surface fed by a render thread"""
+
+    def __init__(self, video_engine, display_size, display_index=0, fullscreen=True, vsync=True,
+                 max_fps=60, clock=time.perf_counter, log=print):
+        self.video_engine = video_engine
+        self.display_size = tuple(display_size)
+        self.display_index = display_index
+        self.fullscreen = fullscreen
+        self.vsync = vsync
+        self.max_fps = max_fps
+        self.clock = clock
+        self.log = log
+        self.image_slot = FrameSlot()
+        self.last_frame = None
+        self.vsync_active = False
+        self._image = None
+        self._image_rect = None
+        self._shown = None
+        self._running = False
+        self._thread = None
+        self.video_frames = 0
+        self.full_updates = 0
+        self.dirty_updates = 0
+        self.started_at = None
+
+    @property
+    def is_running(self):
+        return self._running
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self.started_at = self.clock()
+        self._thread = threading.Thread(target=self._render_loop, name='visit-presentation', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(2.0)
+        self._thread = None
+
+    def show_image(self, rgb_image):
+        """Still image shown while the active category has no video; any thread"""
+        self.image_slot.put((rgb_image,))
+
+    def _open(self):
+        pygame.display.init()
+        flags = pygame.DOUBLEBUF
+        if self.fullscreen:
+            flags |= pygame.FULLSCREEN
+        pygame.display.set_caption("VISIT")
+        if self.vsync:
+            try:
+                # pygame only honours vsync for renderer-backed (SCALED) displays
+                screen = pygame.display.set_mode(self.display_size, flags | pygame.SCALED,
+                                                 display=self.display_index, vsync=1)
+                self.vsync_active = True
+                return screen
+            except pygame.error as e:
+                self.log(f"Presentation: vsync unavailable ({e}), pacing with a timer")
+        return pygame.display.set_mode(self.display_size, flags, display=self.display_index)
+
+    def _handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                self._running = False
+
+    def _blit(self, screen, rgb_frame):
+        height, width = rgb_frame.shape[:2]
+        surface = pygame.image.frombuffer(np.ascontiguousarray(rgb_frame), (width, height), 'RGB')
+        if (width, height) != self.display_size:
+            surface = pygame.transform.smoothscale(surface, self.display_size)
+        screen.blit(surface, (0, 0))
+
+    def _present_video(self, screen, frame):
+        if frame is self.last_frame and self._shown == VIDEO:
+            return False
+        self._blit(screen, frame)
+        pygame.display.flip()
+        self.last_frame = frame
+        self._shown = VIDEO
+        self.video_frames += 1
+        self.full_updates += 1
+        return True
+
+    def _present_image(self, screen, image):
+        if image is None:
+            # Category without a picture: blank the screen once
+            screen.fill((0, 0, 0))
+            pygame.display.flip()
+            self.full_updates += 1
+            self._image_rect = None
+            self.last_frame = None
+            self._shown = IMAGE
+            return True
+        rect = content_rect(image)
+        self._blit(screen, image)
+        if self._shown == IMAGE and self._image_rect is not None and not self.vsync_active:
+            # Only the union of the old and new picture area changed
+            dirty = pygame.Rect(rect).union(pygame.Rect(self._image_rect))
+            pygame.display.update(dirty)
+            self.dirty_updates += 1
+        else:
+            pygame.display.flip()
+            self.full_updates += 1
+        self._image_rect = rect
+        self.last_frame = image
+        self._shown = IMAGE
+        return True
+
+    def _render_loop(self):
+        try:
+            screen = self._open()
+        except Exception as e:
+            self.log(f"Presentation display error: {e}")
+            self._running = False
+            return
+
+        screen.fill((0, 0, 0))
+        pygame.display.flip()
+        timer = pygame.time.Clock()
+        try:
+            while self._running:
+                self._handle_events()
+                item = self.image_slot.take()
+                image_changed = item is not None
+                if image_changed:
+                    self._image = item[0]
+
+                presented = False
+                frame = self.video_engine.frame_at()
+                if frame is not None:
+                    presented = self._present_video(screen, frame)
+                elif image_changed or self._shown != IMAGE:
+                    presented = self._present_image(screen, self._image)
+
+                if presented and self.vsync_active:
+                    # flip() already waited for the vertical blank
+                    continue
+                timer.tick(self.max_fps)
+        except Exception as e:
+            self.log(f"Presentation render error: {e}")
+        finally:
+            self._running = False
+            pygame.display.quit()
+
+    def get_stats(self):
+        elapsed = self.clock() - self.started_at if self.started_at else 0.0
+        return {
+            'running': self._running,
+            'vsync': self.vsync_active,
+            'video_frames': self.video_frames,
+            'video_fps': self.video_frames / elapsed if elapsed > 0 else 0.0,
+            'full_updates': self.full_updates,
+            'dirty_updates': self.dirty_updates
+        }
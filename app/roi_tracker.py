@@ -0,0 +1,149 @@
+# VISIT Region-of-Interest Inference
+# Developed by Dineshkumar Rajendran
+#
+# Lets FaceMesh, Hands and Pose look at a crop around the face or body that
+# was found on the previous frame instead of the whole camera image. Their
+# landmarks are mapped back to full-frame coordinates so the rest of the app
+# never sees the crop. When nothing is tracked, the track is too old, or the
+# model finds nothing inside the crop, the full frame is searched instead.
+
+import time
+
+from signals import landmarks_to_array
+from startup import LazyModule
+
+np = LazyModule('numpy')
+
+
+class RegionTracker:
+    """Remembers the last known box of a face or body in normalized coordinates"""
+
+    def __init__(self, expand=1.5, max_age=0.5, min_crop_size=96, max_coverage=0.8,
+                 clock=time.monotonic):
+        self.expand = expand
+        self.max_age = max_age
+        self.min_crop_size = min_crop_size
+        self.max_coverage = max_coverage
+        self.clock = clock
+        self.box = None
+        self.updated_at = None
+        self.region = None
+
+    def update(self, box):
+        """Store a new normalized (xmin, ymin, width, height) box, or None when lost"""
+        if box is None or box[2] <= 0 or box[3] <= 0:
+            self.lose()
+            return
+        self.box = box
+        self.updated_at = self.clock()
+
+    def update_from_landmarks(self, landmarks):
+        """Track the bounding box of a normalized landmark list"""
+        if landmarks is None:
+            self.lose()
+            return
+        points = landmarks_to_array(landmarks)
+        if not len(points):
+            self.lose()
+            return
+        xmin, ymin = np.clip(points[:, :2].min(axis=0), 0.0, 1.0)
+        xmax, ymax = np.clip(points[:, :2].max(axis=0), 0.0, 1.0)
+        self.update((float(xmin), float(ymin), float(xmax - xmin), float(ymax - ymin)))
+
+    def lose(self):
+        self.box = None
+        self.updated_at = None
+        self.region = None
+
+    @property
+    def is_tracking(self):
+        return self.box is not None and self.clock() - self.updated_at <= self.max_age
+
+    def crop_region(self, width, height):
+        """Return the pixel region (x0, y0, x1, y1) to search, or None for the full frame"""
+        if not self.is_tracking:
+            return None
+
+        xmin, ymin, box_w, box_h = self.box
+        center_x = (xmin + box_w / 2.0) * width
+        center_y = (ymin + box_h / 2.0) * height
+        # Square crops keep the aspect ratio the models were trained on
+        side = max(box_w * width, box_h * height) * self.expand
+        side = max(side, self.min_crop_size)
+        if side * side >= self.max_coverage * width * height:
+            return None
+
+        x0 = int(max(0, center_x - side / 2.0))
+        y0 = int(max(0, center_y - side / 2.0))
+        x1 = int(min(width, center_x + side / 2.0))
+        y1 = int(min(height, center_y + side / 2.0))
+
+        # Keep the previous crop while the box stays well inside it, so the
+        # models' own frame-to-frame tracking sees a steady image
+        if self.region is not None:
+            px0, py0, px1, py1 = self.region
+            prev_side = max(px1 - px0, py1 - py0)
+            if (px0 <= center_x - box_w * width / 2.0 and center_x + box_w * width / 2.0 <= px1 and
+                    py0 <= center_y - box_h * height / 2.0 and center_y + box_h * height / 2.0 <= py1 and
+                    0.8 <= side / prev_side <= 1.25):
+                return self.region
+
+        self.region = (x0, y0, x1, y1)
+        return self.region
+
+
+def map_landmarks_to_frame(landmark_list, region, width, height):
+    """Convert landmarks normalized to a crop back to full-frame normalized coordinates"""
+    x0, y0, x1, y1 = region
+    crop_w = float(x1 - x0)
+    crop_h = float(y1 - y0)
+    for point in landmark_list.landmark:
+        point.x = (point.x * crop_w + x0) / width
+        point.y = (point.y * crop_h + y0) / height
+        # z uses roughly the same scale as x
+        point.z = point.z * crop_w / width
+
+
+class RoiDetector:
+    """Wraps a MediaPipe solution so process() searches the tracked region first
+
+    landmark_fields names the result attributes holding normalized landmarks,
+    either a single landmark list or a list of them.
+    """
+
+    def __init__(self, detector, tracker, landmark_fields):
+        self.detector = detector
+        self.tracker = tracker
+        self.landmark_fields = landmark_fields
+        self.roi_runs = 0
+        self.full_runs = 0
+        self.fallbacks = 0
+
+    def _has_landmarks(self, results):
+        return any(getattr(results, field, None) for field in self.landmark_fields)
+
+    def process(self, image):
+        height, width = image.shape[:2]
+        region = self.tracker.crop_region(width, height)
+        if region is not None:
+            x0, y0, x1, y1 = region
+            crop = np.ascontiguousarray(image[y0:y1, x0:x1])
+            results = self.detector.process(crop)
+            self.roi_runs += 1
+            if self._has_landmarks(results):
+                for field in self.landmark_fields:
+                    value = getattr(results, field, None)
+                    if value is None:
+                        continue
+                    for landmark_list in (value if isinstance(value, list) else [value]):
+                        map_landmarks_to_frame(landmark_list, region, width, height)
+                return results
+            # Tracking lost inside the crop: search the whole frame again
+            self.fallbacks += 1
+            self.tracker.lose()
+
+        self.full_runs += 1
+        return self.detector.process(image)
+
+    def get_stats(self):
+        return {'roi_runs': self.roi_runs, 'full_runs': self.full_runs, 'fallbacks': self.fallbacks}
@@ -0,0 +1,300 @@
+# VISIT Settings Loader
+# Developed by Dineshkumar Rajendran
+
+import copy
+import json
+import os
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_DIR = os.path.normpath(os.path.join(APP_DIR, '..', 'configs'))
+
+DETECTION_SETTINGS_FILE = 'detection_settings.json'
+DISPLAY_SETTINGS_FILE = 'display_settings.json'
+CAMERAS_SETTINGS_FILE = 'cameras.json'
+
+# Defaults used when a settings file is missing, unreadable or incomplete
+DEFAULT_DETECTION_SETTINGS = {
+    # 'serial' runs the MediaPipe graphs one after another,
+    # 'parallel' runs them concurrently on a worker thread pool
+    'detection_mode': 'serial',
+    'detector_workers': 4,
+    # Load the needed models in the background once the window is visible
+    'warm_up_models': True,
+    # Gate expensive detectors behind cheap triggers. A gated detector runs
+    # while one of its gate triggers (or its own result) fired within the
+    # last keep_alive seconds, and then only on every stride-th frame.
+    'scheduler': {
+        'enabled': True,
+        'detectors': {
+            'face_detection': {'stride': 1, 'gate': ['movement'], 'keep_alive': 5.0},
+            'face_mesh': {'stride': 1, 'gate': ['face'], 'keep_alive': 1.0},
+            'hands': {'stride': 2, 'gate': ['movement'], 'keep_alive': 2.0},
+            'pose': {'stride': 2, 'gate': ['movement'], 'keep_alive': 2.0}
+        }
+    },
+    # Region-of-interest inference: FaceMesh searches a square crop around
+    # the last face box, Pose and Hands a crop around the last body box.
+    # Crops are expanded by the given factor and expire after max_age seconds.
+    'roi': {
+        'enabled': False,
+        'face_expand': 1.6,
+        'body_expand': 1.3,
+        'hands_expand': 1.8,
+        'max_age': 0.5,
+        'min_crop_size': 96
+    },
+    # MediaPipe confidence thresholds of each model
+    'models': {
+        'face_detection': {'min_detection_confidence': 0.7},
+        'face_mesh': {'min_detection_confidence': 0.5, 'min_tracking_confidence': 0.5},
+        'hands': {'min_detection_confidence': 0.7, 'min_tracking_confidence': 0.5},
+        'pose': {'min_detection_confidence': 0.7, 'min_tracking_confidence': 0.5}
+    },
+    # Movement gate: MOG2 background subtraction on a gray thumbnail 'width'
+    # pixels wide. 'zones' are polygons of [x, y] points in
+    # 0..1 frame coordinates (empty: the whole frame); a zone triggers when
+    # its moving pixels reach 'threshold' (a fraction of the zone area, per
+    # zone or this default). A frame changing by lighting_change or more is
+    # treated as a lighting jump.
+    'motion': {
+        'width': 80,
+        'history': 300,
+        'var_threshold': 25,
+        'learning_rate': -1,
+        'threshold': 0.01,
+        'lighting_change': 0.6,
+        'warm_up_frames': 10,
+        'zones': []
+    },
+    # Landmark signals: per-frame measurements are smoothed with 'ema'
+    # (ema_alpha), 'kalman' or 'none' and kept for 'history' frames. A face
+    # approaches when its mean size over the last trend_window frames is
+    # above approach_ratio times the frames before, and recedes when it is
+    # below recede_ratio times. Eye movement
+    # is an eye aspect ratio leaving its recent mean by eye_change (a blink
+    # or widening); lip movement is a mouth aspect ratio varying by more than
+    # lip_change over lip_window frames.
+    'signals': {
+        'smoothing': 'ema',
+        'ema_alpha': 0.5,
+        'kalman_process_noise': 0.0001,
+        'kalman_measurement_noise': 0.001,
+        'history': 30,
+        'trend_window': 3,
+        'approach_ratio': 1.1,
+        'recede_ratio': 0.9,
+        'eye_window': 10,
+        'eye_change': 0.05,
+        'lip_window': 8,
+        'lip_change': 0.03
+    },
+    # calibration.py: on-site clips are recorded to output_dir, one per
+    # entry in 'clips', each listing the states that should (true) or should
+    # not (false) fire while it plays; unlisted states are not judged on it.
+    # Model outputs are cached per clip, and thresholds are swept on
+    # 'workers' processes (0: one per CPU).
+    'calibration': {
+        'output_dir': 'cache/calibration',
+        'seconds': 60,
+        'workers': 0,
+        'chunk_frames': 300,
+        'clips': {
+            'empty': {'movement': False, 'face': False, 'face_approaching': False,
+                      'face_receding': False, 'eye_movement': False, 'lip_movement': False},
+            'still': {'face': True, 'face_approaching': False, 'face_receding': False,
+                      'lip_movement': False},
+            'talking': {'face': True, 'lip_movement': True},
+            'blinking': {'face': True, 'eye_movement': True},
+            'approach': {'movement': True, 'face_approaching': True}
+        }
+    },
+    # Media triggers: a state's evidence follows its raw flag with the given
+    # response time (seconds). It is confirmed at 'enter' and released at
+    # 'exit'. A category plays at least 'min_dwell' seconds and cannot return
+    # for 'cooldown' seconds after it was left. 'states' overrides per state.
+    'triggers': {
+        'enabled': True,
+        'response_time': 0.3,
+        'enter': 0.6,
+        'exit': 0.3,
+        'min_dwell': 2.0,
+        'cooldown': 1.0,
+        'states': {
+            'face_approaching': {'enter': 0.5, 'min_dwell': 3.0},
+            'face_receding': {'enter': 0.5, 'min_dwell': 3.0},
+            'eye_movement': {'enter': 0.7, 'exit': 0.4, 'cooldown': 2.0},
+            'lip_movement': {'enter': 0.7, 'exit': 0.4, 'cooldown': 2.0},
+            'movement': {'exit': 0.2, 'min_dwell': 1.0}
+        }
+    }
+}
+
+DEFAULT_DISPLAY_SETTINGS = {
+    # Detection stage pacing; 0 runs at the camera's native frame rate
+    'target_fps': 30,
+    # Refresh rate of the testing view, independent of the detection rate
+    'ui_refresh_fps': 15,
+    # Capture input: a camera index, a video file or an rtsp:// / http://
+    # stream. Local cameras are asked for the first pixel format in 'fourcc'
+    # they accept, then the size and frame rate; buffer_size is the driver
+    # queue in frames. A dropped device is reopened after a delay that
+    # doubles up to reconnect_max_delay.
+    'camera': {
+        'source': 0,
+        'width': 640,
+        'height': 480,
+        'fps': 30,
+        'fourcc': ['MJPG', 'YUYV'],
+        'buffer_size': 1,
+        'reconnect_initial_delay': 0.5,
+        'reconnect_max_delay': 10.0,
+        'loop_files': True,
+        'rtsp_transport': 'tcp'
+    },
+    # Trigger audio: mixer sample rate and buffer (frames; smaller is lower
+    # latency but may crackle on slow machines), reserved channels and the
+    # crossfade between categories
+    'audio': {
+        'frequency': 44100,
+        'buffer_size': 512,
+        'channels': 8,
+        'crossfade_ms': 250
+    },
+    # Resolution media is prepared for
+    'display_width': 1920,
+    'display_height': 1080,
+    # Visitor-facing pygame display opened by Full Screen (F11); 'display'
+    # is the monitor index, max_fps caps redraws when vsync is unavailable
+    'presentation': {
+        'display': 0,
+        'fullscreen': True,
+        'vsync': True,
+        'max_fps': 60
+    },
+    # headless.py: localhost control port (0 disables it), whether to open
+    # the presentation display, and how often to log the pipeline counters
+    'headless': {
+        'control_port': 8765,
+        'presentation': True,
+        'stats_interval': 300
+    },
+    # metrics.py: Prometheus text on 127.0.0.1:<port>/metrics (0 disables
+    # it). 'exhibit' labels every sample (empty: the host name); the
+    # dashboard panel refreshes every refresh_interval seconds.
+    'metrics': {
+        'port': 9108,
+        'exhibit': '',
+        'refresh_interval': 2.0
+    },
+    # Decoded images and short audio clips kept in memory
+    'media_cache': {
+        'budget_mb': 256,
+        'max_sound_seconds': 60
+    },
+    # Trigger video playback: decoded frames buffered per clip, and frames
+    # kept ready for every other clip. Pre-rolled frames share preroll_mb
+    # (2 frames at 1920x1080 are 12 MB); when they do not all fit, the
+    # likely next clips are kept
+    'video': {
+        'buffer_frames': 8,
+        'preroll_frames': 2,
+        'preroll_mb': 256,
+        # Decode short looping clips once into a memory-mapped frame file.
+        # Frames are stored at most max_width pixels wide (960x540 is 1.5 MB
+        # per frame), so max_mb holds about 45 seconds of a 30 FPS loop;
+        # longer clips are not pre-rendered and play through the decoder
+        'prerender': {
+            'enabled': False,
+            'categories': ['default'],
+            'max_mb': 2048,
+            'max_width': 960,
+            'cache_dir': 'cache/frames'
+        }
+    },
+    # Target profile of scripts/normalize_media.py; the app plays the
+    # normalized copies listed in the manifest instead of the originals
+    'normalized_media': {
+        'enabled': True,
+        'output_dir': 'cache/media',
+        'video_fps': 30,
+        'video_codec': 'libx264',
+        'video_profile': 'high',
+        'video_crf': 23,
+        'audio_codec': 'libvorbis',
+        'audio_bitrate': '128k',
+        'audio_sample_rate': 44100,
+        'image_quality': 90
+    }
+}
+
+# supervisor.py: one headless worker process per exhibit camera. Paths are
+# relative to the configs folder; 'cpus' pins a worker to those cores
+# (empty: an even share of the machine). Crashed workers are restarted
+# after a back-off that doubles up to max_delay and resets once a worker
+# has stayed up for stable_after seconds.
+DEFAULT_CAMERAS_SETTINGS = {
+    'workers': [
+        {
+            'name': 'exhibit-1',
+            'camera': 0,
+            'media_config': 'media_config.json',
+            'settings_dir': None,
+            'display': 0,
+            'port': 8765,
+            'metrics_port': 9108,
+            'cpus': []
+        }
+    ],
+    'restart': {
+        'initial_delay': 1.0,
+        'max_delay': 60.0,
+        'stable_after': 30.0
+    },
+    'status_interval': 10
+}
+
+
+def merge_settings(defaults, overrides):
+    """Recursively merge user settings over a copy of the defaults"""
+    merged = copy.deepcopy(defaults)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_settings(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_settings(filename, defaults, config_dir=None, log=print):
+    """Load a JSON settings file from the configs folder merged over defaults"""
+    path = os.path.join(config_dir or CONFIG_DIR, filename)
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        log(f"Using default settings for {filename}: {e}")
+        return copy.deepcopy(defaults)
+
+    if not isinstance(data, dict):
+        log(f"Ignoring {filename}: expected a JSON object")
+        return copy.deepcopy(defaults)
+    return merge_settings(defaults, data)
+
+
+def save_settings(filename, settings, config_dir=None):
+    """Write settings back to a JSON file in the configs folder"""
+    path = os.path.join(config_dir or CONFIG_DIR, filename)
+    with open(path, 'w') as f:
+        json.dump(settings, f, indent=4)
+
+
+def load_detection_settings(config_dir=None, log=print):
+    return load_settings(DETECTION_SETTINGS_FILE, DEFAULT_DETECTION_SETTINGS, config_dir, log)
+
+
+def load_display_settings(config_dir=None, log=print):
+    return load_settings(DISPLAY_SETTINGS_FILE, DEFAULT_DISPLAY_SETTINGS, config_dir, log)
+
+
+def load_cameras_settings(config_dir=None, log=print):
+    return load_settings(CAMERAS_SETTINGS_FILE, DEFAULT_CAMERAS_SETTINGS, config_dir, log)
@@ -0,0 +1,226 @@
+# VISIT Landmark Signals
+# Developed by Dineshkumar Rajendran
+#
+# Turns MediaPipe landmark lists into NumPy arrays once per result and keeps
+# the per-frame measurements derived from them (face size, eye and mouth
+# aspect ratios) in fixed-size ring buffers. Smoothing, windowed averages,
+# deviations and slopes are computed over those buffers with NumPy instead
+# of Python lists, so a feature over a dozen landmarks costs about the same
+# as reading two of them.
+
+import itertools
+import math
+import time
+
+from startup import LazyModule
+
+np = LazyModule('numpy')
+
+# FaceMesh indices, in the p1..p6 order of the eye aspect ratio:
+# corners p1/p4, upper lid p2/p3, lower lid p6/p5
+LEFT_EYE = (33, 160, 158, 133, 153, 144)
+RIGHT_EYE = (362, 385, 387, 263, 373, 380)
+# Mouth corners, then upper and lower inner lip points paired top to bottom
+MOUTH_CORNERS = (78, 308)
+MOUTH_UPPER = (81, 13, 311)
+MOUTH_LOWER = (178, 14, 402)
+
+
+def landmarks_to_array(landmark_list):
+    """(N, 3) float32 array of x, y, z for a MediaPipe NormalizedLandmarkList"""
+    points = landmark_list.landmark
+    values = itertools.chain.from_iterable((point.x, point.y, point.z) for point in points)
+    return np.fromiter(values, dtype=np.float32, count=3 * len(points)).reshape(-1, 3)
+
+
+def eye_aspect_ratios(points, aspect=1.0):
+    """Eye aspect ratio of both eyes: lid opening over eye width
+
+    aspect is the frame width over its height, so x and y distances are
+    measured in the same units.
+    """
+    eyes = points[[LEFT_EYE, RIGHT_EYE], :2] * (aspect, 1.0)
+    vertical = (np.linalg.norm(eyes[:, 1] - eyes[:, 5], axis=1) +
+                np.linalg.norm(eyes[:, 2] - eyes[:, 4], axis=1))
+    horizontal = 2.0 * np.linalg.norm(eyes[:, 0] - eyes[:, 3], axis=1)
+    return vertical / np.maximum(horizontal, 1e-6)
+
+
+def mouth_aspect_ratio(points, aspect=1.0):
+    """Mean inner-lip opening over mouth width"""
+    scale = (aspect, 1.0)
+    upper = points[list(MOUTH_UPPER), :2] * scale
+    lower = points[list(MOUTH_LOWER), :2] * scale
+    corners = points[list(MOUTH_CORNERS), :2] * scale
+    opening = np.linalg.norm(upper - lower, axis=1).mean()
+    width = np.linalg.norm(corners[0] - corners[1])
+    return float(opening / max(width, 1e-6))
+
+
+class RingBuffer:
+    """Fixed-size float history backed by a NumPy array"""
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self._data = np.zeros(self.capacity, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value):
+        self._data[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def values(self, n=None):
+        """The last n values (all by default), oldest first"""
+        n = self._count if n is None else min(int(n), self._count)
+        if n <= 0:
+            return self._data[:0]
+        start = self._next - n
+        if start >= 0:
+            return self._data[start:self._next]
+        return np.concatenate((self._data[start:], self._data[:self._next]))
+
+    def last(self):
+        return float(self._data[self._next - 1]) if self._count else None
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+
+class ExponentialSmoother:
+    """Exponential moving average"""
+
+    def __init__(self, alpha=0.5):
+        self.alpha = min(1.0, max(0.0, alpha))
+        self.value = None
+
+    def update(self, measurement):
+        if self.value is None:
+            self.value = measurement
+        else:
+            self.value += self.alpha * (measurement - self.value)
+        return self.value
+
+    def reset(self):
+        self.value = None
+
+
+class KalmanSmoother:
+    """Constant-value 1-D Kalman filter
+
+    process_noise is how much the true value may drift per frame,
+    measurement_noise how noisy a single reading is.
+    """
+
+    def __init__(self, process_noise=1e-4, measurement_noise=1e-3):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.value = None
+        self.variance = 1.0
+
+    def update(self, measurement):
+        if self.value is None:
+            self.value = measurement
+            self.variance = self.measurement_noise
+            return self.value
+        self.variance += self.process_noise
+        gain = self.variance / (self.variance + self.measurement_noise)
+        self.value += gain * (measurement - self.value)
+        self.variance *= 1.0 - gain
+        return self.value
+
+    def reset(self):
+        self.value = None
+        self.variance = 1.0
+
+
+class PassThrough:
+    value = None
+
+    def update(self, measurement):
+        self.value = measurement
+        return measurement
+
+    def reset(self):
+        self.value = None
+
+
+def create_smoother(settings):
+    """Smoother named by settings['smoothing']: 'ema', 'kalman' or 'none'"""
+    kind = settings.get('smoothing', 'ema')
+    if kind == 'kalman':
+        return KalmanSmoother(settings.get('kalman_process_noise', 1e-4),
+                              settings.get('kalman_measurement_noise', 1e-3))
+    if kind == 'ema':
+        return ExponentialSmoother(settings.get('ema_alpha', 0.5))
+    return PassThrough()
+
+
+class SignalTrack:
+    """Smoothed history of one measurement with timestamps"""
+
+    def __init__(self, capacity=30, smoother=None, clock=time.perf_counter):
+        self.smoother = smoother or PassThrough()
+        self.clock = clock
+        self.raw = RingBuffer(capacity)
+        self.smoothed = RingBuffer(capacity)
+        self.times = RingBuffer(capacity)
+
+    def __len__(self):
+        return len(self.smoothed)
+
+    def append(self, value, now=None):
+        """Record a measurement and return its smoothed value"""
+        self.raw.append(value)
+        self.times.append(self.clock() if now is None else now)
+        smoothed = self.smoother.update(value)
+        self.smoothed.append(smoothed)
+        return smoothed
+
+    def mean(self, n, offset=0):
+        """Mean of n smoothed values ending offset samples before the latest"""
+        values = self.smoothed.values(n + offset)
+        values = values[:len(values) - offset]
+        return float(values.mean()) if len(values) else math.nan
+
+    def ratio(self, n):
+        """Mean of the last n values over the mean of the n before them"""
+        if len(self) < 2 * n:
+            return math.nan
+        older = self.mean(n, n)
+        return self.mean(n) / older if older else math.nan
+
+    def deviation(self, n):
+        """Distance of the latest raw value from the mean of the last n"""
+        values = self.raw.values(n)
+        if len(values) < 2:
+            return 0.0
+        return float(abs(values[-1] - values[:-1].mean()))
+
+    def spread(self, n):
+        """Standard deviation of the last n raw values"""
+        values = self.raw.values(n)
+        return float(values.std()) if len(values) >= 2 else 0.0
+
+    def slope(self, n):
+        """Least-squares rate of change of the smoothed value per second"""
+        values = self.smoothed.values(n)
+        if len(values) < 2:
+            return 0.0
+        times = self.times.values(n)
+        times = times - times.mean()
+        denominator = float((times * times).sum())
+        if denominator <= 0:
+            return 0.0
+        return float((times * (values - values.mean())).sum() / denominator)
+
+    def reset(self):
+        self.smoother.reset()
+        self.raw.clear()
+        self.smoothed.clear()
+        self.times.clear()
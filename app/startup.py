@@ -0,0 +1,79 @@
+# VISIT Startup Helpers
+# Developed by Dineshkumar Rajendran
+#
+# Deferred imports and per-phase timing for a faster, measurable cold start.
+
+import importlib
+import threading
+import time
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access
+
+    cv2 = LazyModule('cv2') costs nothing at import time; the real import
+    happens the first time cv2.something is used, or when load() is called
+    from a warm-up thread.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attribute):
+        return getattr(self.load(), attribute)
+
+    def __repr__(self):
+        state = 'loaded' if self.is_loaded else 'not loaded'
+        return f"<LazyModule '{self._name}' ({state})>"
+
+
+class StartupTimer:
+    """Records how long each startup phase took"""
+
+    def __init__(self, label='Startup', clock=time.perf_counter):
+        self.label = label
+        self.clock = clock
+        self.started_at = clock()
+        self.phases = []
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def record(self, name, seconds):
+        self.phases.append((name, seconds))
+
+    def elapsed(self):
+        return self.clock() - self.started_at
+
+    def summary(self):
+        """One line per phase plus the total since the timer was created"""
+        lines = [f"{self.label} {name}: {seconds * 1000:.0f} ms" for name, seconds in self.phases]
+        lines.append(f"{self.label} total: {self.elapsed() * 1000:.0f} ms")
+        return lines
+
+
+class _Phase:
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = self.timer.clock()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.timer.record(self.name, self.timer.clock() - self.start)
+        return False
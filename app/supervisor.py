@@ -0,0 +1,339 @@
+# VISIT Multi-Camera Supervisor
+# Developed by Dineshkumar Rajendran
+#
+# Runs one headless worker process per exhibit camera, as listed in
+# configs/cameras.json. Each worker has its own camera, media configuration,
+# settings folder (and so its own detector set) and presentation display,
+# so a slow or crashed exhibit never stalls the others. Workers are pinned
+# to CPU cores, restarted with a growing back-off when they exit, and their
+# control sockets are polled for an aggregated status table.
+#
+#   python supervisor.py
+#   python supervisor.py --status
+#
+# Worker output goes to logs/<name>.log.
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from headless import EXIT_LICENSE_ERROR
+from settings import CONFIG_DIR, load_cameras_settings
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+LOG_DIR = os.path.join(os.path.dirname(APP_DIR), 'logs')
+HEADLESS_SCRIPT = os.path.join(APP_DIR, 'headless.py')
+
+
+def query_worker(port, command='status', timeout=1.0):
+    """Send one command to a worker's control socket; None if it does not answer"""
+    try:
+        with socket.create_connection(('127.0.0.1', port), timeout=timeout) as connection:
+            connection.sendall((command + '\n').encode('utf-8'))
+            reply = connection.makefile('rb').readline()
+    except OSError:
+        return None
+    try:
+        return json.loads(reply.decode('utf-8'))
+    except ValueError:
+        return None
+
+
+def set_affinity(pid, cpus):
+    """Pin a process to the given cores; False where the platform cannot"""
+    if not cpus:
+        return False
+    if hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(pid, cpus)
+            return True
+        except OSError as e:
+            print(f"Could not pin process {pid} to {cpus}: {e}")
+            return False
+    try:
+        # Windows and macOS: optional
+        import psutil
+        psutil.Process(pid).cpu_affinity(list(cpus))
+        return True
+    except ImportError:
+        return False
+    except Exception as e:
+        print(f"Could not pin process {pid} to {cpus}: {e}")
+        return False
+
+
+def available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def assign_cpus(workers):
+    """Cores per worker: its configured list, else an even share of the rest"""
+    cpus = available_cpus()
+    taken = {cpu for worker in workers for cpu in worker.get('cpus') or []}
+    free = [cpu for cpu in cpus if cpu not in taken] or cpus
+    unassigned = [worker for worker in workers if not worker.get('cpus')]
+    share = max(1, len(free) // len(unassigned)) if unassigned else 0
+    assignment = {}
+    for worker in workers:
+        if worker.get('cpus'):
+            assignment[worker['name']] = list(worker['cpus'])
+    for index, worker in enumerate(unassigned):
+        start = (index * share) % len(free)
+        assignment[worker['name']] = free[start:start + share]
+    return assignment
+
+
+class Worker:
+    """One headless process and its restart bookkeeping"""
+
+    def __init__(self, config, cpus, restart_settings, config_dir=None):
+        self.name = config['name']
+        self.config = config
+        self.config_dir = config_dir or CONFIG_DIR
+        self.cpus = cpus
+        self.port = config.get('port')
+        self.initial_delay = restart_settings['initial_delay']
+        self.max_delay = restart_settings['max_delay']
+        self.stable_after = restart_settings['stable_after']
+        self.process = None
+        self.started_at = None
+        self.restarts = 0
+        self.delay = self.initial_delay
+        self.restart_at = None
+        self.last_exit = None
+        self.pinned = False
+        self.skipped = None
+
+    def media_config_path(self):
+        return os.path.join(self.config_dir, self.config['media_config'])
+
+    def settings_dir(self):
+        if not self.config.get('settings_dir'):
+            return None
+        return os.path.join(self.config_dir, self.config['settings_dir'])
+
+    def missing_files(self):
+        """Configured files the worker would fail on straight away"""
+        paths = [self.media_config_path(), self.settings_dir()]
+        return [path for path in paths if path is not None and not os.path.exists(path)]
+
+    def command(self):
+        command = [sys.executable, HEADLESS_SCRIPT, '--config', self.media_config_path(),
+                   '--camera', str(self.config.get('camera', 0)),
+                   '--port', str(self.port or 0),
+                   '--exhibit', self.name]
+        if 'metrics_port' in self.config:
+            command += ['--metrics-port', str(self.config['metrics_port'] or 0)]
+        if self.settings_dir():
+            command += ['--settings-dir', self.settings_dir()]
+        if self.config.get('display') is not None:
+            command += ['--display', str(self.config['display'])]
+        return command
+
+    def environment(self):
+        env = dict(os.environ)
+        if self.cpus:
+            # Keep OpenCV/BLAS thread pools within the pinned cores
+            threads = str(len(self.cpus))
+            env.setdefault('OMP_NUM_THREADS', threads)
+            env.setdefault('OPENBLAS_NUM_THREADS', threads)
+        return env
+
+    def start(self, now):
+        missing = self.missing_files()
+        if missing:
+            # Starting would only exit and restart in a loop
+            self.skipped = f"not found: {', '.join(missing)}"
+            self.restart_at = None
+            print(f"[{self.name}] not started, {self.skipped}")
+            return
+        self.skipped = None
+        os.makedirs(LOG_DIR, exist_ok=True)
+        log = open(os.path.join(LOG_DIR, f"{self.name}.log"), 'ab')
+        try:
+            self.process = subprocess.Popen(self.command(), cwd=APP_DIR, env=self.environment(),
+                                            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT)
+        finally:
+            log.close()
+        self.pinned = set_affinity(self.process.pid, self.cpus)
+        self.started_at = now
+        self.restart_at = None
+        print(f"[{self.name}] started pid {self.process.pid} on cpus {self.cpus or 'any'}")
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def check(self, now):
+        """Notice an exit and schedule or perform the restart"""
+        if self.alive:
+            if self.started_at is not None and now - self.started_at >= self.stable_after:
+                self.delay = self.initial_delay
+            return
+        if self.process is not None:
+            self.last_exit = self.process.returncode
+            uptime = now - self.started_at
+            self.process = None
+            if self.last_exit in (EXIT_LICENSE_ERROR, 2):
+                # A license error or rejected arguments: restarting will not help
+                reason = 'a license error' if self.last_exit == EXIT_LICENSE_ERROR else 'invalid arguments'
+                print(f"[{self.name}] exited with {reason}; not restarting")
+                self.restart_at = float('inf')
+                return
+            if uptime >= self.stable_after:
+                self.delay = self.initial_delay
+            self.restart_at = now + self.delay
+            print(f"[{self.name}] exited with code {self.last_exit} after {uptime:.0f}s; "
+                  f"restarting in {self.delay:.0f}s")
+            self.delay = min(self.delay * 2, self.max_delay)
+        if self.restart_at is not None and now >= self.restart_at:
+            self.restarts += 1
+            self.start(now)
+
+    def stop(self, timeout=5.0):
+        if not self.alive:
+            return
+        if self.port:
+            query_worker(self.port, 'quit', timeout=timeout)
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+    def status(self, now):
+        status = {
+            'name': self.name,
+            'pid': self.process.pid if self.alive else None,
+            'alive': self.alive,
+            'uptime': now - self.started_at if self.alive else 0.0,
+            'restarts': self.restarts,
+            'last_exit': self.last_exit,
+            'cpus': self.cpus,
+            'pinned': self.pinned,
+            'skipped': self.skipped
+        }
+        if self.alive and self.port:
+            status['worker'] = query_worker(self.port)
+        return status
+
+
+def format_status(statuses):
+    lines = [f"{'WORKER':<16}{'PID':>8}  {'UPTIME':>8}  {'RESTARTS':>8}  {'CPUS':<10}"
+             f"{'CAMERA':<8}{'DISPLAY':<9}{'MEDIA':<14}"]
+    for status in statuses:
+        worker = status.get('worker') or {}
+        if status.get('skipped'):
+            state = f"skipped ({status['skipped']})"
+            camera = display = media = '-'
+        elif not status['alive']:
+            state = f"down (exit {status['last_exit']})"
+            camera = display = media = '-'
+        elif not worker:
+            state = 'no reply'
+            camera = display = media = '-'
+        else:
+            state = ''
+            camera = 'on' if worker.get('camera') else 'off'
+            display = 'on' if worker.get('presentation') else 'off'
+            media = worker.get('active_media') or '-'
+        cpus = ','.join(str(cpu) for cpu in status['cpus']) or 'any'
+        pid = status['pid'] if status['pid'] is not None else '-'
+        lines.append(f"{status['name']:<16}{pid:>8}  {status['uptime']:>7.0f}s  {status['restarts']:>8}  "
+                     f"{cpus:<10}{camera:<8}{display:<9}{media:<14}{state}")
+    return lines
+
+
+class Supervisor:
+    """Starts, watches and restarts the configured workers"""
+
+    def __init__(self, settings, config_dir=None):
+        self.settings = settings
+        workers = settings['workers']
+        names = [worker['name'] for worker in workers]
+        if len(set(names)) != len(names):
+            raise ValueError("Worker names in cameras.json must be unique")
+        ports = [worker['port'] for worker in workers if worker.get('port')]
+        if len(set(ports)) != len(ports):
+            raise ValueError("Worker control ports in cameras.json must be unique")
+        metrics_ports = [worker['metrics_port'] for worker in workers if worker.get('metrics_port')]
+        if len(set(metrics_ports)) != len(metrics_ports):
+            raise ValueError("Worker metrics ports in cameras.json must be unique")
+        assignment = assign_cpus(workers)
+        self.workers = [Worker(worker, assignment[worker['name']], settings['restart'], config_dir)
+                        for worker in workers]
+        self.running = False
+
+    def statuses(self):
+        now = time.monotonic()
+        return [worker.status(now) for worker in self.workers]
+
+    def install_signal_handlers(self):
+        def handler(signum, frame):
+            self.running = False
+
+        signal.signal(signal.SIGINT, handler)
+        signal.signal(signal.SIGTERM, handler)
+
+    def run(self):
+        self.install_signal_handlers()
+        now = time.monotonic()
+        for worker in self.workers:
+            worker.start(now)
+
+        self.running = True
+        status_interval = self.settings['status_interval']
+        next_status = now + status_interval if status_interval else None
+        try:
+            while self.running:
+                now = time.monotonic()
+                for worker in self.workers:
+                    worker.check(now)
+                if next_status is not None and now >= next_status:
+                    for line in format_status(self.statuses()):
+                        print(line)
+                    next_status = now + status_interval
+                time.sleep(0.5)
+        finally:
+            print("Stopping workers...")
+            for worker in self.workers:
+                worker.stop()
+        return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run one VISIT worker process per camera")
+    parser.add_argument('--config-dir', help="folder holding cameras.json (default: configs)")
+    parser.add_argument('--status', action='store_true',
+                        help="print the status of already running workers and exit")
+    args = parser.parse_args(argv)
+
+    settings = load_cameras_settings(args.config_dir)
+    if args.status:
+        # Query the workers of a supervisor that is already running
+        for worker in settings['workers']:
+            reply = query_worker(worker['port']) if worker.get('port') else None
+            print(f"{worker['name']}: {json.dumps(reply) if reply else 'no reply'}")
+        return 0
+
+    try:
+        supervisor = Supervisor(settings, args.config_dir)
+    except ValueError as e:
+        print(f"Configuration Error: {e}")
+        return 2
+    return supervisor.run()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+# VISIT Trigger State Machine
+# Developed by Dineshkumar Rajendran
+#
+# Turns the per-frame detection flags into stable media switches. Each state
+# keeps an evidence level that follows its raw flag with a time constant;
+# a state is confirmed once its evidence rises to its enter threshold and
+# released when it falls to its exit threshold. The highest-priority
+# confirmed state picks the media category, and a switch is only made once
+# the current category has played for its minimum dwell time and the new
+# one is out of its cooldown. Only categories that have media can win a
+# switch; states without media (movement gating the face detector, say)
+# still track their evidence but never blank the screen.
+
+import math
+import time
+
+DEFAULT_CATEGORY = 'default'
+
+
+class TriggerStateMachine:
+    """Hysteresis, dwell and cooldown between detection states and media categories"""
+
+    def __init__(self, settings, priority_order, trigger_media, clock=time.monotonic):
+        self.enabled = settings.get('enabled', True)
+        self.response_time = settings.get('response_time', 0.3)
+        self.priority_order = list(priority_order)
+        self.trigger_media = dict(trigger_media)
+        self.clock = clock
+
+        base = {key: settings.get(key, 0.0) for key in ('enter', 'exit', 'min_dwell', 'cooldown')}
+        overrides = settings.get('states', {})
+        self.state_settings = {state: dict(base, **overrides.get(state, {}))
+                               for state in self.priority_order}
+        # Dwell and cooldown of a category come from the state that triggers it
+        self.category_settings = {DEFAULT_CATEGORY: base}
+        for state in reversed(self.priority_order):
+            self.category_settings[self.trigger_media[state]] = self.state_settings[state]
+        self.media_categories = None
+        self.reset()
+
+    def set_media_categories(self, categories):
+        """Restrict switches to the categories that have media (None: all)"""
+        self.media_categories = None if categories is None else set(categories)
+
+    def reset(self):
+        self.evidence = {state: 0.0 for state in self.priority_order}
+        self.confirmed = {state: False for state in self.priority_order}
+        self.active_category = DEFAULT_CATEGORY
+        self.active_since = None
+        self.cooldown_until = {}
+        self._last_update = None
+        self._raw = {}
+        self._suppressed = None
+        self.raw_transitions = 0
+        self.confirmed_transitions = 0
+        self.switches = 0
+        self.suppressed_by_dwell = 0
+        self.suppressed_by_cooldown = 0
+
+    def _update_evidence(self, states, now):
+        dt = 0.0 if self._last_update is None else now - self._last_update
+        self._last_update = now
+        if self.response_time <= 0:
+            alpha = 1.0
+        else:
+            alpha = 1.0 - math.exp(-dt / self.response_time)
+
+        for state in self.priority_order:
+            raw = bool(states.get(state))
+            if raw != self._raw.get(state, False):
+                self.raw_transitions += 1
+            self._raw[state] = raw
+
+            if not self.enabled:
+                self.confirmed[state] = raw
+                continue
+            self.evidence[state] += alpha * (float(raw) - self.evidence[state])
+            settings = self.state_settings[state]
+            if not self.confirmed[state] and self.evidence[state] >= settings['enter']:
+                self.confirmed[state] = True
+                self.confirmed_transitions += 1
+            elif self.confirmed[state] and self.evidence[state] <= settings['exit']:
+                self.confirmed[state] = False
+                self.confirmed_transitions += 1
+
+    def candidate(self):
+        """Media category of the highest-priority confirmed state"""
+        for state in self.priority_order:
+            if not self.confirmed[state]:
+                continue
+            category = self.trigger_media[state]
+            if self.media_categories is None or category in self.media_categories:
+                return category
+        return DEFAULT_CATEGORY
+
+    def update(self, states, now=None):
+        """Feed one frame of detection flags; returns the media category to play"""
+        now = self.clock() if now is None else now
+        self._update_evidence(states, now)
+        if self.active_since is None:
+            self.active_since = now
+
+        candidate = self.candidate()
+        if candidate == self.active_category:
+            self._suppressed = None
+            return self.active_category
+
+        if self.enabled:
+            reason = None
+            if now - self.active_since < self.category_settings[self.active_category]['min_dwell']:
+                reason = 'dwell'
+            elif now < self.cooldown_until.get(candidate, 0.0):
+                reason = 'cooldown'
+            if reason is not None:
+                # Count each held-back switch once, not once per frame
+                if self._suppressed != (candidate, reason):
+                    self._suppressed = (candidate, reason)
+                    if reason == 'dwell':
+                        self.suppressed_by_dwell += 1
+                    else:
+                        self.suppressed_by_cooldown += 1
+                return self.active_category
+
+        self.cooldown_until[self.active_category] = now + self.category_settings[self.active_category]['cooldown']
+        self.active_category = candidate
+        self.active_since = now
+        self.switches += 1
+        self._suppressed = None
+        return candidate
+
+    def get_stats(self):
+        return {
+            'active_category': self.active_category,
+            'raw_transitions': self.raw_transitions,
+            'confirmed_transitions': self.confirmed_transitions,
+            'switches': self.switches,
+            'suppressed_by_dwell': self.suppressed_by_dwell,
+            'suppressed_by_cooldown': self.suppressed_by_cooldown
+        }
@@ -0,0 +1,69 @@
+# VISIT UI Rendering Helpers
+# Developed by Dineshkumar Rajendran
+#
+# Hands frames from the worker threads to the Tk main thread. Workers only
+# ever write into a single-slot buffer; a render pump scheduled with
+# root.after reads the newest frame and updates one reused PhotoImage.
+
+import threading
+
+from startup import LazyModule
+
+cv2 = LazyModule('cv2')
+Image = LazyModule('PIL.Image')
+ImageTk = LazyModule('PIL.ImageTk')
+
+
+class FrameSlot:
+    """Single-slot buffer: writers overwrite, the reader takes the newest value"""
+
+    def __init__(self):
+        self._value = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.overwritten = 0
+
+    def put(self, value):
+        with self._lock:
+            if self._value is not None:
+                self.overwritten += 1
+            self._value = value
+            self.written += 1
+
+    def take(self):
+        """Return the newest value and empty the slot, or None if nothing is new"""
+        with self._lock:
+            value = self._value
+            self._value = None
+            return value
+
+
+class CameraView:
+    """Shows RGB frames in a Tk label through a single reused PhotoImage
+
+    Frames that already have the display size are shown without resizing, and
+    after the first frame the PhotoImage pixels are updated in place instead
+    of creating a new image.
+    """
+
+    def __init__(self, label, width=640, height=480):
+        self.label = label
+        self.width = width
+        self.height = height
+        self.photo = None
+        self.frames_shown = 0
+
+    def show(self, rgb_frame):
+        """Display an RGB frame; must be called on the Tk main thread"""
+        height, width = rgb_frame.shape[:2]
+        if (width, height) != (self.width, self.height):
+            rgb_frame = cv2.resize(rgb_frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+        pil_image = Image.fromarray(rgb_frame)
+
+        if self.photo is None:
+            self.photo = ImageTk.PhotoImage(pil_image)
+            self.label.configure(image=self.photo)
+            self.label.image = self.photo
+        else:
+            self.photo.paste(pil_image)
+        self.frames_shown += 1
@@ -0,0 +1,340 @@
+# VISIT Video Playback
+# Developed by Dineshkumar Rajendran
+#
+# Plays the trigger videos through cv2.VideoCapture. Every clip gets its own
+# decoder thread that fills a bounded ring buffer of display-ready frames,
+# and frames are handed out according to the clip's own FPS. Decoders for
+# every configured clip are opened and pre-rolled ahead of time (the likely
+# next triggers first when memory is short), so switching categories shows a
+# frame without waiting for a file open or seek.
+
+import threading
+import time
+from collections import Counter, deque
+
+from startup import LazyModule
+from media_cache import fit_to_display
+
+cv2 = LazyModule('cv2')
+
+
+class VideoDecoder:
+    """Decodes one clip on a dedicated thread into a bounded frame buffer"""
+
+    def __init__(self, path, display_size, buffer_frames=8, preroll_frames=2, loop=True, fps=None,
+                 log=print):
+        self.path = path
+        self.log = log
+        self.display_size = tuple(display_size)
+        self.buffer_frames = max(1, buffer_frames)
+        self.preroll_frames = max(1, min(preroll_frames, self.buffer_frames))
+        self.capacity = self.preroll_frames
+        self.loop = loop
+        # Known frame rate (from the media manifest) skips probing the file
+        self.fps = fps or 0.0
+        self.frames = deque()
+        # The clip's first frames, handed out again after a rewind
+        self.head = []
+        self.finished = False
+        self.decoded = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._rewind = False
+        self._resume_at = 0
+        self._thread = None
+        self._capture = None
+
+    def start(self):
+        """Open the clip and start decoding up to the pre-roll depth"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._decode_loop, name='visit-video-decoder', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(1.0)
+        self._thread = None
+
+    def activate(self):
+        """Let the buffer grow to its full depth for playback"""
+        with self._cond:
+            self.capacity = self.buffer_frames
+            self._cond.notify_all()
+
+    def rewind(self):
+        """Go back to the first frame and only keep a pre-roll worth of frames
+
+        The first frames are kept from the first pass, so the clip is ready
+        again at once and the decoder continues after them.
+        """
+        with self._cond:
+            self.capacity = self.preroll_frames
+            self.frames = deque(self.head)
+            self._resume_at = len(self.frames)
+            self.finished = False
+            self._rewind = True
+            self._cond.notify_all()
+
+    @property
+    def is_ready(self):
+        return len(self.frames) > 0
+
+    def pop_frame(self):
+        """Take the next decoded frame, or None if the decoder is behind"""
+        with self._cond:
+            if not self.frames:
+                return None
+            frame = self.frames.popleft()
+            self._cond.notify_all()
+            return frame
+
+    def _open(self):
+        if self._capture is not None:
+            self._capture.release()
+        self._capture = cv2.VideoCapture(self.path)
+        if not self._capture.isOpened():
+            raise IOError(f"Cannot open video {self.path}")
+        if not self.fps:
+            fps = self._capture.get(cv2.CAP_PROP_FPS)
+            self.fps = fps if fps and fps > 0 else 25.0
+
+    def _decode_loop(self):
+        try:
+            self._open()
+        except Exception as e:
+            self.log(f"Video decoder error: {e}")
+            self.finished = True
+            self._running = False
+            return
+
+        position = 0
+        while True:
+            with self._cond:
+                while self._running and not self._rewind and len(self.frames) >= self.capacity:
+                    self._cond.wait()
+                if not self._running:
+                    break
+                rewound = self._rewind
+                self._rewind = False
+                skip = self._resume_at
+            if rewound:
+                # Continue after the frames rewind() put back in the buffer;
+                # grabbing them is more exact than seeking there
+                self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                for _ in range(skip):
+                    self._capture.grab()
+                position = skip
+
+            ret, frame = self._capture.read()
+            if not ret:
+                if self.loop and self.decoded > 0:
+                    self._capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    position = 0
+                    continue
+                with self._cond:
+                    self.finished = True
+                    while self._running and not self._rewind:
+                        self._cond.wait()
+                continue
+
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            rgb_frame = fit_to_display(rgb_frame, *self.display_size)
+            self.decoded += 1
+            with self._cond:
+                if not self._rewind:
+                    self.frames.append(rgb_frame)
+                    if position == len(self.head) < self.preroll_frames:
+                        self.head.append(rgb_frame)
+            position += 1
+
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+
+
+class VideoPlaybackEngine:
+    """Plays the active category's clip and keeps the other clips pre-rolled"""
+
+    def __init__(self, display_size, buffer_frames=8, preroll_frames=2, preroll_mb=256,
+                 clock=time.perf_counter, manifest=None, log=print):
+        self.display_size = tuple(display_size)
+        self.manifest = manifest
+        self.log = log
+        self.buffer_frames = buffer_frames
+        self.preroll_frames = preroll_frames
+        self.preroll_bytes = int(preroll_mb * 1024 * 1024)
+        self.clock = clock
+        self.decoders = {}
+        self.active_path = None
+        self.active_category = None
+        self.last_frame = None
+        self.transitions = Counter()
+        self.prerendered = {}
+        self._lock = threading.Lock()
+        self._started_at = None
+        self._frame_index = 0
+        self.switches = 0
+        self.instant_switches = 0
+        self.late_frames = 0
+        self.dropped_frames = 0
+
+    def _decoder(self, path):
+        decoder = self.decoders.get(path)
+        if decoder is None:
+            clip = self.prerendered.get(path)
+            if clip is not None:
+                # Imported here so the frame store stays optional
+                from frame_store import MemmapClipPlayer
+                decoder = MemmapClipPlayer(clip)
+            elif self.manifest is not None:
+                # Decode the normalized copy, already at display size and frame rate
+                info = self.manifest.info(path) or {}
+                decoder = VideoDecoder(self.manifest.resolve(path), self.display_size,
+                                       self.buffer_frames, self.preroll_frames, fps=info.get('fps'),
+                                       log=self.log)
+            else:
+                decoder = VideoDecoder(path, self.display_size, self.buffer_frames, self.preroll_frames,
+                                       log=self.log)
+            decoder.start()
+            self.decoders[path] = decoder
+        return decoder
+
+    def add_prerendered(self, path, clip):
+        """Play a clip from its pre-rendered frames from the next time it is opened"""
+        with self._lock:
+            self.prerendered[path] = clip
+            decoder = self.decoders.get(path)
+            if decoder is not None and path != self.active_path:
+                self.decoders.pop(path).stop()
+                self._decoder(path)
+
+    def play(self, category, path):
+        """Switch to the clip of a media category; None stops video playback"""
+        with self._lock:
+            if category == self.active_category and path == self.active_path:
+                return
+            if self.active_category is not None:
+                self.transitions[(self.active_category, category)] += 1
+
+            previous = self.decoders.get(self.active_path)
+            if previous is not None and self.active_path != path:
+                previous.rewind()
+
+            self.active_category = category
+            self.active_path = path
+            self.last_frame = None
+            if path is None:
+                return
+
+            decoder = self._decoder(path)
+            decoder.activate()
+            self.switches += 1
+            if decoder.is_ready:
+                self.instant_switches += 1
+            self._started_at = None
+            self._frame_index = 0
+
+    def likely_next(self, category, candidates):
+        """Other categories, most often switched to from the given one first
+
+        Categories never switched to keep their configuration order.
+        """
+        ranked = sorted(candidates, key=lambda other: -self.transitions[(category, other)])
+        return [other for other in ranked if other != category]
+
+    def preroll_cost(self, path):
+        """Bytes of decoded frames a pre-rolled clip holds"""
+        if path in self.prerendered:
+            # Frames are pages of the memory-mapped file
+            return 0
+        width, height = self.display_size
+        return self.preroll_frames * width * height * 3
+
+    def prepare(self, media_paths, always=('default',)):
+        """Keep every clip pre-rolled that fits the budget, close the rest
+
+        media_paths maps media categories to their video path (or None). When
+        not every clip fits in preroll_mb, the always categories and then the
+        likely next ones are kept.
+        """
+        with self._lock:
+            candidates = [category for category, path in media_paths.items() if path]
+            wanted = [category for category in always if media_paths.get(category)]
+            for category in self.likely_next(self.active_category, candidates):
+                if category not in wanted:
+                    wanted.append(category)
+            wanted_paths = set()
+            if self.active_path:
+                wanted_paths.add(self.active_path)
+            budget = self.preroll_bytes
+            for category in wanted:
+                path = media_paths[category]
+                if path in wanted_paths:
+                    continue
+                cost = self.preroll_cost(path)
+                if category in always or cost <= budget:
+                    wanted_paths.add(path)
+                    budget -= cost
+
+            for path in wanted_paths:
+                self._decoder(path)
+            for path in [path for path in self.decoders if path not in wanted_paths]:
+                self.decoders.pop(path).stop()
+
+    def frame_at(self, now=None):
+        """Frame of the active clip for presentation time now, paced to the clip FPS
+
+        Frames the consumer was too slow to show are dropped so the clip stays
+        in real time; the previous frame is repeated when the decoder is behind.
+        """
+        now = self.clock() if now is None else now
+        # Held throughout so a switch in play() cannot pair the new clip's
+        # pacing with the old decoder; pop_frame never blocks
+        with self._lock:
+            decoder = self.decoders.get(self.active_path)
+            if decoder is None:
+                return None
+
+            if self._started_at is None:
+                frame = decoder.pop_frame()
+                if frame is None:
+                    return self.last_frame
+                self._started_at = now
+                self._frame_index = 0
+                self.last_frame = frame
+                return frame
+
+            due_index = int((now - self._started_at) * decoder.fps)
+            while self._frame_index < due_index:
+                frame = decoder.pop_frame()
+                if frame is None:
+                    self.late_frames += 1
+                    break
+                if self._frame_index < due_index - 1:
+                    self.dropped_frames += 1
+                self._frame_index += 1
+                self.last_frame = frame
+            return self.last_frame
+
+    def stop(self):
+        with self._lock:
+            for decoder in self.decoders.values():
+                decoder.stop()
+            self.decoders.clear()
+            self.active_path = None
+            self.active_category = None
+            self.last_frame = None
+
+    def get_stats(self):
+        return {
+            'decoders': len(self.decoders),
+            'switches': self.switches,
+            'instant_switches': self.instant_switches,
+            'late_frames': self.late_frames,
+            'dropped_frames': self.dropped_frames
+        }
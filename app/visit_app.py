@@ -2,195 +2,72 @@
 # Developed by Dineshkumar Rajendran
 # Version 1.0
 
-import cv2
-import numpy as np
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import pygame
-import mediapipe as mp
+import os
+import queue
 import threading
 import time
-import os
-import json
-from PIL import Image, ImageTk
-import hashlib
+import traceback
 from datetime import datetime
+from startup import LazyModule, StartupTimer
+from frame_bundle import FrameBundle
+from settings import DETECTION_SETTINGS_FILE, save_settings
+from visit_engine import VisitEngine
+import ui_render
+from ui_render import FrameSlot, CameraView
 
-class VisitApp:
+# Heavy imports are deferred until first use (or the warm-up thread)
+cv2 = LazyModule('cv2')
+
+class VisitApp(VisitEngine):
     def __init__(self):
-        self.root = tk.Tk()
-        self.root.title("VISIT - Interactive Museum App v1.0 by Dineshkumar Rajendran")
-        self.root.geometry("1200x800")
+        startup_timer = StartupTimer()
+        # Callbacks from background threads, run by the render pump; Tk is
+        # only ever touched from the main thread
+        self.ui_calls = queue.SimpleQueue()
+        self.info_text = None
+        
+        with startup_timer.phase('window'):
+            self.root = tk.Tk()
+            self.root.title("VISIT - Interactive Museum App v1.0 by Dineshkumar Rajendran")
+            self.root.geometry("1200x800")
         
         # License verification
-        if not self.verify_license():
-            return
-            
-        # Initialize MediaPipe
-        self.mp_face_detection = mp.solutions.face_detection
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.mp_hands = mp.solutions.hands
-        self.mp_pose = mp.solutions.pose
-        self.mp_drawing = mp.solutions.drawing_utils
-        
-        # Initialize detectors
-        self.face_detection = self.mp_face_detection.FaceDetection(min_detection_confidence=0.7)
-        self.face_mesh = self.mp_face_mesh.FaceMesh(min_detection_confidence=0.5, min_tracking_confidence=0.5)
-        self.hands = self.mp_hands.Hands(min_detection_confidence=0.7, min_tracking_confidence=0.5)
-        self.pose = self.mp_pose.Pose(min_detection_confidence=0.7, min_tracking_confidence=0.5)
-        
-        # Initialize pygame for audio
-        pygame.mixer.init()
-        
-        # Application state
-        self.camera = None
-        self.is_running = False
-        self.is_fullscreen = False
-        self.current_frame = None
-        
-        # Detection states
-        self.detection_states = {
-            'face': False,
-            'eye_movement': False,
-            'lip_movement': False,
-            'face_approaching': False,
-            'face_receding': False,
-            'hands': False,
-            'pose': False,
-            'movement': False
-        }
-        
-        # Media storage
-        self.media_config = {
-            'default': {
-                'image': None,
-                'video': None,
-                'audio': None
-            },
-            'face_detection': {
-                'image': None,
-                'video': None,
-                'audio': None
-            },
-            'eye_movement': {
-                'image': None,
-                'video': None,
-                'audio': None
-            },
-            'lip_movement': {
-                'image': None,
-                'video': None,
-                'audio': None
-            },
-            'face_approaching': {
-                'image': None,
-                'video': None,
-                'audio': None
-            },
-            'face_receding': {
-                'image': None,
-                'video': None,
-                'audio': None
-            },
-            'hands_detection': {
-                'image': None,
-                'video': None,
-                'audio': None
-            },
-            'pose_detection': {
-                'image': None,
-                'video': None,
-                'audio': None
-            },
-            'movement_detection': {
-                'image': None,
-                'video': None,
-                'audio': None
-            }
-        }
-        
-        # Previous frame for movement detection
-        self.prev_frame = None
-        self.face_distance_history = []
-        
-        self.setup_ui()
-        self.bind_shortcuts()
+        with startup_timer.phase('license'):
+            if not self.verify_license():
+                return
+        
+        # Settings, detectors, pipeline and media playback
+        VisitEngine.__init__(self, startup_timer)
+        
+        # Newest frame for the testing view, handed to the Tk main thread
+        self.display_slot = FrameSlot()
+        self.preview_frame = None
+        self.calibration_window = None
+        self.camera_display_timer = self.metrics.histogram(
+            'visit_ui_camera_display_seconds', "Time to draw one frame in the Testing Mode view")
+        
+        with self.startup_timer.phase('ui'):
+            self.setup_ui()
+            self.bind_shortcuts()
         
     def verify_license(self):
         """Verify the license file"""
-        try:
-            if not os.path.exists('license.key'):
-                messagebox.showerror("License Error", "License file not found. Please contact the developer.")
-                self.root.destroy()
-                return False
-                
-            with open('license.key', 'r') as f:
-                license_content = f.read().strip()
-                
-            # Try to parse as JSON
-            try:
-                license_data = json.loads(license_content)
-            except json.JSONDecodeError:
-                messagebox.showerror("License Error", "Invalid license file format. Please contact the developer.")
-                self.root.destroy()
-                return False
-                
-            # Verify license validity
-            if not self.validate_license(license_data):
-                messagebox.showerror("License Error", "Invalid license. Please contact the developer.")
-                self.root.destroy()
-                return False
-                
-            return True
-        except Exception as e:
-            messagebox.showerror("License Error", f"License verification failed: {str(e)}")
+        error = self.license_error()
+        if error is not None:
+            messagebox.showerror("License Error", error)
             self.root.destroy()
             return False
-    
-    def validate_license(self, license_data):
-        """Validate license data"""
-        try:
-            # Ensure license_data is a dictionary
-            if not isinstance(license_data, dict):
-                print(f"License data is not a dictionary: {type(license_data)}")
-                return False
-                
-            # Check required fields
-            required_fields = ['museum_id', 'expiry', 'hash']
-            for field in required_fields:
-                if field not in license_data:
-                    print(f"Missing required field: {field}")
-                    return False
-            
-            # Check if license has expired
-            expiry_date = datetime.strptime(license_data['expiry'], '%Y-%m-%d')
-            if datetime.now() > expiry_date:
-                print("License has expired")
-                return False
-                
-            # Verify hash using the EXACT same algorithm as generator
-            hash_input = f"{license_data['museum_id']}{license_data['expiry']}VISIT_SECRET_KEY"
-            expected_hash = hashlib.sha256(hash_input.encode()).hexdigest()
-            
-            # Debug information (can be removed in production)
-            print(f"License validation debug:")
-            print(f"Museum ID: {license_data['museum_id']}")
-            print(f"Expiry: {license_data['expiry']}")
-            print(f"Hash input: {hash_input}")
-            print(f"Expected hash: {expected_hash}")
-            print(f"License hash: {license_data['hash']}")
-            print(f"Hash match: {expected_hash == license_data['hash']}")
-            
-            return expected_hash == license_data['hash']
-        except Exception as e:
-            print(f"License validation error: {e}")
-            return False
+        return True
     
     def setup_ui(self):
         """Setup the user interface"""
         # Main notebook for tabs
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
+        self.current_tab = 0
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
         
         # Dashboard tab
         self.dashboard_frame = ttk.Frame(self.notebook)
@@ -207,7 +84,11 @@ class VisitApp:
         self.setup_dashboard()
         self.setup_media_config()
         self.setup_testing_mode()
-        
+    
+    def on_tab_changed(self, event=None):
+        """Remember the selected tab so the render pump never has to query Tk"""
+        self.current_tab = self.notebook.index(self.notebook.select())
+    
     def setup_dashboard(self):
         """Setup dashboard controls"""
         # Camera controls
@@ -232,6 +113,19 @@ class VisitApp:
             self.status_labels[detection_type] = ttk.Label(frame, text="OFF", foreground='red')
             self.status_labels[detection_type].pack(side='right')
         
+        # Latency per stage, from the metrics registry
+        metrics_frame = ttk.LabelFrame(self.dashboard_frame, text="Performance (ms)")
+        metrics_frame.pack(fill='x', padx=10, pady=5)
+        
+        columns = ('count', 'mean', 'p50', 'p95', 'p99')
+        self.metrics_table = ttk.Treeview(metrics_frame, columns=columns, height=6)
+        self.metrics_table.heading('#0', text="Stage")
+        self.metrics_table.column('#0', width=260)
+        for column in columns:
+            self.metrics_table.heading(column, text=column)
+            self.metrics_table.column(column, width=80, anchor='e')
+        self.metrics_table.pack(fill='x', padx=5, pady=2)
+        
         # System info
         info_frame = ttk.LabelFrame(self.dashboard_frame, text="System Information")
         info_frame.pack(fill='both', expand=True, padx=10, pady=5)
@@ -245,7 +139,26 @@ class VisitApp:
         
         self.log_info("VISIT Application initialized successfully")
         self.log_info("Developed by Dineshkumar Rajendran")
-        
+    
+    def refresh_metrics_panel(self):
+        """Redraw the latency table; reschedules itself on the Tk main thread"""
+        if self.current_tab == 0:  # Dashboard tab
+            rows = {}
+            for row in self.metrics.snapshot():
+                stage = row['name'][len('visit_'):].rsplit('_seconds', 1)[0].replace('_', ' ')
+                stage = ' '.join([stage] + [str(value) for value in row['labels'].values()])
+                timings = ['-' if row[key] is None else f"{row[key] * 1000:.1f}"
+                           for key in ('mean', 'p50', 'p95', 'p99')]
+                rows[stage] = [row['count']] + timings
+            for stage, values in rows.items():
+                if self.metrics_table.exists(stage):
+                    self.metrics_table.item(stage, values=values)
+                else:
+                    self.metrics_table.insert('', 'end', iid=stage, text=stage, values=values)
+        
+        interval = self.display_settings['metrics']['refresh_interval']
+        self.root.after(int(max(0.5, interval) * 1000), self.refresh_metrics_panel)
+    
     def setup_media_config(self):
         """Setup media configuration interface"""
         # Create scrollable frame
@@ -296,12 +209,20 @@ class VisitApp:
         
         ttk.Button(config_frame, text="Save Configuration", command=self.save_config).pack(side='left', padx=5)
         ttk.Button(config_frame, text="Load Configuration", command=self.load_config).pack(side='left', padx=5)
-        
+    
     def setup_testing_mode(self):
         """Setup testing mode interface"""
         # Camera display
         self.camera_label = ttk.Label(self.testing_frame)
         self.camera_label.pack(padx=10, pady=10)
+        self.camera_view = CameraView(self.camera_label, 640, 480)
+        
+        # Preview of the media currently selected by the detections
+        media_preview = ttk.LabelFrame(self.testing_frame, text="Active Media")
+        media_preview.pack(padx=10, pady=5)
+        self.media_label = ttk.Label(media_preview)
+        self.media_label.pack(padx=5, pady=5)
+        self.media_view = CameraView(self.media_label, 320, 180)
         
         # Testing controls
         test_controls = ttk.Frame(self.testing_frame)
@@ -310,14 +231,14 @@ class VisitApp:
         ttk.Button(test_controls, text="Test All Detections", command=self.test_all_detections).pack(side='left', padx=5)
         ttk.Button(test_controls, text="Calibrate Sensitivity", command=self.calibrate_sensitivity).pack(side='left', padx=5)
         ttk.Button(test_controls, text="Reset Detections", command=self.reset_detections).pack(side='left', padx=5)
-        
+    
     def bind_shortcuts(self):
         """Bind keyboard shortcuts"""
         self.root.bind('<F5>', lambda e: self.reset_application())
         self.root.bind('<F6>', lambda e: self.refresh_camera())
         self.root.bind('<F11>', lambda e: self.toggle_fullscreen())
         self.root.bind('<Escape>', lambda e: self.exit_fullscreen())
-        
+    
     def browse_media(self, detection_type, media_type):
         """Browse and select media files"""
         if media_type == 'image':
@@ -331,209 +252,93 @@ class VisitApp:
         if filename:
             self.media_config[detection_type][media_type] = filename
             self.log_info(f"Selected {media_type} for {detection_type}: {filename}")
+            self.preload_media()
+            if self.is_running:
+                self.update_active_detectors()
     
-    def start_camera(self):
-        """Start camera capture"""
-        try:
-            self.camera = cv2.VideoCapture(0)
-            if not self.camera.isOpened():
-                raise Exception("Cannot open camera")
-                
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    def present_frame(self, bundle, detection_states, behind_schedule=False):
+        """Presentation stage: draw the testing view and drive media playback"""
+        # Hand the frame to the render pump, skipped while behind schedule
+        if not behind_schedule:
+            self.display_slot.put((bundle, detection_states))
             
-            self.is_running = True
-            self.camera_thread = threading.Thread(target=self.camera_loop)
-            self.camera_thread.daemon = True
-            self.camera_thread.start()
-            
-            self.log_info("Camera started successfully")
-            
-        except Exception as e:
-            messagebox.showerror("Camera Error", f"Failed to start camera: {str(e)}")
-    
-    def stop_camera(self):
-        """Stop camera capture"""
-        self.is_running = False
-        if self.camera:
-            self.camera.release()
-            self.camera = None
-        self.log_info("Camera stopped")
-    
-    def camera_loop(self):
-        """Main camera processing loop"""
-        while self.is_running:
-            if self.camera is None:
-                break
-                
-            ret, frame = self.camera.read()
-            if not ret:
-                continue
-                
-            # Flip frame horizontally for mirror effect
-            frame = cv2.flip(frame, 1)
-            self.current_frame = frame.copy()
-            
-            # Process detections
-            self.process_detections(frame)
-            
-            # Update display in testing mode
-            if self.notebook.index(self.notebook.select()) == 2:  # Testing tab
-                self.update_camera_display(frame)
-                
-            # Handle media playback based on detections
-            self.handle_media_playback()
-            
-            time.sleep(0.03)  # ~30 FPS
-    
-    def process_detections(self, frame):
-        """Process all types of detections"""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        # Reset detection states
-        for key in self.detection_states:
-            self.detection_states[key] = False
-        
-        # Face detection
-        face_results = self.face_detection.process(rgb_frame)
-        if face_results.detections:
-            self.detection_states['face'] = True
-            
-            # Face distance calculation for approach/recede detection
-            detection = face_results.detections[0]
-            bbox = detection.location_data.relative_bounding_box
-            face_area = bbox.width * bbox.height
-            
-            self.face_distance_history.append(face_area)
-            if len(self.face_distance_history) > 10:
-                self.face_distance_history.pop(0)
-                
-            if len(self.face_distance_history) >= 5:
-                recent_avg = sum(self.face_distance_history[-3:]) / 3
-                older_avg = sum(self.face_distance_history[-6:-3]) / 3
-                
-                if recent_avg > older_avg * 1.1:
-                    self.detection_states['face_approaching'] = True
-                elif recent_avg < older_avg * 0.9:
-                    self.detection_states['face_receding'] = True
-        
-        # Face mesh for eye and lip movement
-        mesh_results = self.face_mesh.process(rgb_frame)
-        if mesh_results.multi_face_landmarks:
-            # Simplified eye/lip movement detection
-            landmarks = mesh_results.multi_face_landmarks[0]
-            
-            # Eye landmarks (simplified)
-            left_eye = landmarks.landmark[33]
-            right_eye = landmarks.landmark[263]
-            eye_distance = abs(left_eye.x - right_eye.x)
-            
-            if hasattr(self, 'prev_eye_distance'):
-                if abs(eye_distance - self.prev_eye_distance) > 0.001:
-                    self.detection_states['eye_movement'] = True
-            self.prev_eye_distance = eye_distance
-            
-            # Lip landmarks (simplified)
-            upper_lip = landmarks.landmark[13]
-            lower_lip = landmarks.landmark[14]
-            lip_distance = abs(upper_lip.y - lower_lip.y)
-            
-            if hasattr(self, 'prev_lip_distance'):
-                if abs(lip_distance - self.prev_lip_distance) > 0.001:
-                    self.detection_states['lip_movement'] = True
-            self.prev_lip_distance = lip_distance
-        
-        # Hand detection
-        hand_results = self.hands.process(rgb_frame)
-        if hand_results.multi_hand_landmarks:
-            self.detection_states['hands'] = True
-        
-        # Pose detection
-        pose_results = self.pose.process(rgb_frame)
-        if pose_results.pose_landmarks:
-            self.detection_states['pose'] = True
-        
-        # Movement detection
-        if self.prev_frame is not None:
-            diff = cv2.absdiff(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), 
-                              cv2.cvtColor(self.prev_frame, cv2.COLOR_BGR2GRAY))
-            movement_threshold = 30
-            movement_pixels = np.sum(diff > movement_threshold)
-            
-            if movement_pixels > 1000:  # Adjust threshold as needed
-                self.detection_states['movement'] = True
-        
-        self.prev_frame = frame.copy()
-        
-        # Update status display
-        self.update_detection_status()
+        # Handle media playback based on detections
+        VisitEngine.present_frame(self, bundle, detection_states, behind_schedule)
     
     def update_detection_status(self):
-        """Update detection status in the UI"""
-        for detection_type, is_active in self.detection_states.items():
+        """Publish detection states; the labels follow on the next display refresh"""
+        VisitEngine.update_detection_status(self)
+        if threading.current_thread() is threading.main_thread():
+            self.apply_status_changes()
+    
+    def apply_status_changes(self):
+        """Reconfigure only the status labels whose state changed; main thread only"""
+        for detection_type, is_active in self.state_model.drain_changes().items():
             if detection_type in self.status_labels:
                 color = 'green' if is_active else 'red'
                 text = 'ON' if is_active else 'OFF'
                 self.status_labels[detection_type].config(text=text, foreground=color)
     
-    def update_camera_display(self, frame):
+    def render_pump(self):
+        """Show the newest frame in testing mode; runs on the Tk main thread"""
+        self.run_ui_calls()
+        self.apply_status_changes()
+        
+        item = self.display_slot.take()
+        if item is not None and self.current_tab == 2:  # Testing tab
+            bundle, detection_states = item
+            start = time.perf_counter()
+            self.update_camera_display(bundle, detection_states)
+            self.camera_display_timer.observe(time.perf_counter() - start)
+        
+        if self.presentation.is_running:
+            # The presentation thread consumes the video; only preview what it shows
+            self.media_slot.take()
+            shown = self.presentation.last_frame
+            if shown is not None and shown is not self.preview_frame:
+                self.preview_frame = shown
+                self.media_view.show(shown)
+        else:
+            if self.is_fullscreen:
+                # Closed from its own window (Escape)
+                self.is_fullscreen = False
+                self.log_info("Exited fullscreen mode")
+            
+            # Video frames are paced to the clip FPS; still images change with the category
+            video_frame = self.video_engine.frame_at()
+            if video_frame is not None:
+                self.media_view.show(video_frame)
+            
+            media_item = self.media_slot.take()
+            if media_item is not None and video_frame is None:
+                detection_type, image = media_item
+                if image is not None:
+                    self.media_view.show(image)
+        
+        refresh_fps = max(1, self.display_settings['ui_refresh_fps'])
+        self.root.after(int(1000 / refresh_fps), self.render_pump)
+    
+    def update_camera_display(self, frame, detection_states=None):
         """Update camera display in testing mode"""
-        # Draw detection overlays
-        if self.detection_states['face']:
-            cv2.putText(frame, "FACE DETECTED", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-        
-        if self.detection_states['hands']:
-            cv2.putText(frame, "HANDS DETECTED", (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-        
-        if self.detection_states['movement']:
-            cv2.putText(frame, "MOVEMENT DETECTED", (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        if detection_states is None:
+            detection_states = self.detection_states
         
-        # Convert to PhotoImage and display
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(rgb_frame)
-        pil_image = pil_image.resize((640, 480))
-        photo = ImageTk.PhotoImage(pil_image)
+        # Overlays are drawn on the shared RGB image; the display is its last consumer
+        bundle = frame if isinstance(frame, FrameBundle) else FrameBundle(frame)
+        rgb_frame = bundle.rgb
+            
+        # Draw detection overlays
+        if detection_states['face']:
+            cv2.putText(rgb_frame, "FACE DETECTED", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
         
-        self.camera_label.configure(image=photo)
-        self.camera_label.image = photo
-    
-    def handle_media_playback(self):
-        """Handle media playback based on current detections"""
-        # Determine which media to play based on priority
-        active_detection = None
-        
-        # Priority order (highest to lowest)
-        priority_order = ['face_approaching', 'face_receding', 'lip_movement', 'eye_movement', 
-                         'hands', 'pose', 'movement', 'face']
-        
-        for detection in priority_order:
-            if self.detection_states[detection]:
-                active_detection = f"{detection}_detection" if detection != 'face' else 'face_detection'
-                break
-        
-        # If no detection, use default
-        if not active_detection:
-            active_detection = 'default'
-        
-        # Play appropriate media
-        self.play_media(active_detection)
-    
-    def play_media(self, detection_type):
-        """Play media for specific detection type"""
-        media = self.media_config.get(detection_type, {})
+        if detection_states['hands']:
+            cv2.putText(rgb_frame, "HANDS DETECTED", (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
         
-        # Handle audio
-        audio_file = media.get('audio')
-        if audio_file and os.path.exists(audio_file):
-            try:
-                if not pygame.mixer.get_busy():
-                    pygame.mixer.music.load(audio_file)
-                    pygame.mixer.music.play()
-            except Exception as e:
-                self.log_info(f"Audio playback error: {str(e)}")
+        if detection_states['movement']:
+            cv2.putText(rgb_frame, "MOVEMENT DETECTED", (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
         
-        # Handle video/image display would be implemented here
-        # For full implementation, you'd need additional video display logic
+        # Reuse the PhotoImage; frames already at 640x480 are not resized
+        self.camera_view.show(rgb_frame)
     
     def toggle_testing_mode(self):
         """Toggle to testing mode"""
@@ -541,40 +346,6 @@ class VisitApp:
         if not self.is_running:
             self.start_camera()
     
-    def toggle_fullscreen(self):
-        """Toggle fullscreen mode"""
-        self.is_fullscreen = not self.is_fullscreen
-        self.root.attributes('-fullscreen', self.is_fullscreen)
-        
-        if self.is_fullscreen:
-            self.log_info("Entered fullscreen mode")
-        else:
-            self.log_info("Exited fullscreen mode")
-    
-    def exit_fullscreen(self):
-        """Exit fullscreen mode"""
-        self.is_fullscreen = False
-        self.root.attributes('-fullscreen', False)
-        self.log_info("Exited fullscreen mode")
-    
-    def reset_application(self):
-        """Reset application state"""
-        self.stop_camera()
-        for key in self.detection_states:
-            self.detection_states[key] = False
-        self.update_detection_status()
-        pygame.mixer.stop()
-        self.log_info("Application reset completed")
-    
-    def refresh_camera(self):
-        """Refresh camera connection"""
-        was_running = self.is_running
-        self.stop_camera()
-        time.sleep(1)
-        if was_running:
-            self.start_camera()
-        self.log_info("Camera refreshed")
-    
     def test_all_detections(self):
         """Test all detection systems"""
         self.log_info("Testing all detection systems...")
@@ -595,15 +366,92 @@ class VisitApp:
         self.log_info("Detection test completed")
     
     def calibrate_sensitivity(self):
-        """Calibrate detection sensitivity"""
-        messagebox.showinfo("Calibration", "Sensitivity calibration feature will be implemented based on specific requirements.")
+        """Record calibration clips and tune the detection thresholds on them"""
+        import calibration
+        
+        if self.calibration_window is not None:
+            self.calibration_window.lift()
+            return
+        window = tk.Toplevel(self.root)
+        window.title("Calibrate Sensitivity")
+        self.calibration_window = window
+        
+        def close():
+            self.calibration_window = None
+            window.destroy()
+        window.protocol("WM_DELETE_WINDOW", close)
+        
+        seconds = self.detection_settings['calibration']['seconds']
+        ttk.Label(window, text=f"Record each scene for {seconds:.0f} seconds, then run the calibration.").pack(padx=10, pady=5)
+        
+        clips_frame = ttk.Frame(window)
+        clips_frame.pack(fill='x', padx=10, pady=5)
+        clip_status = {}
+        for row, label in enumerate(self.detection_settings['calibration']['clips']):
+            ttk.Label(clips_frame, text=label.title(), width=12).grid(row=row, column=0, sticky='w')
+            recorded = os.path.exists(calibration.clip_path(self.detection_settings, label))
+            clip_status[label] = tk.StringVar(value="Recorded" if recorded else "Not recorded")
+            ttk.Label(clips_frame, textvariable=clip_status[label], width=16).grid(row=row, column=1, sticky='w')
+            ttk.Button(clips_frame, text="Record",
+                       command=lambda label=label: self.record_calibration_clip(label, clip_status[label])).grid(row=row, column=2, padx=5, pady=2)
+        
+        ttk.Button(window, text="Run Calibration", command=self.run_calibration).pack(pady=5)
     
-    def reset_detections(self):
-        """Reset all detection states"""
-        for key in self.detection_states:
-            self.detection_states[key] = False
-        self.update_detection_status()
-        self.log_info("All detections reset")
+    def record_calibration_clip(self, label, status):
+        """Record one calibration clip from the exhibit camera in the background"""
+        import calibration
+        
+        settings = self.detection_settings
+        path = calibration.clip_path(settings, label)
+        seconds = settings['calibration']['seconds']
+        camera_settings = dict(self.camera_settings, source=self.camera_source)
+        
+        def set_status(text):
+            self.call_on_main_thread(status.set, text)
+        
+        # The recorder needs the camera to itself
+        was_running = self.is_running
+        if was_running:
+            self.stop_camera()
+        
+        def record():
+            try:
+                frames = calibration.record_clip(path, seconds, camera_settings,
+                                                 lambda elapsed: set_status(f"Recording {seconds - elapsed:.0f}s"))
+                set_status("Recorded")
+                self.log_info(f"Calibration clip '{label}': {frames} frames")
+            except Exception as e:
+                set_status("Failed")
+                self.report_error("Calibration Error", str(e))
+            if was_running:
+                self.call_on_main_thread(self.start_camera)
+        
+        set_status("Starting...")
+        threading.Thread(target=record, name='visit-calibration-record', daemon=True).start()
+    
+    def run_calibration(self):
+        """Sweep the thresholds over the recorded clips and offer to apply them"""
+        import calibration
+        
+        settings = self.detection_settings
+        
+        def finished(calibrated, results):
+            summary = "\n".join(f"{group}: {calibration.format_params(params)}"
+                                for group, (params, _, _) in results.items())
+            if messagebox.askyesno("Calibration", f"Calibrated thresholds:\n\n{summary}\n\nApply and save them?"):
+                save_settings(DETECTION_SETTINGS_FILE, calibrated, self.config_dir)
+                self.apply_detection_settings(calibrated)
+        
+        def run():
+            try:
+                calibrated, results = calibration.Calibrator(settings, log=self.log_info).run()
+            except Exception as e:
+                self.report_error("Calibration Error", str(e))
+                return
+            self.call_on_main_thread(finished, calibrated, results)
+        
+        self.log_info("Calibration started")
+        threading.Thread(target=run, name='visit-calibration', daemon=True).start()
     
     def save_config(self):
         """Save media configuration"""
@@ -613,10 +461,8 @@ class VisitApp:
         )
         if filename:
             try:
-                with open(filename, 'w') as f:
-                    json.dump(self.media_config, f, indent=4)
+                self.save_media_config(filename)
                 messagebox.showinfo("Success", "Configuration saved successfully")
-                self.log_info(f"Configuration saved to {filename}")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to save configuration: {str(e)}")
     
@@ -627,35 +473,84 @@ class VisitApp:
         )
         if filename:
             try:
-                with open(filename, 'r') as f:
-                    self.media_config = json.load(f)
+                self.load_media_config(filename)
                 messagebox.showinfo("Success", "Configuration loaded successfully")
-                self.log_info(f"Configuration loaded from {filename}")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load configuration: {str(e)}")
     
+    def call_on_main_thread(self, callback, *args):
+        """Run callback on the Tk main thread; safe to call from any thread"""
+        if threading.current_thread() is threading.main_thread():
+            callback(*args)
+        else:
+            self.ui_calls.put((callback, args))
+    
+    def run_ui_calls(self):
+        """Run the callbacks queued by background threads; main thread only"""
+        # Only what is queued now, so a callback that re-queues itself waits
+        for _ in range(self.ui_calls.qsize()):
+            try:
+                callback, args = self.ui_calls.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                callback(*args)
+            except Exception as e:
+                traceback.print_exc()
+                # A failing write_log cannot report itself in the info panel
+                if callback != self.write_log:
+                    self.log_info(f"UI callback error: {str(e)}")
+    
     def log_info(self, message):
-        """Log information to the info panel"""
+        """Log information to the info panel; safe to call from any thread"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_message = f"[{timestamp}] {message}\n"
-        
+        self.call_on_main_thread(self.write_log, f"[{timestamp}] {message}\n")
+    
+    def write_log(self, log_message):
+        if self.info_text is None:
+            # Logged while loading settings, before the panel is built
+            self.ui_calls.put((self.write_log, (log_message,)))
+            return
         self.info_text.insert(tk.END, log_message)
         self.info_text.see(tk.END)
     
+    def report_error(self, title, message):
+        """Show an error dialog; safe to call from any thread"""
+        self.call_on_main_thread(messagebox.showerror, title, message)
+    
+    def on_ui_ready(self):
+        """Called once the main loop is running and the window is visible"""
+        self.startup_timer.record('first paint', self.startup_timer.elapsed())
+        for line in self.startup_timer.summary():
+            self.log_info(line)
+        if self.media_manifest is not None and len(self.media_manifest):
+            self.log_info(f"Media manifest: {len(self.media_manifest)} normalized files")
+            
+        self.start_warm_up()
+        self.start_metrics_server()
+    
+    def warm_up_imports(self):
+        """Import the libraries the first frames and the testing view need"""
+        VisitEngine.warm_up_imports(self)
+        ui_render.Image.load()
+        ui_render.ImageTk.load()
+    
     def run(self):
         """Start the application"""
         try:
             self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+            self.root.after_idle(self.on_ui_ready)
+            self.root.after_idle(self.render_pump)
+            self.root.after_idle(self.refresh_metrics_panel)
             self.root.mainloop()
         except Exception as e:
             print(f"Application error: {str(e)}")
     
     def on_closing(self):
         """Handle application closing"""
-        self.stop_camera()
-        pygame.mixer.quit()
+        self.shutdown()
         self.root.destroy()
 
 if __name__ == "__main__":
     app = VisitApp()
-    app.run()
\ No newline at end of file
+    app.run()
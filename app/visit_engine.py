@@ -0,0 +1,741 @@
+# VISIT Engine
+# Developed by Dineshkumar Rajendran
+#
+# Everything that runs the exhibit: settings, detectors, the capture,
+# detection and presentation pipeline, trigger handling and media playback.
+# It has no Tk dependency; VisitApp adds the operator dashboard on top of it
+# and headless.py runs it on its own.
+
+import threading
+import os
+import socket
+import time
+import json
+import hashlib
+from datetime import datetime
+from startup import LazyModule, StartupTimer
+from frame_pipeline import FramePipeline
+from frame_governor import FrameRateGovernor
+from frame_bundle import FrameBundle
+from camera import CameraSource
+from roi_tracker import RegionTracker, RoiDetector
+from detector_pool import DetectorPool
+from detector_scheduler import DetectorScheduler
+from detector_registry import REGISTRY, has_media, resolve_active_detectors
+from detection_model import DetectionStateModel
+from trigger_state import TriggerStateMachine
+from media_cache import MediaCache
+from audio_engine import AudioEngine
+from video_player import VideoPlaybackEngine
+from frame_store import FrameStore
+from presentation import PresentationRenderer
+from media_manifest import MediaManifest, MANIFEST_FILE
+from metrics import MetricsRegistry, MetricsServer
+from settings import APP_DIR
+from settings import load_detection_settings, load_display_settings
+from ui_render import FrameSlot
+
+cv2 = LazyModule('cv2')
+
+LICENSE_FILE = 'license.key'
+
+class VisitEngine:
+    def __init__(self, startup_timer=None, config_dir=None, camera_source=None):
+        self.startup_timer = startup_timer or StartupTimer()
+        
+        # Load detection and display settings (an exhibit may have its own folder)
+        self.config_dir = config_dir
+        with self.startup_timer.phase('settings'):
+            self.detection_settings = load_detection_settings(config_dir, self.log_info)
+            self.display_settings = load_display_settings(config_dir, self.log_info)
+        
+        self.warm_up_thread = None
+        # Models are built and released off the UI and detection threads
+        self.detector_load_thread = None
+        self.detector_load_lock = threading.Lock()
+        self.setup_metrics()
+        self.build_detection()
+        
+        # Application state
+        self.camera_settings = self.display_settings['camera']
+        self.camera_source = self.camera_settings['source'] if camera_source is None else camera_source
+        self.camera = None
+        self.is_running = False
+        self.pipeline = None
+        self.is_fullscreen = False
+        self.current_frame = None
+        
+        # Detection states
+        self.detection_states = REGISTRY.detection_states()
+        self.priority_order = REGISTRY.priority_order()
+        self.trigger_media = REGISTRY.trigger_media()
+        
+        # Published copy of the states; the UI only receives edge transitions
+        self.state_model = DetectionStateModel(self.detection_states)
+        
+        # Media storage
+        self.media_config = {
+            category: {'image': None, 'video': None, 'audio': None}
+            for category in REGISTRY.media_categories()
+        }
+        
+        # Normalized copies of the media written by scripts/normalize_media.py
+        self.media_manifest = None
+        normalized_settings = self.display_settings['normalized_media']
+        if normalized_settings['enabled']:
+            manifest_path = os.path.join(APP_DIR, '..', normalized_settings['output_dir'], MANIFEST_FILE)
+            self.media_manifest = MediaManifest.load(os.path.normpath(manifest_path), self.log_info)
+        
+        # Decoded media, preloaded so switching categories needs no disk I/O
+        cache_settings = self.display_settings['media_cache']
+        self.media_cache = MediaCache(cache_settings['budget_mb'],
+                                      (self.display_settings['display_width'],
+                                       self.display_settings['display_height']),
+                                      cache_settings['max_sound_seconds'],
+                                      manifest=self.media_manifest,
+                                      log=self.log_info)
+        self.active_media = None
+        
+        # Preloaded trigger audio with crossfades; the mixer is opened on
+        # first use or by the warm-up thread
+        audio_settings = self.display_settings['audio']
+        self.audio_engine = AudioEngine(self.media_cache,
+                                        audio_settings['frequency'],
+                                        audio_settings['buffer_size'],
+                                        audio_settings['channels'],
+                                        audio_settings['crossfade_ms'],
+                                        source=self.media_source)
+        
+        # Trigger videos with pre-rolled decoders for the other categories
+        video_settings = self.display_settings['video']
+        self.video_engine = VideoPlaybackEngine((self.display_settings['display_width'],
+                                                 self.display_settings['display_height']),
+                                                video_settings['buffer_frames'],
+                                                video_settings['preroll_frames'],
+                                                video_settings['preroll_mb'],
+                                                manifest=self.media_manifest,
+                                                log=self.log_info)
+        
+        # Optional decode-once frame files for looping clips
+        self.frame_store = None
+        prerender_settings = video_settings['prerender']
+        if prerender_settings['enabled']:
+            cache_dir = os.path.join(APP_DIR, '..', prerender_settings['cache_dir'])
+            self.frame_store = FrameStore(os.path.normpath(cache_dir),
+                                          (self.display_settings['display_width'],
+                                           self.display_settings['display_height']),
+                                          prerender_settings['max_mb'],
+                                          prerender_settings['max_width'],
+                                          log=self.log_info)
+        
+        # Visitor-facing display with its own render thread
+        presentation_settings = self.display_settings['presentation']
+        self.presentation = PresentationRenderer(self.video_engine,
+                                                 (self.display_settings['display_width'],
+                                                  self.display_settings['display_height']),
+                                                 presentation_settings['display'],
+                                                 presentation_settings['fullscreen'],
+                                                 presentation_settings['vsync'],
+                                                 presentation_settings['max_fps'],
+                                                 log=self.log_info)
+        
+        # Latest media switch (category, image) for an operator preview
+        self.media_slot = FrameSlot()
+    
+    def setup_metrics(self):
+        """Create the latency histograms and counters of the hot paths"""
+        exhibit = self.display_settings['metrics']['exhibit'] or socket.gethostname()
+        self.metrics = MetricsRegistry({'exhibit': exhibit})
+        self.metrics_server = None
+        self.camera_read_timer = self.metrics.histogram(
+            'visit_camera_read_seconds', "Time the capture stage waited for a camera frame")
+        self.camera_timeouts = self.metrics.counter(
+            'visit_camera_read_timeouts_total', "Camera reads that returned no new frame in time")
+        self.media_switch_timers = {}
+        self.detector_timers = {}
+    
+    def start_metrics_server(self, port=None):
+        """Serve the metrics on 127.0.0.1; port 0 disables the endpoint"""
+        port = self.display_settings['metrics']['port'] if port is None else port
+        if not port or self.metrics_server is not None:
+            return
+        try:
+            self.metrics_server = MetricsServer(self.metrics, port)
+        except OSError as e:
+            self.log_info(f"Metrics endpoint unavailable on port {port}: {e}")
+            return
+        self.metrics_server.start()
+        self.log_info(f"Metrics at http://127.0.0.1:{port}/metrics")
+    
+    def build_detection(self):
+        """Create the detectors and everything configured by the detection settings"""
+        # Detector plugins; models are built on first use or by the warm-up thread
+        self.detectors = REGISTRY.create(self.detection_settings)
+        # Kept across rebuilds so the exported counts stay monotonic
+        self.detector_timers = {name: self.metrics.histogram('visit_detector_process_seconds',
+                                                             "Duration of one detector process() call",
+                                                             detector=name)
+                                for name in self.detectors}
+        self.active_detectors = []
+        
+        # Serial or parallel execution of the detectors
+        self.detector_pool = DetectorPool(self.detection_settings['detection_mode'],
+                                          self.detection_settings['detector_workers'],
+                                          log=self.log_info)
+        
+        # Gating and stride scheduling of the expensive detectors
+        self.scheduler = DetectorScheduler(self.detection_settings['scheduler'])
+        self.detector_outputs = {}
+        
+        # Region-of-interest inference for the landmark models
+        self.region_trackers = {}
+        roi_settings = self.detection_settings['roi']
+        if roi_settings['enabled']:
+            for name, expand in (('face', roi_settings['face_expand']),
+                                 ('body', roi_settings['body_expand']),
+                                 ('hands', roi_settings['hands_expand'])):
+                self.region_trackers[name] = RegionTracker(expand, roi_settings['max_age'],
+                                                           roi_settings['min_crop_size'])
+            self.detectors['face_mesh'].region_tracker = self.region_trackers['face']
+            self.detectors['hands'].region_tracker = self.region_trackers['hands']
+            self.detectors['pose'].region_tracker = self.region_trackers['body']
+        
+        # Media only switches on confirmed, debounced trigger transitions
+        self.trigger_machine = TriggerStateMachine(self.detection_settings['triggers'],
+                                                   REGISTRY.priority_order(), REGISTRY.trigger_media())
+    
+    def apply_detection_settings(self, settings):
+        """Rebuild the detectors with new detection settings, e.g. after calibration"""
+        was_running = self.is_running
+        self.stop_camera()
+        # Nothing may still be loading the detectors that are about to go
+        for thread in (self.warm_up_thread, self.detector_load_thread):
+            if thread is not None:
+                thread.join()
+        for detector in self.detectors.values():
+            detector.unload()
+        self.detector_pool.shutdown()
+        self.detection_settings = settings
+        self.build_detection()
+        self.log_info("Detection settings applied")
+        if was_running:
+            self.start_camera()
+    
+    def license_error(self):
+        """Reason the license file is not valid, or None if it is"""
+        try:
+            if not os.path.exists(LICENSE_FILE):
+                return "License file not found. Please contact the developer."
+                
+            with open(LICENSE_FILE, 'r') as f:
+                license_content = f.read().strip()
+                
+            # Try to parse as JSON
+            try:
+                license_data = json.loads(license_content)
+            except json.JSONDecodeError:
+                return "Invalid license file format. Please contact the developer."
+                
+            # Verify license validity
+            if not self.validate_license(license_data):
+                return "Invalid license. Please contact the developer."
+                
+            return None
+        except Exception as e:
+            return f"License verification failed: {str(e)}"
+    
+    def validate_license(self, license_data):
+        """Validate license data"""
+        try:
+            # Ensure license_data is a dictionary
+            if not isinstance(license_data, dict):
+                print(f"License data is not a dictionary: {type(license_data)}")
+                return False
+                
+            # Check required fields
+            required_fields = ['museum_id', 'expiry', 'hash']
+            for field in required_fields:
+                if field not in license_data:
+                    print(f"Missing required field: {field}")
+                    return False
+            
+            # Check if license has expired
+            expiry_date = datetime.strptime(license_data['expiry'], '%Y-%m-%d')
+            if datetime.now() > expiry_date:
+                print("License has expired")
+                return False
+                
+            # Verify hash using the EXACT same algorithm as generator
+            hash_input = f"{license_data['museum_id']}{license_data['expiry']}VISIT_SECRET_KEY"
+            expected_hash = hashlib.sha256(hash_input.encode()).hexdigest()
+            
+            return expected_hash == license_data['hash']
+        except Exception as e:
+            print(f"License validation error: {e}")
+            return False
+    
+    def start_camera(self):
+        """Start camera capture"""
+        try:
+            settings = dict(self.camera_settings, source=self.camera_source)
+            self.camera = CameraSource(**settings)
+            self.camera.open()
+            negotiated = self.camera.negotiated
+            self.log_info(f"Camera {self.camera.source}: {negotiated['width']}x{negotiated['height']} "
+                          f"{negotiated['fourcc'] or self.camera.kind} at {negotiated['fps']:.0f} FPS")
+            
+            self.update_active_detectors()
+            
+            self.is_running = True
+            governor = FrameRateGovernor(self.display_settings['target_fps'])
+            self.pipeline = FramePipeline(self.capture_frame, self.detect_frame, self.present_frame,
+                                          error_callback=self.on_pipeline_error,
+                                          governor=governor)
+            self.pipeline.start()
+            
+            self.log_info("Camera started successfully")
+            
+        except Exception as e:
+            if self.camera is not None:
+                self.camera.release()
+                self.camera = None
+            self.report_error("Camera Error", f"Failed to start camera: {str(e)}")
+    
+    def stop_camera(self):
+        """Stop camera capture"""
+        self.is_running = False
+        if self.pipeline:
+            self.pipeline.stop()
+            self.log_pipeline_stats()
+            self.pipeline = None
+        if self.camera:
+            self.camera.release()
+            self.camera = None
+        self.log_info("Camera stopped")
+    
+    def capture_frame(self):
+        """Capture stage: wait for and mirror the newest camera frame"""
+        if self.camera is None:
+            return None
+            
+        start = time.perf_counter()
+        item = self.camera.read(timeout=0.5)
+        self.camera_read_timer.observe(time.perf_counter() - start)
+        if item is None:
+            self.camera_timeouts.inc()
+            return None
+        frame, captured_at = item
+            
+        # Flip frame horizontally for mirror effect
+        return FrameBundle(cv2.flip(frame, 1), captured_at=captured_at)
+    
+    def detect_frame(self, bundle):
+        """Detection stage: run all detections on a captured frame"""
+        self.current_frame = bundle.bgr
+        self.process_detections(bundle)
+        return dict(self.detection_states)
+    
+    def present_frame(self, bundle, detection_states, behind_schedule=False):
+        """Presentation stage: drive media playback"""
+        # Handle media playback based on detections
+        self.handle_media_playback(detection_states, bundle.captured_at)
+    
+    def on_pipeline_error(self, stage, error):
+        """Report an exception raised inside a pipeline stage"""
+        self.metrics.counter('visit_pipeline_errors_total', "Exceptions raised inside a pipeline stage",
+                             stage=stage).inc()
+        self.log_info(f"Pipeline {stage} error: {error}")
+    
+    def get_pipeline_stats(self):
+        """Return per-stage queue depth and drop counters of the running pipeline"""
+        if self.pipeline is None:
+            return {}
+        stats = self.pipeline.get_stats()
+        if self.camera is not None:
+            stats['camera'] = self.camera.get_stats()
+        return stats
+    
+    def log_pipeline_stats(self):
+        """Log a summary of the pipeline counters"""
+        stats = self.get_pipeline_stats()
+        if not stats:
+            return
+        queues = stats['queues']
+        if 'camera' in stats:
+            camera = stats['camera']
+            self.log_info(f"Camera: {camera['state']}, {camera['fps']:.1f} FPS, "
+                          f"{camera['unread_frames']} superseded frames, {camera['reconnects']} reconnects")
+        self.log_info(f"Pipeline: captured {stats['captured']} ({stats['capture_fps']:.1f} FPS), "
+                      f"detected {stats['detected']} ({stats['detection_fps']:.1f} FPS), "
+                      f"presented {stats['presented']}")
+        if 'governor' in stats:
+            governor = stats['governor']
+            self.log_info(f"Frame rate: {governor['achieved_fps']:.1f} of {governor['target_fps']:.0f} FPS, "
+                          f"jitter {governor['jitter_ms']:.1f} ms, skipped {governor['skipped_frames']} frames")
+        for name, queue_stats in queues.items():
+            self.log_info(f"Pipeline {name} queue: depth {queue_stats['depth']}/{queue_stats['capacity']}, "
+                          f"dropped {queue_stats['dropped']} of {queue_stats['received']}")
+        for name, detector in self.detectors.items():
+            if isinstance(detector.runner, RoiDetector):
+                roi_stats = detector.runner.get_stats()
+                self.log_info(f"ROI {name}: {roi_stats['roi_runs']} cropped, {roi_stats['full_runs']} full-frame, "
+                              f"{roi_stats['fallbacks']} fallbacks")
+        cache_stats = self.media_cache.get_stats()
+        self.log_info(f"Media cache: {cache_stats['entries']} items, {cache_stats['used_mb']:.1f} of "
+                      f"{cache_stats['budget_mb']:.0f} MB, {cache_stats['hits']} hits, "
+                      f"{cache_stats['misses']} misses, {cache_stats['evictions']} evictions")
+        video_stats = self.video_engine.get_stats()
+        self.log_info(f"Video: {video_stats['switches']} switches ({video_stats['instant_switches']} pre-rolled), "
+                      f"{video_stats['dropped_frames']} dropped, {video_stats['late_frames']} late frames")
+        if self.presentation.started_at is not None:
+            presentation_stats = self.presentation.get_stats()
+            self.log_info(f"Presentation: {presentation_stats['video_fps']:.1f} video FPS, "
+                          f"vsync {'on' if presentation_stats['vsync'] else 'off'}, "
+                          f"{presentation_stats['full_updates']} full and "
+                          f"{presentation_stats['dirty_updates']} dirty-rect updates")
+        audio_stats = self.audio_engine.get_stats()
+        if audio_stats['switches_measured']:
+            self.log_info(f"Audio: trigger to audible {audio_stats['latency_ms']:.0f} ms mean, "
+                          f"{audio_stats['latency_p95_ms']:.0f} ms p95, {audio_stats['latency_max_ms']:.0f} ms max "
+                          f"({audio_stats['output_latency_ms']:.1f} ms mixer buffer)")
+        ui_stats = self.state_model.get_stats()
+        self.log_info(f"Status labels: {ui_stats['transitions']} state transitions, "
+                      f"{ui_stats['ui_updates']} UI updates")
+        for name, counters in self.scheduler.get_stats().items():
+            self.log_info(f"Scheduler {name}: ran {counters['run']}, held {counters['hold']}, "
+                          f"idle {counters['idle']}")
+        trigger_stats = self.trigger_machine.get_stats()
+        self.log_info(f"Triggers: {trigger_stats['switches']} media switches from "
+                      f"{trigger_stats['raw_transitions']} raw transitions, suppressed "
+                      f"{trigger_stats['suppressed_by_dwell']} by dwell and "
+                      f"{trigger_stats['suppressed_by_cooldown']} by cooldown")
+    
+    def resolve_detectors(self):
+        """Names of the detectors the current media configuration needs"""
+        gates = {}
+        if self.scheduler.enabled:
+            gates = {name: config.get('gate', [])
+                     for name, config in self.scheduler.detector_settings.items()}
+        return resolve_active_detectors(self.detectors, self.media_config, gates)
+    
+    def update_active_detectors(self, wait=False):
+        """Switch to the detectors the media configuration needs
+
+        The new list is published first, so the detection thread stops using
+        the detectors that are no longer needed right away. The models are
+        then built and released on a background thread (or before returning
+        with wait=True); the detection thread skips a detector until its
+        model is loaded.
+        """
+        active = self.resolve_detectors()
+        self.active_detectors = active
+        # Detectors that only gate others must not switch to empty media
+        self.trigger_machine.set_media_categories(
+            [category for category in self.media_config if has_media(self.media_config, category)])
+        if wait:
+            self.load_active_detectors()
+        else:
+            self.detector_load_thread = threading.Thread(target=self.load_active_detectors,
+                                                         name='visit-detector-load', daemon=True)
+            self.detector_load_thread.start()
+        
+        skipped = [name for name in self.detectors if name not in active]
+        self.log_info(f"Active detectors: {', '.join(active)}")
+        if skipped:
+            self.log_info(f"Skipped detectors (no media configured): {', '.join(skipped)}")
+    
+    def load_active_detectors(self):
+        """Load the published active detectors and unload the rest"""
+        # Serialized, and always applies the newest list, so an older
+        # request finishing late cannot unload a detector that is wanted again
+        with self.detector_load_lock:
+            active = self.active_detectors
+            for name, detector in self.detectors.items():
+                if name in active:
+                    detector.load()
+                elif detector.is_loaded:
+                    detector.unload()
+    
+    def process_detections(self, frame):
+        """Process all types of detections"""
+        bundle = frame if isinstance(frame, FrameBundle) else FrameBundle(frame)
+        
+        # Reset detection states
+        for key in self.detection_states:
+            self.detection_states[key] = False
+        
+        self.scheduler.begin_frame()
+        # Models still loading are skipped until they are ready
+        active = [self.detectors[name] for name in self.active_detectors]
+        active = [detector for detector in active if detector.is_loaded]
+        
+        # Cheap detectors run first and gate the expensive ones
+        for detector in active:
+            if detector.inline:
+                start = time.perf_counter()
+                result = detector.run(bundle)
+                if result is None:
+                    continue
+                self.detector_timers[detector.name].observe(time.perf_counter() - start)
+                detector.interpret(result, self.detection_states)
+                self.scheduler.record(detector.name, any(self.detection_states[state]
+                                                         for state in detector.states))
+                for state in detector.states:
+                    self.scheduler.record(state, self.detection_states[state])
+        
+        # Run the scheduled detectors (concurrently in parallel mode)
+        run, hold = self.scheduler.plan([detector.name for detector in active if not detector.inline])
+        results = self.detector_pool.run({name: self.detectors[name] for name in run}, bundle)
+        # A detector unloaded while this frame was in flight returns None
+        results = {name: result for name, result in results.items() if result is not None}
+        run = [name for name in run if name in results]
+        for name in run:
+            # The pool already timed each process() call
+            self.detector_timers[name].observe(self.detector_pool.last_timings[name])
+            self.detectors[name].interpret(results[name], self.detection_states)
+        
+        # Track face and body boxes for the next frame's region-of-interest crops
+        if self.region_trackers:
+            self.update_region_trackers(results)
+        
+        # Detectors skipped by their stride keep their last outputs
+        for name in hold:
+            for state, value in self.detector_outputs.get(name, {}).items():
+                self.detection_states[state] = self.detection_states[state] or value
+        for name in run:
+            self.detector_outputs[name] = {state: self.detection_states[state]
+                                           for state in self.detectors[name].states}
+        
+        # Feed this frame's triggers back into the scheduler
+        for name in run + hold:
+            self.scheduler.record(name, any(self.detector_outputs.get(name, {}).values()))
+        for state, is_active in self.detection_states.items():
+            self.scheduler.record(state, is_active)
+        
+        # Update status display
+        self.update_detection_status()
+    
+    def update_region_trackers(self, results):
+        """Update the tracked face and body boxes from this frame's results"""
+        if 'face_detection' in results:
+            face_results = results['face_detection']
+            if face_results.detections:
+                bbox = face_results.detections[0].location_data.relative_bounding_box
+                self.region_trackers['face'].update((bbox.xmin, bbox.ymin, bbox.width, bbox.height))
+            else:
+                self.region_trackers['face'].lose()
+        
+        if 'pose' in results:
+            pose_landmarks = results['pose'].pose_landmarks
+            self.region_trackers['body'].update_from_landmarks(pose_landmarks)
+            self.region_trackers['hands'].update_from_landmarks(pose_landmarks)
+    
+    def update_detection_status(self):
+        """Publish detection states for whoever displays them"""
+        self.state_model.update(self.detection_states)
+    
+    def handle_media_playback(self, detection_states=None, trigger_time=None):
+        """Handle media playback based on current detections"""
+        if detection_states is None:
+            detection_states = self.detection_states
+            
+        # Highest-priority confirmed trigger, held for its dwell time; single
+        # noisy frames do not reach the media
+        active_detection = self.trigger_machine.update(detection_states)
+        
+        # Play appropriate media
+        self.play_media(active_detection, trigger_time)
+    
+    def play_media(self, detection_type, trigger_time=None):
+        """Play media for specific detection type"""
+        if detection_type == self.active_media:
+            return
+        start = time.perf_counter()
+        media = self.media_config.get(detection_type) or {}
+        
+        # Switch the category's video and image, decoded ahead of time
+        self.active_media = detection_type
+        self.video_engine.play(detection_type, media.get('video'))
+        self.video_engine.prepare(self.video_paths())
+        image = self.media_cache.get_image(media.get('image'))
+        self.media_slot.put((detection_type, image))
+        self.presentation.show_image(image)
+        
+        # Crossfade to the category's audio (or fade out if it has none)
+        try:
+            self.audio_engine.play(detection_type, media.get('audio'), trigger_time)
+        except Exception as e:
+            self.log_info(f"Audio playback error: {str(e)}")
+        self.media_switch_timer(detection_type).observe(time.perf_counter() - start)
+    
+    def media_switch_timer(self, detection_type):
+        timer = self.media_switch_timers.get(detection_type)
+        if timer is None:
+            timer = self.media_switch_timers[detection_type] = self.metrics.histogram(
+                'visit_media_switch_seconds', "Time play_media() took to switch to a category",
+                category=str(detection_type))
+        return timer
+    
+    def prerender_videos(self):
+        """Build or validate the frame files of the looping clips"""
+        if self.frame_store is None:
+            return
+        video_paths = self.video_paths()
+        for category in self.display_settings['video']['prerender']['categories']:
+            path = video_paths.get(category)
+            if path and os.path.exists(path):
+                clip = self.frame_store.ensure(self.media_source(path))
+                if clip is not None:
+                    self.video_engine.add_prerendered(path, clip)
+                    self.log_info(f"Pre-rendered {category} video: {len(clip)} frames")
+    
+    def media_source(self, path):
+        """File to play for a configured media path: its normalized copy if there is one"""
+        if self.media_manifest is None:
+            return path
+        return self.media_manifest.resolve(path)
+    
+    def video_paths(self):
+        """Video file of every media category (None where no video is set)"""
+        return {category: (media or {}).get('video') for category, media in self.media_config.items()}
+    
+    def toggle_fullscreen(self):
+        """Toggle the fullscreen presentation display"""
+        if self.is_fullscreen:
+            self.exit_fullscreen()
+            return
+        
+        self.is_fullscreen = True
+        media = self.media_config.get(self.active_media or 'default') or {}
+        self.presentation.show_image(self.media_cache.get_image(media.get('image')))
+        self.presentation.start()
+        self.log_info("Entered fullscreen mode")
+    
+    def exit_fullscreen(self):
+        """Exit fullscreen mode"""
+        if not self.is_fullscreen:
+            return
+        self.is_fullscreen = False
+        self.presentation.stop()
+        self.log_info("Exited fullscreen mode")
+    
+    def reset_application(self):
+        """Reset application state"""
+        self.stop_camera()
+        for key in self.detection_states:
+            self.detection_states[key] = False
+        self.scheduler.reset()
+        self.trigger_machine.reset()
+        self.detector_outputs = {}
+        for detector in self.detectors.values():
+            detector.reset()
+        self.update_detection_status()
+        self.active_media = None
+        self.audio_engine.stop()
+        self.log_info("Application reset completed")
+    
+    def refresh_camera(self):
+        """Reopen the camera device without stopping the pipeline"""
+        if self.camera is None:
+            self.log_info("Camera is not running")
+            return
+        # The reader thread reopens the device; nothing here blocks
+        self.camera.reconnect()
+        self.log_info("Camera reconnecting")
+    
+    def reset_detections(self):
+        """Reset all detection states"""
+        for key in self.detection_states:
+            self.detection_states[key] = False
+        self.update_detection_status()
+        self.log_info("All detections reset")
+    
+    def log_info(self, message):
+        """Log information to standard output"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] {message}", flush=True)
+    
+    def report_error(self, title, message):
+        """Report an error the operator has to act on"""
+        self.log_info(f"{title}: {message}")
+    
+    def load_media_config(self, filename, preload=True):
+        """Load a saved media configuration and preload its media"""
+        with open(filename, 'r') as f:
+            self.media_config = json.load(f)
+        self.log_info(f"Configuration loaded from {filename}")
+        if preload:
+            self.preload_media()
+        if self.is_running:
+            self.update_active_detectors()
+    
+    def save_media_config(self, filename):
+        """Save the media configuration"""
+        with open(filename, 'w') as f:
+            json.dump(self.media_config, f, indent=4)
+        self.log_info(f"Configuration saved to {filename}")
+    
+    def preload_media(self):
+        """Decode the configured media in the background"""
+        def preload():
+            try:
+                self.ensure_audio()
+            except Exception as e:
+                self.log_info(f"Audio init error: {e}")
+            try:
+                self.warm_up_media()
+            except Exception as e:
+                self.log_info(f"Media preload error: {e}")
+        
+        thread = threading.Thread(target=preload, name='visit-media-preload')
+        thread.daemon = True
+        thread.start()
+    
+    def ensure_audio(self):
+        """Initialize the pygame mixer on first use"""
+        self.audio_engine.init()
+    
+    def warm_up(self):
+        """Load libraries, audio and the needed models in the background"""
+        timer = StartupTimer('Warm-up')
+        # Each phase fails on its own: no audio device must not cost the models
+        phases = [('imports', self.warm_up_imports),
+                  ('audio', self.ensure_audio),
+                  ('media', self.warm_up_media)]
+        phases += [(name, self.detectors[name].load) for name in self.resolve_detectors()]
+        for name, phase in phases:
+            try:
+                with timer.phase(name):
+                    phase()
+            except Exception as e:
+                self.log_info(f"Warm-up {name} error: {str(e)}")
+        for line in timer.summary():
+            self.log_info(line)
+    
+    def start_warm_up(self):
+        """Run warm_up on a background thread if enabled in the detection settings"""
+        if self.detection_settings['warm_up_models']:
+            self.warm_up_thread = threading.Thread(target=self.warm_up, name='visit-warm-up')
+            self.warm_up_thread.daemon = True
+            self.warm_up_thread.start()
+    
+    def warm_up_imports(self):
+        """Import the libraries the first frames need"""
+        cv2.load()
+    
+    def warm_up_media(self):
+        """Pre-roll the trigger videos and decode the configured media"""
+        self.video_engine.prepare(self.video_paths())
+        self.media_cache.preload(self.media_config)
+        self.prerender_videos()
+    
+    def shutdown(self):
+        """Stop the camera, the pipeline and every playback thread"""
+        self.stop_camera()
+        self.detector_pool.shutdown()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        self.presentation.stop()
+        self.video_engine.stop()
+        self.audio_engine.quit()
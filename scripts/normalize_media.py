@@ -0,0 +1,336 @@
+# Media Normalization Tool for VISIT
+# Developed by Dineshkumar Rajendran
+#
+# Transcodes the exhibit media to the display's resolution, frame rate and
+# codec profile ahead of time and writes the manifest the app reads at
+# startup. Rerunning it only processes files that changed.
+#
+#   python normalize_media.py                      walk ../media
+#   python normalize_media.py --config saved.json  files of a saved media configuration
+#
+# Uses ffmpeg when it is on the PATH; without it images and videos are
+# converted with OpenCV and audio files are listed unchanged.
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'app'))
+
+import cv2
+import numpy as np
+
+from media_cache import fit_to_display
+from frame_store import file_hash
+from media_manifest import MediaManifest, MANIFEST_FILE
+from settings import load_display_settings
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif'}
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv'}
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.ogg'}
+OUTPUT_EXTENSIONS = {'image': '.jpg', 'video': '.mp4', 'audio': '.ogg'}
+
+
+def media_kind(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in IMAGE_EXTENSIONS:
+        return 'image'
+    if extension in VIDEO_EXTENSIONS:
+        return 'video'
+    if extension in AUDIO_EXTENSIONS:
+        return 'audio'
+    return None
+
+
+def find_media(media_dir):
+    """Every media file below a directory, skipping the normalized output"""
+    found = []
+    for directory, subdirs, files in os.walk(media_dir):
+        subdirs[:] = sorted(d for d in subdirs if not d.startswith('.'))
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            if media_kind(path):
+                found.append(path)
+    return found
+
+
+def config_media(config_path):
+    """Media files referenced by a saved media configuration"""
+    with open(config_path, 'r') as f:
+        media_config = json.load(f)
+    found = []
+    for media in media_config.values():
+        for path in (media or {}).values():
+            if path and media_kind(path) and path not in found:
+                found.append(path)
+    return found
+
+
+class Normalizer:
+    """Transcodes media files into the output directory and records them in the manifest"""
+
+    def __init__(self, output_dir, display_size, settings, ffmpeg=None, force=False, source_root=ROOT_DIR):
+        self.output_dir = output_dir
+        self.source_root = source_root
+        self.display_size = tuple(display_size)
+        self.settings = settings
+        self.ffmpeg = ffmpeg
+        self.ffprobe = shutil.which('ffprobe') if ffmpeg else None
+        self.force = force
+        os.makedirs(output_dir, exist_ok=True)
+        self.manifest = MediaManifest.load(os.path.join(output_dir, MANIFEST_FILE))
+        self.manifest.data['profile'] = self.profile()
+        self._outputs = {entry['output'] for entry in self.manifest.data['entries'].values()}
+
+    def profile(self, kind=None):
+        width, height = self.display_size
+        profiles = {
+            'image': {'width': width, 'height': height, 'quality': self.settings['image_quality']},
+            'video': {'width': width, 'height': height, 'fps': self.settings['video_fps'],
+                      'codec': self.settings['video_codec'] if self.ffmpeg else 'mp4v',
+                      'profile': self.settings['video_profile'], 'crf': self.settings['video_crf']},
+            'audio': {'codec': self.settings['audio_codec'] if self.ffmpeg else 'copy',
+                      'bitrate': self.settings['audio_bitrate'],
+                      'sample_rate': self.settings['audio_sample_rate']}
+        }
+        return profiles[kind] if kind else profiles
+
+    def is_current(self, source, entry, kind):
+        """Whether the recorded output is still valid for the source file"""
+        if self.force or entry is None or entry.get('profile') != self.profile(kind):
+            return False
+        if not os.path.exists(self.manifest.absolute(entry['output'])):
+            return False
+        stat = os.stat(source)
+        if entry.get('source_mtime') == stat.st_mtime and entry.get('source_size') == stat.st_size:
+            return True
+        # Touched but not changed: keep the output, remember the new timestamp
+        if entry.get('source_hash') == file_hash(source):
+            entry['source_mtime'] = stat.st_mtime
+            entry['source_size'] = stat.st_size
+            return True
+        return False
+
+    def output_path(self, source, kind, entry):
+        if entry is not None:
+            # Keep the previous output name so reruns replace the same file
+            self._outputs.discard(entry['output'])
+        try:
+            relative = os.path.relpath(os.path.abspath(source), self.source_root)
+        except ValueError:
+            relative = os.path.abspath(source)
+        if relative.startswith('..') or os.path.isabs(relative):
+            relative = os.path.join('external', os.path.basename(source))
+        base, extension = os.path.splitext(relative)
+        output = base + OUTPUT_EXTENSIONS[kind]
+        if self.manifest.relative(os.path.join(self.output_dir, output)) in self._outputs:
+            # Another source already produced this name (clip.mov and clip.mp4)
+            output = base + extension.replace('.', '_') + OUTPUT_EXTENSIONS[kind]
+        path = os.path.join(self.output_dir, output)
+        self._outputs.add(self.manifest.relative(path))
+        return path
+
+    def process(self, source):
+        """Normalize one file; returns 'skipped', 'normalized' or 'failed'"""
+        kind = media_kind(source)
+        entry = self.manifest.entry(source)
+        if not os.path.exists(source):
+            print(f"Missing: {source}")
+            return 'failed'
+        if self.is_current(source, entry, kind):
+            return 'skipped'
+
+        output = self.output_path(source, kind, entry)
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        # Write to a temporary file so an interrupted run leaves no half-written output
+        temp_path = output + '.tmp' + OUTPUT_EXTENSIONS[kind]
+        started = time.perf_counter()
+        try:
+            if kind == 'image':
+                info = self.normalize_image(source, temp_path)
+            elif kind == 'video':
+                info = self.normalize_video(source, temp_path)
+            else:
+                info = self.normalize_audio(source, temp_path)
+        except Exception as e:
+            print(f"Failed: {source}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return 'failed'
+
+        if info.pop('copied', False):
+            output = source
+        else:
+            os.replace(temp_path, output)
+        stat = os.stat(source)
+        info.update({
+            'kind': kind,
+            'output': self.manifest.relative(output),
+            'profile': self.profile(kind),
+            'source_mtime': stat.st_mtime,
+            'source_size': stat.st_size,
+            'source_hash': file_hash(source),
+            'output_hash': file_hash(output)
+        })
+        self.manifest.set_entry(source, info)
+        print(f"Normalized {kind}: {source} ({time.perf_counter() - started:.1f}s)")
+        return 'normalized'
+
+    def normalize_image(self, source, output):
+        image = cv2.imread(source, cv2.IMREAD_COLOR)
+        if image is None:
+            # OpenCV cannot read GIFs
+            from PIL import Image
+            with Image.open(source) as pil_image:
+                image = cv2.cvtColor(np.asarray(pil_image.convert('RGB')), cv2.COLOR_RGB2BGR)
+        image = fit_to_display(image, *self.display_size)
+        if not cv2.imwrite(output, image, [cv2.IMWRITE_JPEG_QUALITY, self.settings['image_quality']]):
+            raise IOError("cannot write image")
+        height, width = image.shape[:2]
+        return {'width': width, 'height': height}
+
+    def normalize_video(self, source, output):
+        capture = cv2.VideoCapture(source)
+        if not capture.isOpened():
+            raise IOError("cannot open video")
+        source_fps = capture.get(cv2.CAP_PROP_FPS) or 0
+        # Never raise the frame rate, only cap it
+        fps = min(source_fps, self.settings['video_fps']) if source_fps > 0 else self.settings['video_fps']
+        width, height = self.display_size
+
+        if self.ffmpeg:
+            capture.release()
+            video_filter = (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,fps={fps:g}")
+            self.run_ffmpeg(['-i', source, '-vf', video_filter, '-an',
+                             '-c:v', self.settings['video_codec'],
+                             '-profile:v', self.settings['video_profile'],
+                             '-crf', str(self.settings['video_crf']),
+                             '-pix_fmt', 'yuv420p', '-movflags', '+faststart', output])
+        else:
+            writer = cv2.VideoWriter(output, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+            if not writer.isOpened():
+                capture.release()
+                raise IOError("cannot write video")
+            # Drop frames evenly when the source frame rate is higher than the target
+            step = source_fps / fps if source_fps > fps else 1.0
+            index, next_kept = 0, 0.0
+            try:
+                while True:
+                    ret, frame = capture.read()
+                    if not ret:
+                        break
+                    if index >= next_kept:
+                        writer.write(np.ascontiguousarray(fit_to_display(frame, width, height)))
+                        next_kept += step
+                    index += 1
+            finally:
+                capture.release()
+                writer.release()
+
+        return self.probe_video(output)
+
+    def probe_video(self, path):
+        capture = cv2.VideoCapture(path)
+        try:
+            fps = capture.get(cv2.CAP_PROP_FPS) or 0
+            frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+            info = {
+                'width': int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                'height': int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                'fps': fps,
+                'frame_count': frame_count,
+                'duration': frame_count / fps if fps > 0 else None
+            }
+        finally:
+            capture.release()
+        if not info['frame_count']:
+            raise IOError("no frames decoded")
+        return info
+
+    def normalize_audio(self, source, output):
+        if not self.ffmpeg:
+            # Nothing to transcode with: play the original, but record its duration
+            return {'copied': True, 'duration': self.probe_audio(source)}
+        self.run_ffmpeg(['-i', source, '-vn', '-ac', '2',
+                         '-ar', str(self.settings['audio_sample_rate']),
+                         '-c:a', self.settings['audio_codec'],
+                         '-b:a', self.settings['audio_bitrate'], output])
+        return {'duration': self.probe_audio(output),
+                'sample_rate': self.settings['audio_sample_rate'], 'channels': 2}
+
+    def probe_audio(self, path):
+        if self.ffprobe:
+            result = subprocess.run([self.ffprobe, '-v', 'error', '-show_entries', 'format=duration',
+                                     '-of', 'default=noprint_wrappers=1:nokey=1', path],
+                                    capture_output=True, text=True)
+            try:
+                return float(result.stdout.strip())
+            except ValueError:
+                pass
+        try:
+            os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+            import pygame
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            return pygame.mixer.Sound(path).get_length()
+        except Exception as e:
+            print(f"Cannot read duration of {path}: {e}")
+            return None
+
+    def run_ffmpeg(self, arguments):
+        result = subprocess.run([self.ffmpeg, '-y', '-v', 'error'] + arguments,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"ffmpeg exited with {result.returncode}")
+
+
+def main():
+    display_settings = load_display_settings()
+    settings = display_settings['normalized_media']
+
+    parser = argparse.ArgumentParser(description="Normalize VISIT media for the exhibit display")
+    parser.add_argument('--media', default=os.path.join(ROOT_DIR, 'media'),
+                        help="directory to walk (default: media/)")
+    parser.add_argument('--config', help="saved media configuration JSON to normalize instead")
+    parser.add_argument('--output', default=os.path.join(ROOT_DIR, settings['output_dir']),
+                        help="output directory holding the normalized files and manifest")
+    parser.add_argument('--width', type=int, default=display_settings['display_width'])
+    parser.add_argument('--height', type=int, default=display_settings['display_height'])
+    parser.add_argument('--fps', type=float, default=settings['video_fps'])
+    parser.add_argument('--ffmpeg', default=shutil.which('ffmpeg'), help="path to ffmpeg")
+    parser.add_argument('--no-ffmpeg', action='store_true', help="convert with OpenCV only")
+    parser.add_argument('--force', action='store_true', help="process every file again")
+    args = parser.parse_args()
+
+    settings = dict(settings, video_fps=args.fps)
+    ffmpeg = None if args.no_ffmpeg else args.ffmpeg
+    if not ffmpeg:
+        print("ffmpeg not found: converting images and videos with OpenCV, audio left as is")
+
+    sources = config_media(args.config) if args.config else find_media(args.media)
+    output_dir = os.path.abspath(args.output)
+    sources = [path for path in sources
+               if not os.path.abspath(path).startswith(output_dir + os.sep)]
+
+    normalizer = Normalizer(output_dir, (args.width, args.height), settings, ffmpeg, args.force,
+                            source_root=ROOT_DIR if args.config else os.path.abspath(args.media))
+    results = {'normalized': 0, 'skipped': 0, 'failed': 0}
+    for source in sources:
+        results[normalizer.process(source)] += 1
+    removed = normalizer.manifest.remove_missing()
+    normalizer.manifest.save()
+
+    print(f"{results['normalized']} normalized, {results['skipped']} unchanged, "
+          f"{results['failed']} failed, {removed} removed")
+    print(f"Manifest: {normalizer.manifest.path}")
+    return 1 if results['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
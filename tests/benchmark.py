@@ -0,0 +1,420 @@
+# Detection Benchmark
+# Run this to measure the detection path and catch performance regressions
+#
+# Feeds video clips (or a generated synthetic clip) through the same
+# detection and media path the camera pipeline uses, without a camera, Tk
+# or a sound card, and reports:
+#   per-detector and per-stage latency (p50/p95/p99), end-to-end FPS,
+#   peak RSS, media switch latency (trigger to first video frame and to audio)
+#
+#   python tests/benchmark.py                          # synthetic clip
+#   python tests/benchmark.py --clip visitors.mp4 --frames 600
+#   python tests/benchmark.py --update-baseline
+#
+# The run is repeated (--repeats) and each metric is the median over the
+# repeats, so one run disturbed by other load on the machine does not decide
+# the result. Results are written as JSON and compared with
+# tests/benchmarks/baseline.json; the exit code is 1 when a metric is worse
+# than the baseline by more than --tolerance. Tail latencies move more from
+# run to run: p95 values gate with the wider --p95-tolerance, p99 values only
+# with --strict, since a few hundred frames give them a handful of samples.
+# Baselines are machine specific: refresh them on the CI machine with
+# --update-baseline in a fresh environment installed from requirements.txt
+# (machine.opencv_packages lists the OpenCV builds that were installed). No
+# recorded visitor footage ships with the repository, so the committed
+# baseline is synthetic; exhibits can baseline their own calibration clips
+# (cache/calibration) with --clip.
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from importlib import metadata
+
+# No sound card or display on CI machines
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'app'))
+
+import cv2
+import numpy as np
+
+from detector_registry import REGISTRY
+from frame_bundle import FrameBundle
+from settings import load_detection_settings, load_display_settings, save_settings
+from settings import DETECTION_SETTINGS_FILE, DISPLAY_SETTINGS_FILE
+from visit_engine import VisitEngine
+
+BASELINE_FILE = os.path.join(TESTS_DIR, 'benchmarks', 'baseline.json')
+RESULTS_VERSION = 1
+
+# A metric only counts as a regression once it also moved by at least this
+# much, so sub-millisecond noise on cheap stages does not fail the run
+MIN_DELTA = {'_ms': 1.0, '_mb': 25.0, '_fps': 1.0, '_s': 0.5}
+
+
+def synthetic_frames(count, width=640, height=480, seed=7):
+    """A textured room with a face-like figure walking in and approaching"""
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur((rng.random((height, width, 3)) * 180).astype(np.uint8), (15, 15), 0)
+    for index in range(count):
+        frame = background.copy()
+        noise = rng.integers(-3, 4, frame.shape, dtype=np.int16)
+        frame = np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+        phase = (index % 150) / 150.0
+        if phase > 0.2:
+            # Walks to the centre, then grows as it comes closer
+            x = int(width * min(0.5, (phase - 0.2) * 1.5))
+            scale = 1.0 + max(0.0, phase - 0.55) * 2.0
+            cx, cy = x + int(width * 0.25), height // 2
+            rx, ry = int(40 * scale), int(55 * scale)
+            cv2.ellipse(frame, (cx, cy + ry * 3), (rx * 2, ry * 2), 0, 0, 360, (90, 60, 40), -1)
+            cv2.ellipse(frame, (cx, cy), (rx, ry), 0, 0, 360, (150, 180, 220), -1)
+            for side in (-1, 1):
+                cv2.circle(frame, (cx + side * rx // 2, cy - ry // 5), max(2, rx // 8), (40, 30, 30), -1)
+            mouth = max(2, int(ry / 6 * (1 + math.sin(index / 3.0))))
+            cv2.ellipse(frame, (cx, cy + ry // 2), (rx // 3, mouth), 0, 0, 360, (60, 40, 120), -1)
+        yield frame
+
+
+def clip_frames(paths, count):
+    """Frames of the given clips in order, looping until count frames were read"""
+    produced = 0
+    while produced < count:
+        read_any = False
+        for path in paths:
+            capture = cv2.VideoCapture(path)
+            while produced < count:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                read_any = True
+                produced += 1
+                yield frame
+            capture.release()
+        if not read_any:
+            raise IOError(f"No frames could be read from {', '.join(paths)}")
+
+
+def write_media(directory, categories):
+    """A short solid-colour clip and a tone per media category"""
+    media_config = {}
+    for index, category in enumerate(categories):
+        colour = tuple(int(value) for value in np.random.default_rng(index).integers(0, 255, 3))
+        video_path = os.path.join(directory, f"{category}.mp4")
+        writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), 30, (320, 180))
+        frame = np.zeros((180, 320, 3), dtype=np.uint8)
+        frame[:] = colour
+        for _ in range(30):
+            writer.write(frame)
+        writer.release()
+
+        audio_path = os.path.join(directory, f"{category}.wav")
+        samples = (np.sin(np.arange(22050) * 2 * np.pi * (220 + 40 * index) / 22050) * 8000).astype(np.int16)
+        with wave.open(audio_path, 'wb') as audio:
+            audio.setnchannels(1)
+            audio.setsampwidth(2)
+            audio.setframerate(22050)
+            audio.writeframes(samples.tobytes())
+        media_config[category] = {'image': None, 'video': video_path, 'audio': audio_path}
+
+    config_path = os.path.join(directory, 'media_config.json')
+    with open(config_path, 'w') as f:
+        json.dump(media_config, f, indent=4)
+    return config_path
+
+
+def write_settings(directory, mode, gated):
+    """Settings for the run: the configured ones, minus device and cache use"""
+    detection = load_detection_settings()
+    detection['detection_mode'] = mode
+    detection['warm_up_models'] = False
+    if not gated:
+        # Every detector on every frame, so each one gets a full sample
+        detection['scheduler']['enabled'] = False
+    display = load_display_settings()
+    display['normalized_media']['enabled'] = False
+    display['video']['prerender']['enabled'] = False
+    save_settings(DETECTION_SETTINGS_FILE, detection, directory)
+    save_settings(DISPLAY_SETTINGS_FILE, display, directory)
+
+
+def percentiles(samples, prefix):
+    if not samples:
+        return {}
+    values = np.asarray(samples) * 1000.0
+    p50, p95, p99 = np.percentile(values, (50, 95, 99))
+    return {f"{prefix}.p50_ms": float(p50), f"{prefix}.p95_ms": float(p95), f"{prefix}.p99_ms": float(p99)}
+
+
+def opencv_packages():
+    """Installed OpenCV distributions; several of them share the cv2 package"""
+    packages = {}
+    for distribution in metadata.distributions():
+        name = distribution.metadata['Name'] or ''
+        if name.lower().startswith('opencv'):
+            packages[name.lower()] = distribution.version
+    return dict(sorted(packages.items()))
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+
+
+class Benchmark:
+    """Drives a VisitEngine with recorded or synthetic frames"""
+
+    def __init__(self, settings_dir, media_config):
+        self.engine = VisitEngine(config_dir=settings_dir)
+        self.engine.log_info = lambda message: None
+        self.engine.load_media_config(media_config, preload=False)
+        self.timings = {}
+
+    def timed(self, name, function):
+        samples = self.timings.setdefault(name, [])
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+        return wrapper
+
+    def prepare(self):
+        engine = self.engine
+        start = time.perf_counter()
+        engine.ensure_audio()
+        engine.media_cache.preload(engine.media_config)
+        engine.update_active_detectors(wait=True)
+        for name in engine.active_detectors:
+            detector = engine.detectors[name]
+            detector.process = self.timed(f"detector.{name}", detector.process)
+        engine.video_engine.prepare(engine.video_paths())
+        return time.perf_counter() - start
+
+    def run_frames(self, frames, warm_up):
+        engine = self.engine
+        engine.play_media('default')
+        capture = self.timed('stage.capture', lambda frame: FrameBundle(cv2.flip(frame, 1)))
+        detect = self.timed('stage.detection', engine.detect_frame)
+        present = self.timed('stage.presentation', engine.present_frame)
+
+        count = 0
+        measured_from = None
+        for frame in frames:
+            if count == warm_up:
+                # Drop model initialization from the latency samples
+                for samples in self.timings.values():
+                    del samples[:]
+                measured_from = time.perf_counter()
+            bundle = capture(frame)
+            states = detect(bundle)
+            present(bundle, states)
+            count += 1
+        elapsed = time.perf_counter() - measured_from if measured_from else 0.0
+        measured = count - warm_up
+        return measured, measured / elapsed if elapsed > 0 else 0.0
+
+    def run_switches(self, count, timeout=2.0):
+        """Trigger-to-first-frame time of the video after forced category switches"""
+        engine = self.engine
+        categories = [category for category in engine.media_config if category != engine.active_media]
+        latencies = []
+        for index in range(count):
+            category = categories[index % len(categories)]
+            if category == engine.active_media:
+                continue
+            previous = engine.video_engine.last_frame
+            start = time.perf_counter()
+            engine.play_media(category, start)
+            while time.perf_counter() - start < timeout:
+                frame = engine.video_engine.frame_at()
+                if frame is not None and frame is not previous:
+                    latencies.append(time.perf_counter() - start)
+                    break
+                time.sleep(0.001)
+            # Let the clip settle the way a visitor would see it
+            time.sleep(0.05)
+        return latencies
+
+    def close(self):
+        self.engine.shutdown()
+
+
+def run(args):
+    work_dir = tempfile.mkdtemp(prefix='visit-benchmark-')
+    try:
+        write_settings(work_dir, args.mode, args.gated)
+        media_config = write_media(work_dir, REGISTRY.media_categories())
+        if args.clip:
+            frames = clip_frames(args.clip, args.frames + args.warm_up)
+            source = [os.path.basename(path) for path in args.clip]
+        else:
+            frames = synthetic_frames(args.frames + args.warm_up)
+            source = ['synthetic']
+
+        benchmark = Benchmark(work_dir, media_config)
+        try:
+            load_seconds = benchmark.prepare()
+            measured, fps = benchmark.run_frames(frames, args.warm_up)
+            switch_latencies = benchmark.run_switches(args.switches)
+            audio = benchmark.engine.audio_engine.get_stats()
+            pipeline_detectors = list(benchmark.engine.active_detectors)
+        finally:
+            benchmark.close()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    metrics = {'end_to_end_fps': fps, 'peak_rss_mb': peak_rss_mb(), 'model_load_s': load_seconds}
+    for name in sorted(benchmark.timings):
+        metrics.update(percentiles(benchmark.timings[name], name))
+    metrics.update(percentiles(switch_latencies, 'media_switch.video'))
+    if audio['switches_measured']:
+        metrics['media_switch.audio.mean_ms'] = audio['latency_ms']
+        metrics['media_switch.audio.p95_ms'] = audio['latency_p95_ms']
+
+    return {
+        'version': RESULTS_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'machine': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cpus': os.cpu_count(),
+            'opencv': cv2.__version__,
+            'opencv_packages': opencv_packages(),
+            'mediapipe': metadata.version('mediapipe'),
+            'numpy': np.__version__
+        },
+        'source': source,
+        'frames': measured,
+        'mode': args.mode,
+        'gated': args.gated,
+        'detectors': pipeline_detectors,
+        'metrics': metrics
+    }
+
+
+def run_isolated(args):
+    """run() in a fresh process, so every repeat loads the models and grows memory from cold"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(run, args).result()
+
+
+def min_delta(name):
+    for suffix, delta in MIN_DELTA.items():
+        if name.endswith(suffix):
+            return delta
+    return 0.0
+
+
+def median_results(runs):
+    """The last run's results with every metric replaced by its median over the runs"""
+    results = dict(runs[-1])
+    names = set.intersection(*(set(run['metrics']) for run in runs))
+    results['metrics'] = {name: float(np.median([run['metrics'][name] for run in runs]))
+                          for name in sorted(names)}
+    results['repeats'] = len(runs)
+    return results
+
+
+def compare(results, baseline, tolerance, p95_tolerance=None, strict=False):
+    """Metrics worse than the baseline by more than tolerance; FPS is higher-is-better
+
+    p95 values are allowed p95_tolerance (twice tolerance by default); p99
+    values are only compared with strict, against the same wider band.
+    """
+    if p95_tolerance is None:
+        p95_tolerance = 2 * tolerance
+    regressions = []
+    for name, value in sorted(results['metrics'].items()):
+        reference = baseline['metrics'].get(name)
+        if reference is None or (name.endswith('.p99_ms') and not strict):
+            continue
+        allowed = p95_tolerance if name.endswith(('.p95_ms', '.p99_ms')) else tolerance
+        higher_is_better = name.endswith('_fps')
+        change = reference - value if higher_is_better else value - reference
+        if change > reference * allowed and change > min_delta(name):
+            regressions.append((name, reference, value))
+    return regressions
+
+
+def print_results(results):
+    print(f"VISIT Detection Benchmark: {results['frames']} frames from {', '.join(results['source'])} "
+          f"({results['mode']}, detectors: {', '.join(results['detectors'])}), "
+          f"median of {results.get('repeats', 1)} runs")
+    for name, value in sorted(results['metrics'].items()):
+        print(f"  {name:<40} {value:10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the VISIT detection path")
+    parser.add_argument('--clip', action='append', help="recorded clip to replay (repeatable)")
+    parser.add_argument('--frames', type=int, default=300, help="frames to measure")
+    parser.add_argument('--warm-up', type=int, default=10, help="frames run before measuring")
+    parser.add_argument('--switches', type=int, default=20, help="forced media switches to time")
+    parser.add_argument('--mode', choices=('serial', 'parallel'), default='serial')
+    parser.add_argument('--gated', action='store_true',
+                        help="keep the detector scheduler's gating instead of running every detector")
+    parser.add_argument('--output', help="write the results JSON here")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="baseline JSON to compare against")
+    parser.add_argument('--repeats', type=int, default=3, help="runs to take the median of (default 3)")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative regression before failing (default 0.25)")
+    parser.add_argument('--p95-tolerance', type=float,
+                        help="allowed relative regression of p95 latencies (default twice --tolerance)")
+    parser.add_argument('--strict', action='store_true', help="also fail on p99 regressions")
+    parser.add_argument('--update-baseline', action='store_true', help="store these results as the baseline")
+    args = parser.parse_args(argv)
+
+    results = median_results([run_isolated(args) for _ in range(max(1, args.repeats))])
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with; run with --update-baseline to create one")
+        return 0
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    recorded_on = baseline.get('machine') or {}
+    for key, value in results['machine'].items():
+        if key in recorded_on and recorded_on[key] != value:
+            print(f"Note: the baseline was recorded with {key} {recorded_on[key]}, this run has {value}")
+    if baseline.get('source') != results['source']:
+        print(f"Note: the baseline was recorded from {', '.join(baseline.get('source') or ['another source'])}")
+    p95_tolerance = 2 * args.tolerance if args.p95_tolerance is None else args.p95_tolerance
+    regressions = compare(results, baseline, args.tolerance, p95_tolerance, args.strict)
+    if regressions:
+        print(f"Regressions beyond {args.tolerance:.0%} ({p95_tolerance:.0%} for p95):")
+        for name, reference, value in regressions:
+            print(f"  {name}: {reference:.2f} -> {value:.2f}")
+        return 1
+    print(f"No regressions beyond {args.tolerance:.0%} ({p95_tolerance:.0%} for p95) against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
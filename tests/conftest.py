@@ -0,0 +1,9 @@
+# Shared pytest setup: the app modules import each other by plain name, the
+# way they do when run from the app folder; the tools in scripts/ are
+# imported the same way
+import os
+import sys
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scripts'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'app'))
@@ -0,0 +1,44 @@
+# Benchmark Gate Tests
+# Median of repeated runs and the tolerance bands of the regression check
+
+from benchmark import compare, median_results
+
+
+def results(**metrics):
+    return {'metrics': metrics, 'frames': 300}
+
+
+def test_median_of_repeated_runs():
+    runs = [results(**{'stage.detection.p50_ms': value, 'end_to_end_fps': 20.0}) for value in (10.0, 30.0, 12.0)]
+    runs[1]['metrics']['only_once_ms'] = 1.0
+    merged = median_results(runs)
+    assert merged['metrics'] == {'end_to_end_fps': 20.0, 'stage.detection.p50_ms': 12.0}
+    assert merged['repeats'] == 3
+
+
+def test_p50_gates_at_the_tolerance():
+    baseline = results(**{'detector.hands.p50_ms': 20.0})
+    assert compare(results(**{'detector.hands.p50_ms': 24.0}), baseline, 0.25) == []
+    assert compare(results(**{'detector.hands.p50_ms': 26.0}), baseline, 0.25) == [
+        ('detector.hands.p50_ms', 20.0, 26.0)]
+
+
+def test_p95_has_a_wider_band():
+    baseline = results(**{'detector.hands.p95_ms': 20.0})
+    assert compare(results(**{'detector.hands.p95_ms': 29.0}), baseline, 0.25) == []
+    assert compare(results(**{'detector.hands.p95_ms': 31.0}), baseline, 0.25) != []
+    assert compare(results(**{'detector.hands.p95_ms': 29.0}), baseline, 0.25, p95_tolerance=0.3) != []
+
+
+def test_p99_only_gates_when_strict():
+    baseline = results(**{'detector.hands.p99_ms': 20.0})
+    current = results(**{'detector.hands.p99_ms': 60.0})
+    assert compare(current, baseline, 0.25) == []
+    assert compare(current, baseline, 0.25, strict=True) != []
+
+
+def test_fps_is_higher_is_better_and_small_changes_pass():
+    baseline = results(end_to_end_fps=20.0, **{'detector.movement.p50_ms': 0.4})
+    assert compare(results(end_to_end_fps=30.0, **{'detector.movement.p50_ms': 0.9}), baseline, 0.25) == []
+    assert compare(results(end_to_end_fps=14.0, **{'detector.movement.p50_ms': 0.4}), baseline, 0.25) == [
+        ('end_to_end_fps', 20.0, 14.0)]
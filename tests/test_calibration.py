@@ -0,0 +1,128 @@
+# Calibration Tests
+# Scoring and replaying threshold combinations over synthetic model outputs
+
+import copy
+
+import numpy as np
+import pytest
+
+from calibration import MOTION_VAR_THRESHOLDS, SWEEPS
+from calibration import apply_params, current_params, grid_points, replay, score_params, scored
+from settings import DEFAULT_DETECTION_SETTINGS
+
+
+def make_settings(**signals):
+    settings = copy.deepcopy(DEFAULT_DETECTION_SETTINGS)
+    settings['signals'].update(smoothing='none', **signals)
+    return settings
+
+
+def make_clip(count, face_score=0.9, face_area=0.2, motion=0.0):
+    return {
+        'face_score': np.full(count, face_score),
+        'face_area': np.full(count, face_area),
+        'ear': np.full(count, np.nan),
+        'mar': np.full(count, np.nan),
+        'motion': np.full((count, len(MOTION_VAR_THRESHOLDS)), motion)
+    }
+
+
+def test_scored_is_balanced_accuracy():
+    predictions = np.array([True, True, False, False, True])
+    labels = np.array([1, 1, 0, 0, 0])
+    assert scored(predictions, labels) == pytest.approx(0.5 * (1.0 + 2 / 3.0))
+
+
+def test_scored_ignores_unjudged_frames():
+    predictions = np.array([True, False, True])
+    assert scored(predictions, np.array([1, 0, -1])) == 1.0
+
+
+def test_scored_needs_both_positives_and_negatives():
+    predictions = np.array([True, False])
+    assert scored(predictions, np.array([1, 1])) is None
+    assert scored(predictions, np.array([0, -1])) is None
+
+
+def test_motion_replay_picks_the_variance_column():
+    clip = make_clip(4)
+    column = MOTION_VAR_THRESHOLDS.index(25)
+    clip['motion'][:, column] = [np.nan, 0.005, 0.02, 0.05]
+    predictions = replay('motion', {'threshold': 0.01, 'var_threshold': 25}, [clip], make_settings())
+    # Frames still warming up (NaN) never count as movement
+    assert predictions['movement'].tolist() == [False, False, True, True]
+    predictions = replay('motion', {'threshold': 0.01, 'var_threshold': 12}, [clip], make_settings())
+    assert not predictions['movement'].any()
+
+
+def test_face_replay_concatenates_the_clips():
+    clips = [make_clip(2, face_score=0.5), make_clip(3, face_score=0.8)]
+    predictions = replay('face', {'min_detection_confidence': 0.6}, clips, make_settings())
+    assert predictions['face'].tolist() == [False, False, True, True, True]
+
+
+def test_approach_replay_uses_both_ratios():
+    clip = make_clip(12)
+    clip['face_area'][6:] = 0.25
+    params = {'trend_window': 3, 'approach_ratio': 1.1, 'recede_ratio': 0.9}
+    predictions = replay('approach', params, [clip], make_settings())
+    assert predictions['face_approaching'].tolist() == [False] * 7 + [True] * 3 + [False] * 2
+    assert not predictions['face_receding'].any()
+
+    clip['face_area'][6:] = 0.16
+    predictions = replay('approach', params, [clip], make_settings())
+    assert predictions['face_receding'].tolist() == [False] * 7 + [True] * 3 + [False] * 2
+    assert not predictions['face_approaching'].any()
+    predictions = replay('approach', dict(params, recede_ratio=0.75), [clip], make_settings())
+    assert not predictions['face_receding'].any()
+
+
+def test_approach_replay_skips_frames_without_a_face():
+    clip = make_clip(12, face_area=0.2)
+    clip['face_area'][6:] = 0.25
+    # Weak detections fall below the face threshold and never reach the track
+    clip['face_score'][6:] = 0.4
+    params = {'trend_window': 3, 'approach_ratio': 1.1, 'recede_ratio': 0.9}
+    predictions = replay('approach', params, [clip], make_settings())
+    assert not predictions['face_approaching'].any()
+
+
+def test_lip_replay_measures_spread():
+    clip = make_clip(8)
+    clip['mar'][:] = [0.2, 0.2, 0.2, 0.2, 0.2, 0.4, 0.1, 0.4]
+    params = {'lip_window': 4, 'lip_change': 0.03}
+    assert replay('lips', params, [clip], make_settings())['lip_movement'].tolist() == \
+        [False] * 5 + [True] * 3
+
+
+def test_score_params_averages_the_judged_states():
+    clip = make_clip(4)
+    clip['motion'][:, 0] = [0.0, 0.0, 0.05, 0.05]
+    labels = {'movement': np.array([0, 0, 1, 1])}
+    params = {'threshold': 0.01, 'var_threshold': MOTION_VAR_THRESHOLDS[0]}
+    assert score_params('motion', params, [clip], labels, make_settings()) == (params, 1.0)
+    labels = {'movement': np.full(4, -1)}
+    assert score_params('motion', params, [clip], labels, make_settings()) == (params, None)
+
+
+def test_grid_points_cover_every_combination():
+    points = grid_points('approach')
+    grid = SWEEPS['approach']['grid']
+    assert len(points) == len(grid['trend_window']) * len(grid['approach_ratio']) * len(grid['recede_ratio'])
+    assert {'trend_window': 2, 'approach_ratio': 1.3, 'recede_ratio': 0.77} in points
+    motion = grid_points('motion')
+    assert len(motion) == len(SWEEPS['motion']['grid']['threshold']) * len(MOTION_VAR_THRESHOLDS)
+
+
+def test_current_params_snap_to_the_grid_and_apply_back():
+    settings = make_settings()
+    settings['motion']['var_threshold'] = 30
+    assert current_params('motion', settings) == {'threshold': 0.01, 'var_threshold': 25}
+    assert current_params('approach', settings) == {'trend_window': 3, 'approach_ratio': 1.1,
+                                                    'recede_ratio': 0.9}
+
+    apply_params(settings, 'face', {'min_detection_confidence': 0.5})
+    apply_params(settings, 'approach', {'trend_window': 5, 'approach_ratio': 1.2, 'recede_ratio': 0.8})
+    assert settings['models']['face_detection']['min_detection_confidence'] == 0.5
+    assert current_params('approach', settings) == {'trend_window': 5, 'approach_ratio': 1.2,
+                                                    'recede_ratio': 0.8}
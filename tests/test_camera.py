@@ -0,0 +1,58 @@
+# Camera Capture Tests
+# Source classification and releasing the device while the reader reconnects
+
+import threading
+
+import numpy as np
+
+from camera import DEVICE, FILE, STREAM, CameraSource, fourcc_name, source_kind
+
+
+class FakeCapture:
+    def __init__(self):
+        self.released = False
+
+    def read(self):
+        return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+    def release(self):
+        self.released = True
+
+
+def test_source_kind():
+    assert source_kind(0) == DEVICE
+    assert source_kind(' 1 ') == DEVICE
+    assert source_kind('rtsp://camera/stream') == STREAM
+    assert source_kind('clips/hall.mp4') == FILE
+
+
+def test_fourcc_name():
+    assert fourcc_name(0x47504A4D) == 'MJPG'
+    assert fourcc_name(0) == ''
+
+
+def test_capture_opened_after_release_is_not_kept(monkeypatch):
+    camera = CameraSource('rtsp://camera/stream')
+    opening = threading.Event()
+    finish_open = threading.Event()
+    late = FakeCapture()
+
+    def slow_open():
+        opening.set()
+        finish_open.wait(5)
+        return late
+
+    monkeypatch.setattr(camera, '_open_capture', slow_open)
+    # The reader starts without a device, as after a dropped connection
+    camera._thread = threading.Thread(target=camera._reader_loop, daemon=True)
+    camera._thread.start()
+    reader = camera._thread
+    assert opening.wait(5)
+    # Gives up waiting for the reader, which is still inside _open_capture
+    monkeypatch.setattr(reader, 'join', lambda timeout=None: None)
+    camera.release()
+    finish_open.set()
+    threading.Thread.join(reader, 5)
+    assert not reader.is_alive()
+    assert late.released
+    assert camera.capture is None
@@ -0,0 +1,50 @@
+# Detection State Model Tests
+# Edge diffing between the detection thread and the status labels
+
+from detection_model import DetectionStateModel
+
+
+def make_model():
+    return DetectionStateModel({'face': False, 'movement': False})
+
+
+def test_first_drain_shows_every_state():
+    model = make_model()
+    assert model.drain_changes() == {'face': False, 'movement': False}
+    assert model.drain_changes() == {}
+
+
+def test_update_returns_only_edges():
+    model = make_model()
+    assert model.update({'face': True, 'movement': False}) == {'face': True}
+    assert model.update({'face': True, 'movement': False}) == {}
+    assert model.update({'face': False, 'movement': True}) == {'face': False, 'movement': True}
+    assert model.transitions == 3
+
+
+def test_frames_between_drains_collapse_to_one_update():
+    model = make_model()
+    model.drain_changes()
+    for _ in range(5):
+        model.update({'face': True, 'movement': False})
+    assert model.drain_changes() == {'face': True}
+    assert model.drain_changes() == {}
+    assert model.ui_updates == 2
+
+
+def test_flicker_between_drains_is_not_reported():
+    model = make_model()
+    model.drain_changes()
+    model.update({'face': True})
+    model.update({'face': False})
+    assert model.drain_changes() == {}
+    assert model.transitions == 2
+
+
+def test_snapshot_is_a_copy():
+    model = make_model()
+    model.update({'movement': True})
+    snapshot = model.snapshot()
+    snapshot['movement'] = False
+    assert model.snapshot() == {'face': False, 'movement': True}
+    assert model.get_stats() == {'transitions': 1, 'ui_updates': 0}
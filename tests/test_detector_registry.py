@@ -0,0 +1,121 @@
+# Detector Registry Tests
+# Which detectors a media configuration needs, and the registry's derived tables
+
+import copy
+from types import SimpleNamespace
+
+import pytest
+
+from detector_registry import Detector, DetectorRegistry, FaceDetector, resolve_active_detectors
+from settings import DEFAULT_DETECTION_SETTINGS
+
+
+class Movement(Detector):
+    name = 'movement'
+    cost = 1
+    inputs = ('gray',)
+    outputs = (('movement', 'movement_detection', 7),)
+
+
+class Face(Detector):
+    name = 'face_detection'
+    cost = 10
+    inputs = ('rgb',)
+    outputs = (('face', 'face_detection', 1), ('approaching', 'approaching', 2))
+
+
+class Smile(Detector):
+    name = 'face_mesh'
+    cost = 20
+    inputs = ('rgb', 'face')
+    outputs = (('smile', 'smile_detection', 3),)
+
+
+def make_detectors():
+    return {cls.name: cls({}) for cls in (Movement, Face, Smile)}
+
+
+def media(*categories):
+    return {category: {'image': f'{category}.jpg', 'video': None, 'audio': None}
+            for category in categories}
+
+
+def test_every_detector_is_active_without_trigger_media():
+    detectors = make_detectors()
+    assert resolve_active_detectors(detectors, {}) == list(detectors)
+    assert resolve_active_detectors(detectors, media('default')) == list(detectors)
+
+
+def test_only_detectors_with_media_are_active():
+    detectors = make_detectors()
+    assert resolve_active_detectors(detectors, media('movement_detection')) == ['movement']
+
+
+def test_any_output_with_media_activates_the_detector():
+    detectors = make_detectors()
+    assert resolve_active_detectors(detectors, media('approaching')) == ['face_detection']
+
+
+def test_state_inputs_pull_in_their_producer():
+    detectors = make_detectors()
+    assert resolve_active_detectors(detectors, media('smile_detection')) == ['face_detection', 'face_mesh']
+
+
+def test_scheduler_gates_pull_in_their_producer():
+    detectors = make_detectors()
+    active = resolve_active_detectors(detectors, media('face_detection'),
+                                      extra_inputs={'face_detection': ['movement']})
+    assert active == ['movement', 'face_detection']
+
+
+def test_empty_media_entries_do_not_count():
+    detectors = make_detectors()
+    config = {'movement_detection': {'image': None, 'video': '', 'audio': None}}
+    assert resolve_active_detectors(detectors, config) == list(detectors)
+
+
+def test_registry_tables():
+    registry = DetectorRegistry()
+    for cls in (Smile, Face, Movement):
+        registry.register(cls)
+    assert list(registry.create({})) == ['movement', 'face_detection', 'face_mesh']
+    assert registry.media_categories() == ['default', 'smile_detection', 'face_detection',
+                                           'approaching', 'movement_detection']
+    assert registry.priority_order() == ['face', 'approaching', 'smile', 'movement']
+    assert registry.trigger_media()['approaching'] == 'approaching'
+    assert registry.detection_states() == {'smile': False, 'face': False,
+                                           'approaching': False, 'movement': False}
+
+
+def test_duplicate_names_are_rejected():
+    registry = DetectorRegistry()
+    registry.register(Face)
+    with pytest.raises(ValueError):
+        registry.register(Face)
+
+
+def face_result(area):
+    box = SimpleNamespace(width=area, height=1.0)
+    return SimpleNamespace(detections=[SimpleNamespace(location_data=SimpleNamespace(relative_bounding_box=box))])
+
+
+def face_states(areas, **signals):
+    settings = copy.deepcopy(DEFAULT_DETECTION_SETTINGS)
+    settings['signals'].update(smoothing='none', trend_window=3, **signals)
+    detector = FaceDetector(settings)
+    for area in areas:
+        states = {'face': False, 'face_approaching': False, 'face_receding': False}
+        detector.interpret(face_result(area), states)
+    return states
+
+
+def test_face_approach_and_recede_use_their_own_ratios():
+    steady = [0.2] * 3
+    assert face_states(steady + [0.25] * 3)['face_approaching']
+    assert face_states(steady + [0.17] * 3)['face_receding']
+    assert not face_states(steady + [0.17] * 3, recede_ratio=0.8)['face_receding']
+    # A strict approach band leaves the recede band alone
+    states = face_states(steady + [0.17] * 3, approach_ratio=2.5)
+    assert states['face_receding'] and not states['face_approaching']
+    states = face_states(steady * 2, approach_ratio=2.5)
+    assert states['face'] and not states['face_receding'] and not states['face_approaching']
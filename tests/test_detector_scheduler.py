@@ -0,0 +1,91 @@
+# Detector Scheduler Tests
+# Gating behind cheap triggers, keep-alive windows and per-detector stride
+
+from detector_scheduler import DetectorScheduler, HOLD, IDLE, RUN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(detectors, enabled=True):
+    clock = FakeClock()
+    return DetectorScheduler({'enabled': enabled, 'detectors': detectors}, clock=clock), clock
+
+
+def test_ungated_detector_always_runs():
+    scheduler, clock = make_scheduler({'face_detection': {'stride': 1}})
+    scheduler.begin_frame()
+    assert scheduler.decide('face_detection') == RUN
+    assert scheduler.decide('unconfigured') == RUN
+
+
+def test_gated_detector_idles_until_its_gate_fires():
+    scheduler, clock = make_scheduler({'pose': {'gate': ['movement'], 'keep_alive': 2.0}})
+    scheduler.begin_frame()
+    assert scheduler.decide('pose') == IDLE
+    scheduler.record('movement', False)
+    assert scheduler.decide('pose') == IDLE
+    scheduler.record('movement', True)
+    assert scheduler.decide('pose') == RUN
+
+
+def test_keep_alive_window_expires():
+    scheduler, clock = make_scheduler({'pose': {'gate': ['movement'], 'keep_alive': 2.0}})
+    scheduler.begin_frame()
+    scheduler.record('movement', True)
+    clock.now = 2.0
+    scheduler.begin_frame()
+    assert scheduler.decide('pose') == RUN
+    clock.now = 2.5
+    scheduler.begin_frame()
+    assert scheduler.decide('pose') == IDLE
+
+
+def test_own_result_keeps_the_detector_alive():
+    scheduler, clock = make_scheduler({'face_mesh': {'gate': ['face'], 'keep_alive': 1.0}})
+    scheduler.begin_frame()
+    scheduler.record('face', True)
+    clock.now = 0.8
+    scheduler.begin_frame()
+    scheduler.record('face_mesh', True)
+    clock.now = 1.5
+    scheduler.begin_frame()
+    assert scheduler.decide('face_mesh') == RUN
+
+
+def test_stride_holds_between_runs():
+    scheduler, clock = make_scheduler({'hands': {'stride': 3}})
+    decisions = []
+    for _ in range(7):
+        scheduler.begin_frame()
+        run, hold = scheduler.plan(['hands'])
+        decisions.append(RUN if run else HOLD if hold else IDLE)
+    assert decisions == [RUN, HOLD, HOLD, RUN, HOLD, HOLD, RUN]
+    assert scheduler.get_stats() == {'hands': {RUN: 3, HOLD: 4, IDLE: 0}}
+
+
+def test_plan_leaves_idle_detectors_out():
+    scheduler, clock = make_scheduler({'pose': {'gate': ['movement'], 'keep_alive': 2.0},
+                                       'face_detection': {}})
+    scheduler.begin_frame()
+    assert scheduler.plan(['face_detection', 'pose']) == (['face_detection'], [])
+
+
+def test_disabled_scheduler_runs_everything():
+    scheduler, clock = make_scheduler({'pose': {'stride': 4, 'gate': ['movement']}}, enabled=False)
+    for _ in range(3):
+        scheduler.begin_frame()
+        assert scheduler.plan(['pose']) == (['pose'], [])
+
+
+def test_reset_idles_gated_detectors():
+    scheduler, clock = make_scheduler({'pose': {'gate': ['movement'], 'keep_alive': 2.0}})
+    scheduler.begin_frame()
+    scheduler.record('movement', True)
+    scheduler.reset()
+    assert scheduler.decide('pose') == IDLE
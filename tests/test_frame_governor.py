@@ -0,0 +1,69 @@
+# Frame-Rate Governor Tests
+# Deadline pacing, skipped frames and statistics with a fake clock
+
+from frame_governor import FrameRateGovernor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_governor(fps=10):
+    clock = FakeClock()
+    return FrameRateGovernor(fps, clock=clock, sleep=clock.sleep), clock
+
+
+def test_sleeps_until_the_next_deadline():
+    governor, clock = make_governor()
+    assert governor.wait() == 0
+    clock.now = 0.04
+    assert governor.wait() == 0
+    assert abs(clock.now - 0.1) < 1e-9
+
+
+def test_missed_deadlines_are_skipped_not_caught_up():
+    governor, clock = make_governor()
+    governor.wait()
+    clock.now = 0.35
+    assert governor.wait() == 2
+    assert governor.skipped_frames == 2
+    assert governor.late_frames == 1
+    # Realigned to now: the next frame is one interval later, not a burst
+    governor.wait()
+    assert abs(clock.now - 0.45) < 1e-9
+
+
+def test_achieved_fps_and_jitter():
+    governor, clock = make_governor()
+    for _ in range(5):
+        governor.wait()
+    assert abs(governor.achieved_fps() - 10.0) < 1e-6
+    assert governor.jitter_ms() < 1e-6
+
+
+def test_reanchor_keeps_the_statistics():
+    governor, clock = make_governor()
+    for _ in range(4):
+        governor.wait()
+    fps = governor.achieved_fps()
+    governor.reanchor()
+    clock.now += 5.0
+    # The idle gap is neither a skipped frame nor a frame interval
+    assert governor.wait() == 0
+    assert governor.skipped_frames == 0
+    assert governor.achieved_fps() == fps
+
+
+def test_reset_clears_the_statistics():
+    governor, clock = make_governor()
+    for _ in range(4):
+        governor.wait()
+    governor.reset()
+    assert governor.achieved_fps() == 0.0
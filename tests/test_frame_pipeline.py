@@ -0,0 +1,52 @@
+# Frame Pipeline Tests
+# The bounded stage queues that hand frames between the pipeline threads
+
+import threading
+
+from frame_pipeline import StageQueue
+
+
+def test_latest_frame_slot_drops_the_oldest():
+    queue = StageQueue('detection')
+    queue.put(1)
+    queue.put(2)
+    queue.put(3)
+    assert queue.get(timeout=0) == 3
+    assert queue.stats() == {'depth': 0, 'capacity': 1, 'received': 3, 'dropped': 2}
+
+
+def test_bounded_queue_keeps_the_newest_in_order():
+    queue = StageQueue('presentation', capacity=3)
+    for item in range(5):
+        queue.put(item)
+    assert queue.depth() == 3
+    assert [queue.get(timeout=0) for _ in range(3)] == [2, 3, 4]
+    assert queue.drop_count == 2
+
+
+def test_capacity_is_at_least_one():
+    assert StageQueue('detection', capacity=0).capacity == 1
+
+
+def test_get_times_out_empty():
+    assert StageQueue('detection').get(timeout=0.01) is None
+
+
+def test_get_wakes_on_put():
+    queue = StageQueue('detection')
+    timer = threading.Timer(0.05, queue.put, args=('frame',))
+    timer.start()
+    try:
+        assert queue.get(timeout=5) == 'frame'
+    finally:
+        timer.cancel()
+
+
+def test_clear_does_not_count_as_dropped():
+    queue = StageQueue('detection', capacity=2)
+    queue.put(1)
+    queue.put(2)
+    queue.clear()
+    assert queue.depth() == 0
+    assert queue.drop_count == 0
+    assert queue.put_count == 2
@@ -0,0 +1,96 @@
+# Frame Store Tests
+# Building, reusing and invalidating pre-rendered clips, and the size cap
+
+import os
+
+import cv2
+import numpy as np
+
+from frame_store import FrameStore, MemmapClipPlayer
+
+DISPLAY = (64, 48)
+
+
+def write_clip(path, frames=6, brightness=0):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 10, DISPLAY)
+    for index in range(frames):
+        writer.write(np.full((DISPLAY[1], DISPLAY[0], 3), brightness + 20 * index, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def make_store(tmp_path, **kwargs):
+    messages = []
+    store = FrameStore(str(tmp_path / 'frames'), DISPLAY, log=messages.append, **kwargs)
+    return store, messages
+
+
+def test_frames_are_stored_at_reduced_width(tmp_path):
+    store, _ = make_store(tmp_path, max_width=32)
+    clip = store.ensure(write_clip(tmp_path / 'clip.avi'))
+    assert store.display_size == (32, 24)
+    assert clip.frames.shape == (6, 24, 32, 3)
+    assert clip.fps == 10
+
+
+def test_valid_clip_is_reused(tmp_path):
+    store, _ = make_store(tmp_path)
+    source = write_clip(tmp_path / 'clip.avi')
+    frames_path = store._paths(source)[0]
+    store.ensure(source)
+    built_at = os.stat(frames_path).st_mtime_ns
+    assert store.get(source) is not None
+    assert len(store.ensure(source)) == 6
+    assert os.stat(frames_path).st_mtime_ns == built_at
+
+
+def test_touched_source_with_the_same_content_stays_valid(tmp_path):
+    store, _ = make_store(tmp_path)
+    source = write_clip(tmp_path / 'clip.avi')
+    store.ensure(source)
+    stat = os.stat(source)
+    os.utime(source, (stat.st_atime, stat.st_mtime + 60))
+    assert store.get(source) is not None
+
+
+def test_replaced_source_is_rebuilt(tmp_path):
+    store, _ = make_store(tmp_path)
+    source = write_clip(tmp_path / 'clip.avi')
+    assert store.ensure(source).frames[0].mean() < 10
+    stat = os.stat(source)
+    write_clip(source, frames=4, brightness=120)
+    os.utime(source, (stat.st_atime, stat.st_mtime + 60))
+    assert store.get(source) is None
+    clip = store.ensure(source)
+    assert len(clip) == 4
+    assert clip.frames[0].mean() > 100
+
+
+def test_clip_over_the_size_cap_is_not_prerendered(tmp_path):
+    frame_mb = DISPLAY[0] * DISPLAY[1] * 3 / (1024 * 1024)
+    store, messages = make_store(tmp_path, max_mb=5 * frame_mb)
+    assert store.ensure(write_clip(tmp_path / 'clip.avi')) is None
+    assert store.used_bytes() == 0
+    assert 'not pre-rendering' in messages[0]
+
+
+def test_size_cap_counts_clips_already_stored(tmp_path):
+    frame_mb = DISPLAY[0] * DISPLAY[1] * 3 / (1024 * 1024)
+    store, _ = make_store(tmp_path, max_mb=10 * frame_mb)
+    assert store.ensure(write_clip(tmp_path / 'first.avi')) is not None
+    assert store.ensure(write_clip(tmp_path / 'second.avi')) is None
+
+
+def test_unreadable_source_is_logged(tmp_path):
+    store, messages = make_store(tmp_path)
+    assert store.ensure(str(tmp_path / 'missing.avi')) is None
+    assert 'cannot open' in messages[0]
+
+
+def test_player_loops_over_the_frames(tmp_path):
+    store, _ = make_store(tmp_path)
+    player = MemmapClipPlayer(store.ensure(write_clip(tmp_path / 'clip.avi', frames=3)))
+    frames = [player.pop_frame() for _ in range(4)]
+    assert frames[3] is not None and np.array_equal(frames[3], frames[0])
+    player.rewind()
+    assert np.array_equal(player.pop_frame(), frames[0])
@@ -0,0 +1,93 @@
+# Media Cache Tests
+# Letterboxing, LRU eviction under the byte budget and unavailable files
+
+import cv2
+import numpy as np
+
+from media_cache import MediaCache, fit_to_display
+
+DISPLAY = (40, 30)
+IMAGE_BYTES = DISPLAY[0] * DISPLAY[1] * 3
+
+
+def write_image(folder, name, colour=(0, 0, 255)):
+    path = str(folder / name)
+    image = np.zeros((60, 40, 3), dtype=np.uint8)
+    image[:] = colour
+    cv2.imwrite(path, image)
+    return path
+
+
+def make_cache(images, log=None):
+    budget_mb = images * IMAGE_BYTES / (1024 * 1024)
+    return MediaCache(budget_mb, DISPLAY, log=log or print)
+
+
+def test_fit_to_display_letterboxes():
+    image = np.full((60, 40, 3), 255, dtype=np.uint8)
+    fitted = fit_to_display(image, 40, 30)
+    assert fitted.shape == (30, 40, 3)
+    # 20 pixels wide after scaling, centred between black bars
+    assert fitted[:, 9].max() == 0 and fitted[:, 30].max() == 0
+    assert fitted[:, 10:30].min() == 255
+
+
+def test_images_are_decoded_once(tmp_path):
+    cache = make_cache(2)
+    path = write_image(tmp_path, 'red.png')
+    image = cache.get_image(path)
+    assert image.shape == (30, 40, 3)
+    # BGR on disk, RGB in the cache
+    assert image[15, 20].tolist() == [255, 0, 0]
+    assert cache.get_image(path) is image
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.used_bytes == IMAGE_BYTES
+
+
+def test_least_recently_used_is_evicted_first(tmp_path):
+    cache = make_cache(2)
+    first, second, third = (write_image(tmp_path, f'{name}.png') for name in ('a', 'b', 'c'))
+    cache.get_image(first)
+    cache.get_image(second)
+    cache.get_image(first)
+    cache.get_image(third)
+    assert cache.evictions == 1
+    assert cache.used_bytes == 2 * IMAGE_BYTES
+    stats = cache.get_stats()
+    cache.get_image(first)
+    assert cache.get_stats()['hits'] == stats['hits'] + 1
+    cache.get_image(second)
+    assert cache.get_stats()['misses'] == stats['misses'] + 1
+
+
+def test_entry_larger_than_the_budget_is_not_kept(tmp_path):
+    cache = make_cache(0.5)
+    path = write_image(tmp_path, 'big.png')
+    assert cache.get_image(path) is None
+    assert cache.used_bytes == 0
+
+
+def test_unreadable_file_is_logged_once(tmp_path):
+    messages = []
+    cache = make_cache(2, log=messages.append)
+    path = str(tmp_path / 'missing.png')
+    assert cache.get_image(path) is None
+    assert cache.get_image(path) is None
+    assert len(messages) == 1 and 'missing.png' in messages[0]
+
+
+def test_preload_retries_files_added_later(tmp_path):
+    cache = make_cache(2, log=lambda message: None)
+    path = str(tmp_path / 'late.png')
+    cache.get_image(path)
+    write_image(tmp_path, 'late.png')
+    cache.preload({'default': {'image': path, 'video': None, 'audio': None}})
+    assert cache.get_image(path) is not None
+
+
+def test_clear_releases_the_budget(tmp_path):
+    cache = make_cache(2)
+    cache.get_image(write_image(tmp_path, 'a.png'))
+    cache.clear()
+    assert cache.get_stats()['entries'] == 0
+    assert cache.used_bytes == 0
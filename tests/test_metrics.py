@@ -0,0 +1,69 @@
+# Metrics Tests
+# Histogram quantiles, counters and the Prometheus text output
+
+import math
+
+from metrics import Histogram, MetricsRegistry
+
+
+def test_quantile_interpolates_inside_the_bucket():
+    histogram = Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+    assert histogram.quantile(0.25) == 1.0
+    assert histogram.quantile(0.5) == 1.5
+    assert histogram.quantile(1.0) == 4.0
+
+
+def test_value_on_a_bound_counts_in_that_bucket():
+    histogram = Histogram(buckets=(1.0, 2.0))
+    histogram.observe(1.0)
+    counts, count, total = histogram.totals()
+    assert counts == [1, 0, 0]
+    assert count == 1
+    assert total == 1.0
+
+
+def test_quantile_above_the_last_bound_reports_the_last_bound():
+    histogram = Histogram(buckets=(1.0, 2.0))
+    histogram.observe(10.0)
+    assert histogram.totals()[0] == [0, 0, 1]
+    assert histogram.quantile(0.99) == 2.0
+
+
+def test_quantile_of_an_empty_histogram_is_nan():
+    assert math.isnan(Histogram().quantile(0.5))
+
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry({'exhibit': 'hall-a'})
+    histogram = registry.histogram('visit_test_seconds', "Test latency", buckets=(0.1, 1.0), detector='face')
+    for value in (0.05, 0.5, 2.0):
+        histogram.observe(value)
+    registry.counter('visit_test_total', "Test count").inc(3)
+
+    assert registry.render().splitlines() == [
+        '# HELP visit_test_seconds Test latency',
+        '# TYPE visit_test_seconds histogram',
+        'visit_test_seconds_bucket{exhibit="hall-a",detector="face",le="0.1"} 1',
+        'visit_test_seconds_bucket{exhibit="hall-a",detector="face",le="1.0"} 2',
+        'visit_test_seconds_bucket{exhibit="hall-a",detector="face",le="+Inf"} 3',
+        'visit_test_seconds_sum{exhibit="hall-a",detector="face"} 2.55',
+        'visit_test_seconds_count{exhibit="hall-a",detector="face"} 3',
+        '# HELP visit_test_total Test count',
+        '# TYPE visit_test_total counter',
+        'visit_test_total{exhibit="hall-a"} 3',
+    ]
+
+
+def test_render_escapes_label_values():
+    registry = MetricsRegistry({'exhibit': 'hall "b"\\2'})
+    registry.counter('visit_test_total', "Test count").inc()
+    assert 'visit_test_total{exhibit="hall \\"b\\"\\\\2"} 1' in registry.render()
+
+
+def test_same_name_and_labels_return_the_same_metric():
+    registry = MetricsRegistry()
+    first = registry.histogram('visit_test_seconds', "Test latency", detector='face')
+    assert registry.histogram('visit_test_seconds', "Test latency", detector='face') is first
+    assert registry.histogram('visit_test_seconds', "Test latency", detector='hands') is not first
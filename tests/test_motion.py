@@ -0,0 +1,72 @@
+# Motion Engine Tests
+# Zone fractions on synthetic frames, warm-up and lighting jumps
+
+import numpy as np
+
+from motion import MotionEngine
+
+WIDTH, HEIGHT = 80, 60
+LEFT = [[0.0, 0.0], [0.5, 0.0], [0.5, 1.0], [0.0, 1.0]]
+RIGHT = [[0.5, 0.0], [1.0, 0.0], [1.0, 1.0], [0.5, 1.0]]
+
+
+def background(level=80):
+    return np.full((HEIGHT, WIDTH), level, dtype=np.uint8)
+
+
+def with_square(x, y, size=16, level=80):
+    frame = background(level)
+    frame[y:y + size, x:x + size] = 255
+    return frame
+
+
+def warmed_up(**kwargs):
+    engine = MotionEngine(warm_up_frames=5, **kwargs)
+    for _ in range(30):
+        engine.process(background())
+    return engine
+
+
+def test_warm_up_reports_nothing():
+    engine = MotionEngine(warm_up_frames=5)
+    for _ in range(5):
+        assert engine.process(with_square(10, 10)) == (False, {})
+
+
+def test_still_scene_is_not_moving():
+    moving, fractions = warmed_up().process(background())
+    assert not moving
+    assert fractions == {'frame': 0.0}
+
+
+def test_movement_is_measured_per_zone():
+    engine = warmed_up(zones=[{'name': 'left', 'polygon': LEFT}, {'name': 'right', 'polygon': RIGHT}])
+    moving, fractions = engine.process(with_square(8, 20))
+    assert moving
+    assert fractions['right'] == 0.0
+    # A 16x16 square in a 40x60 half
+    assert abs(fractions['left'] - 256 / 2400.0) < 0.03
+
+
+def test_each_zone_has_its_own_threshold():
+    engine = warmed_up(zones=[{'name': 'left', 'polygon': LEFT, 'threshold': 0.5},
+                              {'name': 'right', 'polygon': RIGHT}])
+    moving, fractions = engine.process(with_square(8, 20))
+    assert fractions['left'] > 0.05
+    assert not moving
+
+
+def test_lighting_jump_is_not_movement():
+    engine = warmed_up()
+    assert engine.process(background(200)) == (False, {})
+    assert engine.lighting_changes == 1
+    # The new brightness was learned as the background
+    moving, _ = engine.process(background(200))
+    assert not moving
+
+
+def test_reset_starts_a_new_warm_up():
+    engine = warmed_up()
+    engine.reset()
+    assert engine.process(with_square(8, 20)) == (False, {})
+    assert engine.get_stats()['zones'] == {'frame': WIDTH * HEIGHT}
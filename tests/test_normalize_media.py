@@ -0,0 +1,112 @@
+# Media Normalization Tests
+# Incremental reruns of the normalizer and how the app resolves its manifest
+
+import os
+
+import cv2
+import numpy as np
+
+from media_manifest import MANIFEST_FILE, MediaManifest
+from normalize_media import Normalizer
+
+DISPLAY = (64, 48)
+SETTINGS = {'video_fps': 10, 'video_codec': 'libx264', 'video_profile': 'high', 'video_crf': 20,
+            'image_quality': 90, 'audio_codec': 'libvorbis', 'audio_bitrate': '128k',
+            'audio_sample_rate': 44100}
+
+
+def write_image(path, colour):
+    cv2.imwrite(str(path), np.full((30, 40, 3), colour, dtype=np.uint8))
+    return str(path)
+
+
+def touch(path, seconds=60):
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + seconds))
+
+
+def make_normalizer(tmp_path, **kwargs):
+    return Normalizer(str(tmp_path / 'out'), DISPLAY, SETTINGS, source_root=str(tmp_path), **kwargs)
+
+
+def run(tmp_path, sources, **kwargs):
+    normalizer = make_normalizer(tmp_path, **kwargs)
+    results = [normalizer.process(source) for source in sources]
+    normalizer.manifest.save()
+    return results
+
+
+def load_manifest(tmp_path, messages=None):
+    log = messages.append if messages is not None else print
+    return MediaManifest.load(str(tmp_path / 'out' / MANIFEST_FILE), log)
+
+
+def test_rerun_skips_unchanged_files(tmp_path):
+    source = write_image(tmp_path / 'poster.png', 50)
+    assert run(tmp_path, [source]) == ['normalized']
+    assert run(tmp_path, [source]) == ['skipped']
+    assert run(tmp_path, [source], force=True) == ['normalized']
+
+
+def test_touched_file_is_skipped(tmp_path):
+    source = write_image(tmp_path / 'poster.png', 50)
+    run(tmp_path, [source])
+    touch(source)
+    assert run(tmp_path, [source]) == ['skipped']
+    # The new timestamp was recorded, so the next run needs no hash
+    assert load_manifest(tmp_path).entry(source)['source_mtime'] == os.stat(source).st_mtime
+
+
+def test_changed_file_is_normalized_again(tmp_path):
+    source = write_image(tmp_path / 'poster.png', 50)
+    run(tmp_path, [source])
+    write_image(source, 200)
+    touch(source)
+    assert run(tmp_path, [source]) == ['normalized']
+
+
+def test_changed_profile_is_normalized_again(tmp_path):
+    source = write_image(tmp_path / 'poster.png', 50)
+    run(tmp_path, [source])
+    normalizer = Normalizer(str(tmp_path / 'out'), (32, 24), SETTINGS, source_root=str(tmp_path))
+    assert normalizer.process(source) == 'normalized'
+
+
+def test_resolve_plays_the_normalized_copy(tmp_path):
+    source = write_image(tmp_path / 'poster.png', 50)
+    run(tmp_path, [source])
+    manifest = load_manifest(tmp_path)
+    output = manifest.resolve(source)
+    assert output != source
+    assert cv2.imread(output).shape[:2] == (DISPLAY[1], DISPLAY[0])
+    assert manifest.info(source)['width'] == DISPLAY[0]
+
+
+def test_resolve_falls_back_to_a_replaced_source(tmp_path):
+    source = write_image(tmp_path / 'poster.png', 50)
+    run(tmp_path, [source])
+    messages = []
+    manifest = load_manifest(tmp_path, messages)
+    os.remove(source)
+    write_image(source, 200)
+    touch(source)
+    assert manifest.resolve(source) == source
+    assert manifest.info(source) is None
+    assert len(messages) == 1 and 'out of date' in messages[0]
+
+
+def test_resolve_keeps_the_copy_of_a_touched_source(tmp_path):
+    source = write_image(tmp_path / 'poster.png', 50)
+    run(tmp_path, [source])
+    messages = []
+    manifest = load_manifest(tmp_path, messages)
+    touch(source)
+    assert manifest.resolve(source) != source
+    assert messages == []
+
+
+def test_unknown_source_resolves_to_itself(tmp_path):
+    manifest = load_manifest(tmp_path)
+    source = str(tmp_path / 'other.png')
+    assert manifest.resolve(source) == source
+    assert manifest.info(source) is None
@@ -0,0 +1,48 @@
+# Landmark Signal Tests
+# Ring buffers, signal windows and the eye and mouth aspect ratios
+
+import math
+
+import numpy as np
+
+from signals import LEFT_EYE, RIGHT_EYE, RingBuffer, SignalTrack, eye_aspect_ratios
+
+
+def test_ring_buffer_wraps_around_oldest_first():
+    buffer = RingBuffer(3)
+    for value in range(1, 6):
+        buffer.append(value)
+    assert len(buffer) == 3
+    assert buffer.values().tolist() == [3.0, 4.0, 5.0]
+    assert buffer.values(2).tolist() == [4.0, 5.0]
+    assert buffer.last() == 5.0
+
+
+def test_ring_buffer_before_it_fills_and_after_clear():
+    buffer = RingBuffer(4)
+    buffer.append(1)
+    buffer.append(2)
+    assert buffer.values(10).tolist() == [1.0, 2.0]
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.last() is None
+    assert buffer.values().tolist() == []
+
+
+def test_signal_track_ratio_and_slope():
+    track = SignalTrack(capacity=10)
+    for index, value in enumerate((1, 1, 2, 2)):
+        track.append(value, now=index * 0.5)
+    assert track.ratio(2) == 2.0
+    assert abs(track.slope(4) - 0.8) < 1e-9
+    assert math.isnan(SignalTrack().ratio(2))
+
+
+def test_eye_aspect_ratio():
+    points = np.zeros((468, 3), dtype=np.float32)
+    # Corners one unit apart, both lids 0.1 above and below the corners
+    eye = [(0.0, 0.0), (0.25, 0.1), (0.75, 0.1), (1.0, 0.0), (0.75, -0.1), (0.25, -0.1)]
+    for indices in (LEFT_EYE, RIGHT_EYE):
+        for index, (x, y) in zip(indices, eye):
+            points[index, :2] = (x, y)
+    assert np.allclose(eye_aspect_ratios(points), [0.2, 0.2])
@@ -0,0 +1,60 @@
+# Supervisor Tests
+# CPU assignment across the camera workers and the pre-start file checks
+
+import pytest
+
+import supervisor
+from settings import DEFAULT_CAMERAS_SETTINGS
+
+
+@pytest.fixture
+def cpus(monkeypatch):
+    def set_cpus(count):
+        monkeypatch.setattr(supervisor, 'available_cpus', lambda: list(range(count)))
+    return set_cpus
+
+
+def test_free_cores_are_shared_evenly(cpus):
+    cpus(8)
+    workers = [{'name': 'hall'}, {'name': 'foyer'}]
+    assert supervisor.assign_cpus(workers) == {'hall': [0, 1, 2, 3], 'foyer': [4, 5, 6, 7]}
+
+
+def test_configured_cores_are_kept_and_left_out_of_the_share(cpus):
+    cpus(8)
+    workers = [{'name': 'hall', 'cpus': [0, 1]}, {'name': 'foyer'}, {'name': 'garden'}]
+    assert supervisor.assign_cpus(workers) == {'hall': [0, 1], 'foyer': [2, 3, 4], 'garden': [5, 6, 7]}
+
+
+def test_more_workers_than_cores_share_round_robin(cpus):
+    cpus(2)
+    workers = [{'name': name} for name in ('a', 'b', 'c')]
+    assert supervisor.assign_cpus(workers) == {'a': [0], 'b': [1], 'c': [0]}
+
+
+def test_every_core_configured_leaves_the_rest_on_all_cores(cpus):
+    cpus(2)
+    workers = [{'name': 'hall', 'cpus': [0, 1]}, {'name': 'foyer'}]
+    assert supervisor.assign_cpus(workers) == {'hall': [0, 1], 'foyer': [0, 1]}
+
+
+def make_worker(tmp_path, **config):
+    config = dict({'name': 'hall', 'media_config': 'hall.json'}, **config)
+    return supervisor.Worker(config, [0], DEFAULT_CAMERAS_SETTINGS['restart'], config_dir=str(tmp_path))
+
+
+def test_missing_files_are_reported(tmp_path):
+    worker = make_worker(tmp_path, settings_dir='hall')
+    assert worker.missing_files() == [str(tmp_path / 'hall.json'), str(tmp_path / 'hall')]
+    (tmp_path / 'hall.json').write_text('{}')
+    (tmp_path / 'hall').mkdir()
+    assert worker.missing_files() == []
+
+
+def test_command_passes_the_worker_configuration(tmp_path):
+    worker = make_worker(tmp_path, camera=2, port=9200, metrics_port=9300)
+    command = worker.command()
+    assert command[command.index('--config') + 1] == str(tmp_path / 'hall.json')
+    assert command[command.index('--camera') + 1] == '2'
+    assert command[command.index('--metrics-port') + 1] == '9300'
+    assert '--settings-dir' not in command
@@ -0,0 +1,65 @@
+# Trigger State Machine Tests
+# Hysteresis, dwell and cooldown between detection flags and media categories
+
+from trigger_state import TriggerStateMachine
+
+PRIORITY = ['face', 'movement']
+MEDIA = {'face': 'face_detection', 'movement': 'movement_detection'}
+
+
+def make_machine(**settings):
+    base = {'response_time': 0.0, 'enter': 0.6, 'exit': 0.3, 'min_dwell': 0.0, 'cooldown': 0.0}
+    base.update(settings)
+    return TriggerStateMachine(base, PRIORITY, MEDIA, clock=lambda: 0.0)
+
+
+def test_evidence_must_reach_enter_before_switching():
+    machine = make_machine(response_time=0.3)
+    assert machine.update({'face': True}, now=0.0) == 'default'
+    assert machine.update({'face': True}, now=0.1) == 'default'
+    # 1 - exp(-0.3 / 0.3) = 0.63 is past the 0.6 enter threshold
+    assert machine.update({'face': True}, now=0.3) == 'face_detection'
+
+
+def test_release_waits_for_the_exit_threshold():
+    machine = make_machine(response_time=0.3)
+    machine.update({'face': True}, now=0.0)
+    assert machine.update({'face': True}, now=2.0) == 'face_detection'
+    # A single missed frame does not drop the evidence below 0.3
+    assert machine.update({}, now=2.1) == 'face_detection'
+    assert machine.update({}, now=3.0) == 'default'
+
+
+def test_higher_priority_state_wins():
+    machine = make_machine()
+    assert machine.update({'face': True, 'movement': True}, now=0.0) == 'face_detection'
+
+
+def test_min_dwell_holds_the_current_category():
+    machine = make_machine(states={'movement': {'min_dwell': 2.0}})
+    assert machine.update({'movement': True}, now=0.0) == 'movement_detection'
+    assert machine.update({'face': True}, now=1.0) == 'movement_detection'
+    assert machine.suppressed_by_dwell == 1
+    assert machine.update({'face': True}, now=2.5) == 'face_detection'
+
+
+def test_cooldown_blocks_an_immediate_return():
+    machine = make_machine(states={'face': {'cooldown': 5.0}})
+    assert machine.update({'face': True}, now=0.0) == 'face_detection'
+    assert machine.update({}, now=1.0) == 'default'
+    assert machine.update({'face': True}, now=2.0) == 'default'
+    assert machine.suppressed_by_cooldown == 1
+    assert machine.update({'face': True}, now=6.5) == 'face_detection'
+
+
+def test_categories_without_media_never_win():
+    machine = make_machine()
+    machine.set_media_categories(['face_detection'])
+    assert machine.update({'movement': True}, now=0.0) == 'default'
+    assert machine.update({'movement': True, 'face': True}, now=1.0) == 'face_detection'
+
+
+def test_disabled_machine_follows_the_raw_flags():
+    machine = make_machine(enabled=False, min_dwell=10.0)
+    assert machine.update({'movement': True}, now=0.0) == 'movement_detection'
+    assert machine.update({'face': True}, now=0.1) == 'face_detection'
@@ -0,0 +1,101 @@
+# Video Playback Tests
+# Pre-rolling every clip within the budget and instant switches back after a rewind
+
+import time
+
+import cv2
+import numpy as np
+
+from video_player import VideoDecoder, VideoPlaybackEngine
+
+DISPLAY = (32, 24)
+FRAME_MB = DISPLAY[0] * DISPLAY[1] * 3 / (1024 * 1024)
+
+
+def write_clip(folder, name, frames=10):
+    """A clip whose frame i is a flat grey of brightness 20 * i"""
+    path = str(folder / name)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, DISPLAY)
+    for index in range(frames):
+        writer.write(np.full((DISPLAY[1], DISPLAY[0], 3), 20 * index, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def frame_index(frame):
+    return int(round(frame.mean() / 20))
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def make_engine(preroll_mb=64):
+    return VideoPlaybackEngine(DISPLAY, buffer_frames=4, preroll_frames=2, preroll_mb=preroll_mb)
+
+
+def test_every_clip_is_prerolled_within_the_budget(tmp_path):
+    paths = {category: write_clip(tmp_path, f'{category}.avi')
+             for category in ('default', 'face_detection', 'hands_detection', 'pose_detection')}
+    engine = make_engine()
+    try:
+        engine.prepare(dict(paths, smile_detection=None))
+        assert set(engine.decoders) == set(paths.values())
+        wait_until(lambda: all(decoder.is_ready for decoder in engine.decoders.values()))
+        engine.play('pose_detection', paths['pose_detection'])
+        assert engine.get_stats()['instant_switches'] == 1
+    finally:
+        engine.stop()
+
+
+def test_budget_keeps_default_and_the_likely_next_clips(tmp_path):
+    paths = {category: write_clip(tmp_path, f'{category}.avi')
+             for category in ('default', 'face_detection', 'hands_detection', 'pose_detection')}
+    # Room for two pre-rolled clips besides default
+    engine = make_engine(preroll_mb=3.5 * 2 * FRAME_MB)
+    try:
+        engine.transitions[(None, 'pose_detection')] = 3
+        engine.prepare(paths)
+        assert set(engine.decoders) == {paths['default'], paths['pose_detection'], paths['face_detection']}
+        engine.transitions[(None, 'hands_detection')] = 5
+        engine.prepare(paths)
+        assert set(engine.decoders) == {paths['default'], paths['hands_detection'], paths['pose_detection']}
+    finally:
+        engine.stop()
+
+
+def test_rewind_keeps_the_first_frames(tmp_path):
+    decoder = VideoDecoder(write_clip(tmp_path, 'clip.avi'), DISPLAY, buffer_frames=4, preroll_frames=2)
+    decoder.start()
+    try:
+        decoder.activate()
+        wait_until(lambda: len(decoder.frames) == 4)
+        assert [frame_index(decoder.pop_frame()) for _ in range(4)] == [0, 1, 2, 3]
+        decoder.rewind()
+        # Ready at once, without waiting for the decoder thread
+        assert decoder.is_ready
+        decoder.activate()
+        seen = []
+        while len(seen) < 5:
+            wait_until(lambda: decoder.is_ready)
+            seen.append(frame_index(decoder.pop_frame()))
+        assert seen == [0, 1, 2, 3, 4]
+    finally:
+        decoder.stop()
+
+
+def test_switching_back_is_instant(tmp_path):
+    paths = {'default': write_clip(tmp_path, 'default.avi'), 'face_detection': write_clip(tmp_path, 'face.avi')}
+    engine = make_engine()
+    try:
+        engine.prepare(paths)
+        wait_until(lambda: all(decoder.is_ready for decoder in engine.decoders.values()))
+        engine.play('default', paths['default'])
+        engine.play('face_detection', paths['face_detection'])
+        engine.play('default', paths['default'])
+        assert engine.get_stats()['instant_switches'] == 3
+    finally:
+        engine.stop()